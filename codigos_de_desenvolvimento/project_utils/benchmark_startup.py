@@ -0,0 +1,89 @@
+'''
+Mede o tempo de inicialização (cold start) das importações empregadas pelo notebook detect_image.
+
+Exemplo de uso (a partir da pasta codigos_de_desenvolvimento):
+
+    python -m project_utils.benchmark_startup --repeats 5
+
+Cada importação é executada em um novo processo Python, de modo que nenhum módulo já esteja em memória.
+Além do tempo, são listados os módulos pesados (IceVision, FiftyOne, Plotly, Pandas, código de treinamento)
+carregados por cada importação.
+'''
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# importações comparadas: a antiga (via fo_dataset_pipeline) e a atual (apenas inferência)
+IMPORTS = {
+    'fo_dataset_pipeline': 'from project_utils.fo_dataset_pipeline import *\nfrom project_utils.draw_detections import *',
+    'inference': 'from project_utils.inference import *\nfrom project_utils.draw_detections import *',
+}
+
+HEAVY_MODULES = ('icevision', 'fiftyone', 'plotly', 'pandas', 'project_utils.training_pipeline', 'fastai', 'pytorch_lightning')
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{'seconds': seconds, 'heavy': heavy}}))
+'''
+
+
+def measure_import(statement, repeats=5):
+    '''
+    Função responsável por medir o tempo de uma importação em processos Python novos.
+
+    Parâmetros
+    ----------
+        statement : código da importação
+        repeats : quantidade de repetições
+
+    Retorno
+    ----------
+        Dicionário com os tempos mínimo e mediano (em segundos) e os módulos pesados carregados,
+        ou com a última linha do erro caso a importação falhe (por exemplo, dependência não instalada)
+    '''
+
+    timings, heavy = [], []
+
+    for _ in range(repeats):
+        process = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True
+        )
+
+        if process.returncode != 0:
+            return {'error': process.stderr.strip().splitlines()[-1]}
+
+        # a última linha contém o resultado (as importações podem imprimir avisos antes)
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        heavy = result['heavy']
+
+    return {'min_seconds': min(timings), 'median_seconds': statistics.median(timings), 'heavy_modules': heavy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede o tempo de inicialização das importações de inferência.')
+    parser.add_argument('--repeats', type=int, default=5, help='quantidade de repetições por importação')
+    args = parser.parse_args()
+
+    for name, statement in IMPORTS.items():
+        result = measure_import(statement, repeats=args.repeats)
+
+        if 'error' in result:
+            print(f"{name}: falhou ({result['error']})")
+            continue
+
+        print(f"{name}: mínimo {result['min_seconds']:.2f}s, mediana {result['median_seconds']:.2f}s, "
+              f"módulos pesados: {', '.join(result['heavy_modules']) or 'nenhum'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+'''
+Inferência em lote sobre a árvore de gravações species/<espécie>/<data>/<arquivo>.
+
+Exemplo de uso (a partir da pasta codigos_de_desenvolvimento):
+
+    python -m project_utils.bulk_inference ../streamlit_app/species/ \
+        ../faster_rcnn/final_test/model_0/mmdet.faster_rcnn_resnext101_32x4d_fpn_1x.pth \
+        --output-dir detections/ --workers 4 --torch-threads 2
+
+Os arquivos concluídos são registrados em um manifesto (JSON Lines) na pasta de saída. Ao executar
+novamente o comando, apenas arquivos novos ou alterados (ou processados com outro modelo ou limiar)
+são processados, de modo que uma execução interrompida continua de onde parou.
+'''
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+
+from . import video_sharding
+
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv', '.mov')
+
+MANIFEST_FILENAME = 'manifest.jsonl'
+
+
+def list_recordings(root_path):
+    '''
+    Função responsável por listar os vídeos da árvore species/<espécie>/<data>/<arquivo>.
+
+    Parâmetros
+    ----------
+        root_path : caminho da pasta species
+
+    Retorno
+    ----------
+        Lista ordenada com os caminhos relativos (espécie/data/arquivo) dos vídeos
+    '''
+
+    recordings = []
+
+    for species in sorted(os.listdir(root_path)):
+        species_path = os.path.join(root_path, species)
+        if not os.path.isdir(species_path): continue
+
+        for date in sorted(os.listdir(species_path)):
+            date_path = os.path.join(species_path, date)
+            if not os.path.isdir(date_path): continue
+
+            for filename in sorted(os.listdir(date_path)):
+                if filename.lower().endswith(VIDEO_EXTENSIONS):
+                    recordings.append(f'{species}/{date}/{filename}')
+
+    return recordings
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    '''
+    Função responsável por calcular o hash SHA-256 de um arquivo, lendo-o em blocos.
+    '''
+
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path):
+    '''
+    Função responsável por carregar o manifesto de arquivos concluídos.
+
+    Cada linha do manifesto é um registro JSON. Como o arquivo é apenas acrescido, o último registro
+    de cada vídeo prevalece. Uma última linha incompleta (execução interrompida durante a escrita) é ignorada.
+
+    Parâmetros
+    ----------
+        manifest_path : caminho do arquivo manifest.jsonl
+
+    Retorno
+    ----------
+        Dicionário que associa o caminho relativo do vídeo ao seu registro
+    '''
+
+    manifest = {}
+
+    if not os.path.exists(manifest_path):
+        return manifest
+
+    with open(manifest_path) as manifest_file:
+        for line in manifest_file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            manifest[entry['recording']] = entry
+
+    return manifest
+
+
+def append_manifest(manifest_path, entry):
+    '''
+    Função responsável por acrescentar um registro ao manifesto, garantindo que ele seja gravado em disco.
+    '''
+
+    with open(manifest_path, 'a') as manifest_file:
+        manifest_file.write(json.dumps(entry) + '\n')
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+
+
+def get_pending_recordings(root_path, recordings, manifest, model=None):
+    '''
+    Função responsável por selecionar os vídeos que ainda precisam ser processados.
+
+    Um vídeo é reprocessado se for novo, se seu tamanho ou data de modificação mudaram (a mesma chave
+    empregada pelo catálogo do app) ou se foi processado com outro modelo (checkpoint ou limiar). Os vídeos
+    não são lidos aqui: o checksum registrado no manifesto é calculado pelo worker que processa o vídeo.
+
+    Parâmetros
+    ----------
+        root_path : caminho da pasta species
+        recordings : lista de caminhos relativos dos vídeos
+        manifest : dicionário retornado por load_manifest
+        model : dicionário retornado por model_signature; se None, o modelo não é comparado
+
+    Retorno
+    ----------
+        Lista de tuplas (caminho relativo, tamanho, data de modificação)
+    '''
+
+    pending = []
+
+    for recording in recordings:
+        stat = os.stat(os.path.join(root_path, recording))
+        entry = manifest.get(recording)
+
+        if (entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+                and (model is None or all(entry.get(key) == value for key, value in model.items()))):
+            continue
+
+        pending.append((recording, stat.st_size, stat.st_mtime))
+
+    return pending
+
+
+def model_signature(checkpoint_path, detection_threshold):
+    '''
+    Função responsável por identificar o modelo empregado na inferência, registrado em cada entrada do manifesto.
+
+    Retorno
+    ----------
+        Dicionário com o checksum do checkpoint e o limiar de confiança
+    '''
+
+    return {
+        'checkpoint_sha256': file_checksum(checkpoint_path),
+        'threshold': detection_threshold,
+    }
+
+
+def _process_recording(video_path, output_path, batch_size, output_format):
+    import cv2
+    from .detection_store import DetectionWriter
+    from .video_inference import detect_video, prediction_to_lists
+
+    start = time.perf_counter()
+    detector = video_sharding.get_worker_detector()
+
+    # calculado no worker, em paralelo com os demais vídeos, e antes da leitura dos frames
+    checksum = file_checksum(video_path)
+
+    # escreve em um arquivo temporário para que uma interrupção não deixe saídas incompletas
+    temp_path = output_path + '.tmp'
+
+    frames = 0
+    results = detect_video(video_path, detector, batch_size=batch_size)
+
+    if output_format == 'npz':
+        video = cv2.VideoCapture(video_path)
+        fps = video.get(cv2.CAP_PROP_FPS)
+        video.release()
+
+        writer = DetectionWriter(fps=fps, classes=detector.class_map.get_classes())
+
+        for frame_index, _, preds in results:
+            writer.add(frame_index, preds)
+            frames += 1
+
+        writer.save(temp_path)
+
+    else:
+        with open(temp_path, 'w') as output_file:
+            for frame_index, _, preds in results:
+                output_file.write(json.dumps({'frame': frame_index, **prediction_to_lists(preds)}) + '\n')
+                frames += 1
+
+    os.replace(temp_path, output_path)
+
+    return frames, time.perf_counter() - start, checksum
+
+
+def iter_bulk_inference(root_path,
+                        checkpoint_path,
+                        output_dir,
+                        num_workers=1,
+                        torch_threads=1,
+                        batch_size=4,
+                        detection_threshold=0.5,
+                        output_format='npz'):
+    '''
+    Função responsável por processar todos os vídeos novos ou alterados da árvore de gravações.
+
+    Para cada vídeo, as detecções são salvas em output_dir/<espécie>/<data>/<arquivo>.npz (colunas de
+    DetectionWriter) ou <arquivo>.jsonl (um frame por linha), e um registro com tamanho, data de
+    modificação, checksum, modelo, quantidade de frames e tempo de processamento é acrescentado ao manifesto.
+    Os vídeos com erro não entram no manifesto e são tentados novamente na próxima execução.
+
+    Parâmetros
+    ----------
+        root_path : caminho da pasta species
+        checkpoint_path : caminho do arquivo .pth do modelo
+        output_dir : pasta onde as detecções e o manifesto são salvos
+        num_workers : quantidade máxima de vídeos processados simultaneamente
+        torch_threads : quantidade de threads do PyTorch em cada processo
+        batch_size : quantidade de frames por batch de inferência
+        detection_threshold : confiança mínima das detecções
+        output_format : formato das detecções (npz ou jsonl)
+
+    Retorno
+    ----------
+        Gerador que produz, à medida que cada vídeo é concluído, uma tupla (caminho relativo, registro
+        acrescentado ao manifesto, exceção); o registro é None quando o processamento falhou, e a exceção, caso contrário
+    '''
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+
+    manifest = load_manifest(manifest_path)
+    model = model_signature(checkpoint_path, detection_threshold)
+    pending = get_pending_recordings(root_path, list_recordings(root_path), manifest, model)
+
+    if not pending:
+        return
+
+    context = multiprocessing.get_context('spawn')
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=context,
+            initializer=video_sharding.init_worker,
+            initargs=(checkpoint_path, torch_threads, detection_threshold)) as executor:
+
+        futures = {}
+
+        for recording, size, mtime in pending:
+            output_path = os.path.join(output_dir, recording + '.' + output_format)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+            future = executor.submit(_process_recording, os.path.join(root_path, recording), output_path, batch_size, output_format)
+            futures[future] = (recording, size, mtime, output_path)
+
+        for future in concurrent.futures.as_completed(futures):
+            recording, size, mtime, output_path = futures[future]
+
+            try:
+                frames, seconds, checksum = future.result()
+            except Exception as error:
+                yield recording, None, error
+                continue
+
+            entry = {
+                'recording': recording,
+                'size': size,
+                'mtime': mtime,
+                'sha256': checksum,
+                'checkpoint': os.path.basename(checkpoint_path),
+                **model,
+                'frames': frames,
+                'seconds': seconds,
+                'output': os.path.relpath(output_path, output_dir),
+                'finished_at': time.time(),
+            }
+
+            append_manifest(manifest_path, entry)
+
+            yield recording, entry, None
+
+
+def run_bulk_inference(root_path, checkpoint_path, output_dir, **kwargs):
+    '''
+    Função responsável por processar todos os vídeos novos ou alterados da árvore de gravações, aguardando
+    o fim do processamento. Os parâmetros são os mesmos de iter_bulk_inference.
+
+    Retorno
+    ----------
+        Tupla (lista com os registros acrescentados ao manifesto, dicionário com o erro de cada vídeo que falhou)
+    '''
+
+    entries, errors = [], {}
+
+    for recording, entry, error in iter_bulk_inference(root_path, checkpoint_path, output_dir, **kwargs):
+        if error is not None:
+            errors[recording] = error
+        else:
+            entries.append(entry)
+
+    return entries, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inferência em lote sobre a árvore species/<espécie>/<data>/<arquivo>.')
+    parser.add_argument('root_path', help='caminho da pasta species')
+    parser.add_argument('checkpoint_path', help='caminho do arquivo .pth do modelo')
+    parser.add_argument('--output-dir', default='detections/', help='pasta onde as detecções e o manifesto são salvos')
+    parser.add_argument('--workers', type=int, default=1, help='quantidade máxima de vídeos processados simultaneamente')
+    parser.add_argument('--torch-threads', type=int, default=1, help='threads do PyTorch em cada processo')
+    parser.add_argument('--batch-size', type=int, default=4, help='frames por batch de inferência')
+    parser.add_argument('--threshold', type=float, default=0.5, help='confiança mínima das detecções')
+    parser.add_argument('--format', choices=('npz', 'jsonl'), default='npz', help='formato das detecções salvas')
+    args = parser.parse_args()
+
+    results = iter_bulk_inference(
+        root_path=args.root_path,
+        checkpoint_path=args.checkpoint_path,
+        output_dir=args.output_dir,
+        num_workers=args.workers,
+        torch_threads=args.torch_threads,
+        batch_size=args.batch_size,
+        detection_threshold=args.threshold,
+        output_format=args.format
+    )
+
+    processed, failed = 0, 0
+
+    for recording, entry, error in results:
+        if error is not None:
+            print(f'Erro ao processar {recording}: {error}')
+            failed += 1
+            continue
+
+        print(f"{recording}: {entry['frames']} frames em {entry['seconds']:.1f}s ({entry['frames'] / max(entry['seconds'], 1e-6):.1f} fps)")
+        processed += 1
+
+    print(f'{processed} arquivo(s) processado(s), {failed} com erro')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+import cv2
+import numpy as np
+
+from .draw_detections import draw_bb
+from .video_inference import make_prediction_dict, read_frames
+
+
+class DetectionWriter():
+    '''
+    Classe responsável por acumular as detecções de um vídeo em colunas e salvá-las em um arquivo NPZ compactado.
+
+    Cada detecção ocupa uma linha nas colunas frame, timestamp, label_id, score e xyxy. As classes são
+    armazenadas uma única vez na coluna classes e referenciadas por label_id.
+
+    Atributos
+    ----------
+        fps : FPS do vídeo, empregado para calcular o timestamp de cada frame
+        width : largura dos frames
+        height : altura dos frames
+        classes : lista com os nomes das classes observadas, na ordem de seus label_id
+        num_frames : total de frames registrados (com ou sem detecções)
+    '''
+
+    def __init__(self, fps, width=0, height=0, classes=None):
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.classes = list(classes) if classes is not None else []
+        self.num_frames = 0
+
+        self._class_ids = {label: index for index, label in enumerate(self.classes)}
+        self._columns = {'frame': [], 'label_id': [], 'score': [], 'xyxy': []}
+
+    def _class_id(self, label):
+        if label not in self._class_ids:
+            self._class_ids[label] = len(self.classes)
+            self.classes.append(label)
+
+        return self._class_ids[label]
+
+    def add(self, frame_index, preds):
+        '''
+        Registra as predições de um frame.
+
+        Parâmetros
+        ----------
+            frame_index : índice do frame no vídeo
+            preds : dicionário de predições do frame
+        '''
+
+        detection = preds['detection']
+        num_detections = len(detection['bboxes'])
+
+        self.width = self.width or preds['width']
+        self.height = self.height or preds['height']
+        self.num_frames = max(self.num_frames, frame_index + 1)
+
+        if num_detections == 0:
+            return
+
+        self._columns['frame'].append(np.full(num_detections, frame_index, dtype=np.int32))
+        self._columns['label_id'].append(np.array([self._class_id(label) for label in detection['labels']], dtype=np.int16))
+        self._columns['score'].append(np.asarray(detection['scores'], dtype=np.float32))
+        self._columns['xyxy'].append(np.array([bbox.xyxy for bbox in detection['bboxes']], dtype=np.int16).reshape(-1, 4))
+
+    def save(self, path):
+        '''
+        Salva as colunas em um arquivo NPZ compactado.
+
+        Parâmetros
+        ----------
+            path : caminho do arquivo .npz
+        '''
+
+        empty = {'frame': np.int32, 'label_id': np.int16, 'score': np.float32}
+
+        columns = {
+            name: np.concatenate(chunks) if chunks else np.zeros(0, dtype=empty[name])
+            for name, chunks in self._columns.items() if name != 'xyxy'
+        }
+        columns['xyxy'] = np.concatenate(self._columns['xyxy']) if self._columns['xyxy'] else np.zeros((0, 4), dtype=np.int16)
+        columns['timestamp'] = (columns['frame'] / self.fps).astype(np.float32) if self.fps else np.zeros_like(columns['score'])
+
+        # passa um objeto de arquivo para que o numpy não acrescente a extensão .npz ao nome
+        with open(path, 'wb') as store_file:
+            np.savez_compressed(
+                store_file,
+                classes=np.array(self.classes, dtype=str),
+                fps=np.float32(self.fps),
+                width=np.int32(self.width),
+                height=np.int32(self.height),
+                num_frames=np.int32(self.num_frames),
+                **columns
+            )
+
+
+class DetectionStore():
+    '''
+    Classe responsável pela leitura de um arquivo NPZ gerado por DetectionWriter.
+
+    Como as detecções estão ordenadas por frame, as consultas por frame ou intervalo de frames
+    são feitas por busca binária (np.searchsorted).
+
+    Atributos
+    ----------
+        classes : array com os nomes das classes
+        fps : FPS do vídeo
+        width : largura dos frames
+        height : altura dos frames
+        num_frames : total de frames do vídeo
+        frame, timestamp, label_id, score, xyxy : colunas das detecções
+    '''
+
+    def __init__(self, path):
+        with np.load(path) as store:
+            self.classes = store['classes']
+            self.fps = float(store['fps'])
+            self.width = int(store['width'])
+            self.height = int(store['height'])
+            self.num_frames = int(store['num_frames'])
+            self.frame = store['frame']
+            self.timestamp = store['timestamp']
+            self.label_id = store['label_id']
+            self.score = store['score']
+            self.xyxy = store['xyxy']
+
+    def rows_for_range(self, start_frame, end_frame):
+        '''
+        Retorna o intervalo de linhas [início, fim) das detecções dos frames entre start_frame e end_frame (exclusivo).
+        '''
+
+        start = np.searchsorted(self.frame, start_frame, side='left')
+        end = np.searchsorted(self.frame, end_frame, side='left')
+
+        return start, end
+
+    def predictions_for_frame(self, frame_index):
+        '''
+        Retorna o dicionário de predições de um frame, na mesma estrutura consumida por draw_bb.
+        '''
+
+        from icevision.core import BBox
+
+        start, end = self.rows_for_range(frame_index, frame_index + 1)
+
+        return make_prediction_dict(
+            bboxes=[BBox.from_xyxy(*xyxy) for xyxy in self.xyxy[start:end].tolist()],
+            labels=[str(self.classes[label_id]) for label_id in self.label_id[start:end]],
+            scores=self.score[start:end],
+            width=self.width,
+            height=self.height
+        )
+
+
+def write_detections(results, store_path, fps, classes=None):
+    '''
+    Função responsável por salvar as detecções de um fluxo de frames em um arquivo NPZ,
+    sem recodificar o vídeo anotado.
+
+    Parâmetros
+    ----------
+        results : iterável de tuplas (índice do frame, frame, predições), como retornado por detect_video
+        store_path : caminho do arquivo .npz
+        fps : FPS do vídeo
+        classes : lista opcional com os nomes das classes (por exemplo, o class_map do modelo)
+
+    Retorno
+    ----------
+        Instância de DetectionWriter após a escrita
+    '''
+
+    writer = DetectionWriter(fps=fps, classes=classes)
+
+    for frame_index, _, preds in results:
+        writer.add(frame_index, preds)
+
+    writer.save(store_path)
+
+    return writer
+
+
+def render_frame(video_path, store, frame_index):
+    '''
+    Função responsável por desenhar as detecções armazenadas sobre um único frame do vídeo.
+
+    Parâmetros
+    ----------
+        video_path : caminho do vídeo
+        store : instância de DetectionStore
+        frame_index : índice do frame
+
+    Retorno
+    ----------
+        Frame BGR anotado ou None caso o frame não possa ser lido
+    '''
+
+    video = cv2.VideoCapture(video_path)
+    video.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    ret, frame = video.read()
+    video.release()
+
+    if not ret:
+        return None
+
+    return draw_bb(frame, store.predictions_for_frame(frame_index))
+
+
+def render_video(video_path, store, output_path, start_frame=0, end_frame=None, fourcc='mp4v'):
+    '''
+    Função responsável por gerar, sob demanda, o vídeo anotado a partir das detecções armazenadas.
+
+    Parâmetros
+    ----------
+        video_path : caminho do vídeo original
+        store : instância de DetectionStore
+        output_path : caminho do vídeo anotado
+        start_frame : primeiro frame do intervalo
+        end_frame : último frame do intervalo (exclusivo; None vai até o fim do vídeo)
+        fourcc : código FourCC do codec do vídeo de saída
+    '''
+
+    video = cv2.VideoCapture(video_path)
+
+    if not video.isOpened():
+        raise IOError(f'Erro ao abrir arquivo: {video_path}')
+
+    fps = video.get(cv2.CAP_PROP_FPS) or store.fps or 30
+    resolution = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, resolution)
+
+    max_frames = None if end_frame is None else end_frame - start_frame
+
+    try:
+        for frame_index, frame in read_frames(video, start_frame=start_frame, max_frames=max_frames):
+            writer.write(draw_bb(frame, store.predictions_for_frame(frame_index)))
+    finally:
+        video.release()
+        writer.release()
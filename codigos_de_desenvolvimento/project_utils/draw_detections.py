@@ -1,4 +1,5 @@
 import cv2
+import numpy as np
 
 def hex_to_rgb(hex_string):
     '''
@@ -12,46 +13,17 @@ def draw_bb(frame, predictions):
     '''
     Função responsável por desenhar as caixas delimitadoras e 
     classes
+
+    O desenho é delegado a uma instância de OverlayRenderer compartilhada, 
+    criada com as especificações de desenho padrões deste módulo
     '''
     
-    ## recupera predições
-    bbox_list = predictions['detection']['bboxes']
-    labels_list = predictions['detection']['labels']
-    score_list = predictions['detection']['scores']
-    detections = zip(bbox_list, labels_list, score_list)
-    
-    
-    for bbox, label, score in detections:
-        xmin, ymin, xmax, ymax = bbox.xyxy
-        
-        # define a cor da fonte
-        if label != 'canario_do_amazonas':
-            font_color = (255,255,255)
-        else: 
-            font_color = (0,0,0)
-            
-        
-        ## canto superior esquerdo e canto inferir direito da bb
-        bb_ltc = (xmin, ymin)
-        bb_rbc = (xmax, ymax)
-        
-        text = f'{label} - {score:.2f}' 
-        text_size, _ = cv2.getTextSize(text, font, font_scale, font_thickness)
-        text_w, text_h = text_size
-        
-        ## canto inferior esquerdo do texto
-        text_lbc = (xmin+5, ymin-5)
-        
-        ## canto superior esquerdo e canto inferior direito do bg 
-        text_bg_ltc = (xmin, text_lbc[1]-text_h-5)
-        text_bg_rbc = (text_lbc[0]+text_w+2,  ymin)
-                
-        color = color_per_label_rgb[label][::-1]
-        frame = cv2.rectangle(frame, bb_ltc, bb_rbc, color, bb_thickness)    
-        frame = cv2.rectangle(frame, text_bg_ltc, text_bg_rbc, color, -1)
-        frame = cv2.putText(frame, text, text_lbc, font, font_scale, font_color, font_thickness, line_type)
-    
-    return frame
+    global _default_renderer
+
+    if _default_renderer is None:
+        _default_renderer = OverlayRenderer()
+
+    return _default_renderer.draw(frame, predictions)
 
 ############### especificações de desenho ###############
 
@@ -78,3 +50,145 @@ font_thickness = 1
 line_type = cv2.LINE_AA
 
 
+class OverlayRenderer():
+    '''
+    Classe responsável por desenhar as predições sobre os frames de forma eficiente.
+
+    As cores de cada classe são convertidas uma única vez e o rótulo de cada par (classe, score) é 
+    pré-renderizado como uma pequena imagem (sprite) contendo o fundo colorido e o texto. Assim, em vez 
+    de chamar cv2.getTextSize, cv2.rectangle e cv2.putText para cada detecção, basta copiar o sprite 
+    para o frame. Os scores são agrupados com a mesma precisão exibida no texto (duas casas decimais), 
+    logo há no máximo 101 sprites por classe. As caixas de uma mesma classe são desenhadas com uma 
+    única chamada de cv2.polylines.
+
+    Atributos
+    ----------
+        colors_bgr : dicionário com a cor BGR de cada classe
+        bb_thickness : espessura das caixas delimitadoras
+        font : fonte da OpenCV empregada nos rótulos
+        font_scale : escala da fonte
+        font_thickness : espessura da fonte
+        line_type : tipo de linha da fonte
+        buffer : frame pré-alocado onde o desenho é feito quando copy=True
+    '''
+
+    def __init__(self, 
+                 colors_hex=color_per_label_hex, 
+                 bb_thickness=bb_thickness, 
+                 font=font, 
+                 font_scale=font_scale, 
+                 font_thickness=font_thickness, 
+                 line_type=line_type):
+
+        # a OpenCV espera as cores em BGR
+        self.colors_bgr = {label: tuple(hex_to_rgb(value)[::-1]) for label, value in colors_hex.items()}
+        self.bb_thickness = bb_thickness
+        self.font = font
+        self.font_scale = font_scale
+        self.font_thickness = font_thickness
+        self.line_type = line_type
+        self.buffer = None
+
+        self._sprites = {}
+
+    def _font_color(self, label):
+        # o fundo amarelo do canário exige fonte preta
+        if label != 'canario_do_amazonas':
+            return (255, 255, 255)
+        return (0, 0, 0)
+
+    def get_sprite(self, label, score):
+        '''
+        Retorna o sprite do rótulo (fundo colorido e texto), renderizando-o apenas na primeira vez.
+
+        Parâmetros
+        ----------
+            label : nome da classe
+            score : confiança da detecção
+
+        Retorno
+        ----------
+            Array BGR com o rótulo renderizado
+        '''
+
+        key = (label, int(round(float(score) * 100)))
+        sprite = self._sprites.get(key)
+
+        if sprite is None:
+            text = f'{label} - {key[1] / 100:.2f}'
+            (text_w, text_h), _ = cv2.getTextSize(text, self.font, self.font_scale, self.font_thickness)
+
+            # mesma geometria empregada originalmente: margem de 5 pixels à esquerda e abaixo do texto
+            # e de 5 pixels acima dele, além de 2 pixels à direita; como em cv2.rectangle, os cantos são
+            # incluídos, e a última linha do sprite coincide com o topo da caixa
+            sprite = np.empty((text_h + 11, text_w + 8, 3), dtype=np.uint8)
+            sprite[:] = self.colors_bgr[label]
+
+            cv2.putText(sprite, text, (5, text_h + 5), self.font, self.font_scale, 
+                        self._font_color(label), self.font_thickness, self.line_type)
+
+            self._sprites[key] = sprite
+
+        return sprite
+
+    def _get_buffer(self, frame):
+        if self.buffer is None or self.buffer.shape != frame.shape:
+            self.buffer = np.empty_like(frame)
+
+        np.copyto(self.buffer, frame)
+        return self.buffer
+
+    def draw(self, frame, predictions, copy=False):
+        '''
+        Desenha as caixas e rótulos das predições sobre o frame.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+            predictions : dicionário de predições (mesma estrutura retornada por end2end_detect)
+            copy : se True, o desenho é feito no buffer pré-alocado e o frame original é preservado
+
+        Retorno
+        ----------
+            Frame anotado (o próprio frame ou o buffer)
+        '''
+
+        canvas = self._get_buffer(frame) if copy else frame
+        frame_h, frame_w = canvas.shape[:2]
+
+        detection = predictions['detection']
+        detections = list(zip(detection['bboxes'], detection['labels'], detection['scores']))
+
+        # agrupa as caixas por classe para desenhá-las com uma única chamada
+        boxes_per_label = {}
+
+        for bbox, label, _ in detections:
+            xmin, ymin, xmax, ymax = (int(value) for value in bbox.xyxy)
+            corners = np.array([[xmin, ymin], [xmax, ymin], [xmax, ymax], [xmin, ymax]], dtype=np.int32)
+            boxes_per_label.setdefault(label, []).append(corners)
+
+        for label, boxes in boxes_per_label.items():
+            cv2.polylines(canvas, boxes, True, self.colors_bgr[label], self.bb_thickness)
+
+        # os rótulos são copiados depois das caixas para ficarem por cima delas
+        for bbox, label, score in detections:
+            xmin, ymin = int(bbox.xyxy[0]), int(bbox.xyxy[1])
+            sprite = self.get_sprite(label, score)
+            sprite_h, sprite_w = sprite.shape[:2]
+
+            top, left = ymin - sprite_h + 1, xmin
+
+            # recorta o sprite nas bordas do frame
+            y0, x0 = max(top, 0), max(left, 0)
+            y1, x1 = min(top + sprite_h, frame_h), min(left + sprite_w, frame_w)
+
+            if y1 <= y0 or x1 <= x0:
+                continue
+
+            canvas[y0:y1, x0:x1] = sprite[y0 - top:y1 - top, x0 - left:x1 - left]
+
+        return canvas
+
+
+# instância compartilhada empregada por draw_bb, criada no primeiro uso
+_default_renderer = None
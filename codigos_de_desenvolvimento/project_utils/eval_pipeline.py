@@ -1,9 +1,6 @@
 from icevision.all import *
 from icevision.models import *
 
-import pandas as pd
-import fiftyone as fo
-import plotly.express as px 
 
 def eval_fo_dataset(fo_dataset, 
                     eval_key = None,
@@ -54,6 +51,8 @@ def make_confusion_matrix(results, path_to_save):
         path_to_save: caminho do diretório onde a figura do gráfico será salva
     '''
         
+    import plotly.express as px
+
     # armazena os dados da matriz de confusão
     #cm  = results._confusion_matrix()[0][:-1,:] # só é selecionado até a penúltima linha de modo a excluir a linha background
     # passa a selecionar todas as linhas, não ignorando a de background
@@ -103,6 +102,8 @@ def make_metrics_per_class(fo_dataset, results, path_to_save):
         path_to_save: caminho do diretório onde o arquivo CSV será salvo
     '''
     
+    import pandas as pd
+
     # armazena as classes do dataset
     classes = results.classes
 
@@ -166,6 +167,8 @@ def make_dataset_final_metrics(fo_dataset, results, results_mAP, path_to_save):
         path_to_save: caminho do diretório onde o arquivo CSV será salvo
     '''
 
+    import pandas as pd
+
     # dicionária com as métricas (precision, recall e f1-score) computadas
     final_metrics = results.metrics(average='macro')
     
@@ -1,9 +1,7 @@
 from icevision.all import *
 from icevision.models import *
 from .training_pipeline import *
-
-import pandas as pd
-import fiftyone as fo
+from .inference import get_model_from_checkpoint
 
 def get_fo_dataset_name(model_path):
     '''
@@ -24,43 +22,6 @@ def get_fo_dataset_name(model_path):
     return '_'.join(model_path.split('/')[-4:-1])
 
 
-def get_model_from_checkpoint(checkpoint_path):
-    '''
-    Função responsável por instanciar o modelo treinado a partir do seu checkpoint, contido em um arquivo .pth.
-
-    Além disso, retorna algumas dados de treinamento como a especificação do tipo de modelo, o tamanho das imagens de treinamento 
-    e o mapa de classes do conjunto de dados, de modo que eles possam ser empregados para a criação do dataset FiftyOne.
-
-
-    Parâmetros
-    ----------
-        checkpoint_path : caminho para arquivo .pth contendo o checkpoint do modelo.
-    
-    Retorno
-    ----------
-        model_type : especificação da IceVision sobre o tipo do modelo
-        model : instância do modelo treinado
-        img_size : tamanho de imagem empregada no treinamento 
-        class_map : mapa de classes do conjunto com o qual o modelo foi treiando
-    '''
-     
-    # a partir do caminho do checkpoint do modelo, carrega os dados
-    checkpoint_and_model = model_from_checkpoint(checkpoint_path)
-
-    # recupera a especificação do tipo de modelo empregado
-    model_type = checkpoint_and_model["model_type"]
-
-    # recupera o modelo com os parâmetros treinados
-    model = checkpoint_and_model["model"]
-    
-    # recupera o tamanho da imagem empregada para o treinamento do modelo
-    img_size = checkpoint_and_model["img_size"]
-
-    # recupera o mapa de classes 
-    class_map = checkpoint_and_model["class_map"]
-
-    return model_type, model, img_size, class_map
-
 def make_sorted_predictions_by_loss(model_type, model, infer_ds, sort_by='loss_total'):
     '''
     Função responsável por realizar as predições ordenadas pela loss. 
@@ -101,6 +62,8 @@ def save_loss_per_sample(sorted_samples, path_dir):
         sample_losses_df: dataframe contendo as losses de cada imagem
     '''
 
+    import pandas as pd
+
     # retorna uma lista de dicionários contendo as losses e o caminho da amostra
     sample_losses = get_samples_losses(sorted_samples)
     
@@ -189,6 +152,8 @@ def apply_fo_dataset_pipeline(model_path, dataset_name, dataset_type='partial'):
         dataset_type: se o conjunto dos dados se refere ao parcial ou completo 
     '''
 
+    import fiftyone as fo
+
     # se o dataset já existir, interrompa a execução da função neste ponto
     if dataset_name in fo.list_datasets(): return
     
@@ -200,8 +165,9 @@ def apply_fo_dataset_pipeline(model_path, dataset_name, dataset_type='partial'):
     # define o caminho para o arquivo de checkpoint
     checkpoint_path = model_path + checkpoint_filename
     
-    # carregando o modelo
-    model_type, model, img_size, _ = get_model_from_checkpoint(checkpoint_path)
+    # carregando o modelo (a partir do registro, evitando recarregar um checkpoint já em memória)
+    from .model_registry import get_cached_model
+    model_type, model, img_size, _ = get_cached_model(checkpoint_path)
 
     # parse do conjunto de dados
     train_records, valid_records, class_map = parse_data(dataset_type=dataset_type)
@@ -0,0 +1,97 @@
+# Este módulo concentra o necessário para a inferência com um modelo treinado. A IceVision é importada
+# apenas dentro das funções (qualquer submódulo executa icevision/__init__, que carrega o pacote inteiro),
+# de modo que importar este módulo não carrega a IceVision, FiftyOne, Plotly, Pandas nem o código de treinamento.
+
+
+def get_model_from_checkpoint(checkpoint_path):
+    '''
+    Função responsável por instanciar o modelo treinado a partir do seu checkpoint, contido em um arquivo .pth.
+
+    Além disso, retorna algumas dados de treinamento como a especificação do tipo de modelo, o tamanho das imagens de treinamento 
+    e o mapa de classes do conjunto de dados, de modo que eles possam ser empregados para a criação do dataset FiftyOne.
+
+
+    Parâmetros
+    ----------
+        checkpoint_path : caminho para arquivo .pth contendo o checkpoint do modelo.
+    
+    Retorno
+    ----------
+        model_type : especificação da IceVision sobre o tipo do modelo
+        model : instância do modelo treinado
+        img_size : tamanho de imagem empregada no treinamento 
+        class_map : mapa de classes do conjunto com o qual o modelo foi treiando
+    '''
+     
+    from icevision.models.checkpoint import model_from_checkpoint
+
+    # a partir do caminho do checkpoint do modelo, carrega os dados
+    checkpoint_and_model = model_from_checkpoint(checkpoint_path)
+
+    # recupera a especificação do tipo de modelo empregado
+    model_type = checkpoint_and_model["model_type"]
+
+    # recupera o modelo com os parâmetros treinados
+    model = checkpoint_and_model["model"]
+    
+    # recupera o tamanho da imagem empregada para o treinamento do modelo
+    img_size = checkpoint_and_model["img_size"]
+
+    # recupera o mapa de classes 
+    class_map = checkpoint_and_model["class_map"]
+
+    return model_type, model, img_size, class_map
+
+
+def get_tfms(img_size, presize=None, tfms_type ='valid'):
+    '''
+    Função responsável por especificir os tipos de transformações 
+    aplicadas sobre as imagens para o redimensionamento ou aumento de dados.
+    
+    Vale ressaltar que a IceVision emprega a biblioteca Albumentations para realizar as transformações.
+    Além disso, as transformações são aplicadas on-the-fly, isto é, elas existem em tempo de execução apenas, 
+    não havendo a criação de imagens estáticas transformadas. 
+
+    Caso as transformações sejam referentes aos dados de treinamento, é empregada a função tfms.A.aug_tfms 
+    que retorna uma lista de transformações da biblioteca Albumentations pré-definidas pela IceVision a saber: 
+
+        - HorizontalFlip : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.transforms.HorizontalFlip
+        - ShiftScaleRotate : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.transforms.ShiftScaleRotate        
+        - RGBShift : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.transforms.RGBShift
+        - RandomBrightnessContrast : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.transforms.RandomBrightnessContrast
+        - Blur : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.blur.transforms.Blur
+        - RandomSizedBBoxSafeCrop: https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.crops.transforms.RandomSizedBBoxSafeCrop
+        - PadIfNeeded : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.transforms.PadIfNeeded
+    
+    Outro ponto importante a ser ressaltado é que as transformações são aplicadas aleatoriamente. Dessa forma, nem sempre todas 
+    as transformações especificadas serão aplicadas, além disso os valores que as especificam pode variar.
+
+    Caso as transformações sejam referentes aos dados de validação, é empregada a função tfms.A.resize_and_pad que apenas
+    especifica transformações de redimensionamento (com padding), a saber:   
+        - LongestMaxSize : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.resize.LongestMaxSize
+        - PadIfNeeded : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.transforms.PadIfNeeded
+
+    Eem ambos os casos, é realizada a normalização das imagens por meio da classe Normalize da bilioteca Albumentations.
+    A normalização é dada pela fórmula img = (img - mean * max_pixel_value) / (std * max_pixel_value). 
+        - Normalize : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.transforms.Normalize
+
+    Parâmetros
+    ----------
+        img_size : tamanho da imagem a ser redimensionada
+        presize : tamanho do presizing (técnica introduzida pela biblioteca Fastai)
+        tfms_type : tipo de transformação (train para conjunto de treinamento ou valid para conjunto de validação)
+    
+    Retorna
+    ----------
+        Uma lista com transformações especificadas
+    '''
+
+    from icevision import tfms
+
+    # se os dados forem de treinamento
+    if tfms_type  == 'train':
+        return tfms.A.Adapter([*tfms.A.aug_tfms(size=img_size, presize=presize), tfms.A.Normalize()]) 
+
+    # se os dados forem de validação
+    if tfms_type == 'valid':
+        return tfms.A.Adapter([*tfms.A.resize_and_pad(img_size), tfms.A.Normalize()])
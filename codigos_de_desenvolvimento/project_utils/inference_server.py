@@ -0,0 +1,326 @@
+'''
+Serviço HTTP local de inferência, que mantém o modelo carregado em um único processo.
+
+Exemplo de uso (a partir da pasta codigos_de_desenvolvimento):
+
+    python -m project_utils.inference_server \
+        ../faster_rcnn/final_test/model_0/mmdet.faster_rcnn_resnext101_32x4d_fpn_1x.pth --port 8000
+
+Rotas:
+
+    POST /detect   corpo com uma imagem JPEG/PNG (Content-Type image/jpeg ou image/png) ou um frame bruto
+                   BGR uint8 (Content-Type application/octet-stream e cabeçalhos X-Width e X-Height)
+    GET  /metrics  profundidade da fila, tamanho dos batches e latências
+    GET  /health   verificação de disponibilidade
+'''
+
+import argparse
+import collections
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from .video_inference import BatchDetector, prediction_to_lists
+
+
+class PendingRequest():
+    '''
+    Classe responsável por armazenar um frame aguardando inferência e, posteriormente, seu resultado.
+
+    Atributos
+    ----------
+        frame : frame BGR
+        enqueued_at : instante em que o frame entrou na fila
+        result : predições do frame (após a inferência)
+        error : exceção levantada durante a inferência, se houver
+        done : evento sinalizado ao final da inferência
+    '''
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.enqueued_at = time.perf_counter()
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher():
+    '''
+    Classe responsável por agrupar requisições concorrentes em micro-batches.
+
+    Uma thread dedicada aguarda a primeira requisição da fila e, a partir dela, espera no máximo
+    max_wait_seconds por outras requisições, até completar max_batch_size frames. O batch é então
+    inferido de uma única vez, o que aumenta a vazão sem acrescentar mais que max_wait_seconds de latência.
+
+    Atributos
+    ----------
+        detector : instância de BatchDetector
+        max_batch_size : quantidade máxima de frames por batch
+        max_wait_seconds : tempo máximo de espera para completar um batch
+    '''
+
+    def __init__(self, detector, max_batch_size=8, max_wait_seconds=0.01, max_queue_size=256):
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=1000)
+        self._batches = 0
+        self._frames = 0
+        self._infer_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, timeout=30.0):
+        '''
+        Envia um frame para inferência e aguarda o resultado.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+            timeout : tempo máximo de espera pelo resultado
+
+        Retorno
+        ----------
+            Dicionário de predições do frame
+        '''
+
+        request = PendingRequest(frame)
+        self._queue.put(request, timeout=timeout)
+
+        if not request.done.wait(timeout):
+            raise TimeoutError('Tempo de inferência esgotado')
+
+        if request.error is not None:
+            raise request.error
+
+        return request.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_seconds
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+
+            if remaining <= 0:
+                break
+
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            start = time.perf_counter()
+
+            try:
+                predictions = self.detector.detect([request.frame for request in batch])
+            except Exception as error:
+                predictions = [None] * len(batch)
+                for request in batch:
+                    request.error = error
+
+            finished = time.perf_counter()
+
+            with self._lock:
+                self._batches += 1
+                self._frames += len(batch)
+                self._infer_seconds += finished - start
+
+                for request, preds in zip(batch, predictions):
+                    request.result = preds
+                    self._latencies.append(finished - request.enqueued_at)
+
+            for request in batch:
+                request.done.set()
+
+    def metrics(self):
+        '''
+        Retorna um dicionário com a profundidade da fila, o tamanho médio dos batches e as latências
+        (em milissegundos) das últimas requisições.
+        '''
+
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+
+            return {
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'frames': self._frames,
+                'mean_batch_size': self._frames / self._batches if self._batches > 0 else 0.0,
+                'infer_fps': self._frames / self._infer_seconds if self._infer_seconds > 0 else 0.0,
+                'latency_ms_p50': float(np.percentile(latencies, 50)),
+                'latency_ms_p95': float(np.percentile(latencies, 95)),
+                'latency_ms_max': float(latencies.max()),
+            }
+
+
+def decode_request_frame(content_type, headers, body):
+    '''
+    Função responsável por converter o corpo da requisição em um frame BGR.
+
+    Parâmetros
+    ----------
+        content_type : cabeçalho Content-Type da requisição
+        headers : cabeçalhos da requisição
+        body : bytes do corpo da requisição
+
+    Retorno
+    ----------
+        Frame BGR (array numpy)
+    '''
+
+    if content_type == 'application/octet-stream':
+        # os cabeçalhos de http.client retornam None (e não KeyError) quando ausentes
+        width, height = headers.get('X-Width'), headers.get('X-Height')
+
+        if width is None or height is None:
+            raise ValueError('Os cabeçalhos X-Width e X-Height são obrigatórios para frames brutos')
+
+        width, height = int(width), int(height)
+
+        if width <= 0 or height <= 0 or len(body) != width * height * 3:
+            raise ValueError(f'O corpo deve conter {width}x{height}x3 bytes')
+
+        return np.frombuffer(body, dtype=np.uint8).reshape(height, width, 3)
+
+    frame = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    if frame is None:
+        raise ValueError('Imagem inválida')
+
+    return frame
+
+
+def make_handler(batcher):
+    '''
+    Função responsável por criar a classe que trata as requisições HTTP, associada ao micro-batcher.
+    '''
+
+    class InferenceHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send_json(200, batcher.metrics())
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            else:
+                self._send_json(404, {'error': 'rota não encontrada'})
+
+        def do_POST(self):
+            if self.path != '/detect':
+                self._send_json(404, {'error': 'rota não encontrada'})
+                return
+
+            content_length = self.headers.get('Content-Length')
+
+            if content_length is None:
+                self._send_json(411, {'error': 'o cabeçalho Content-Length é obrigatório'})
+                return
+
+            try:
+                content_length = int(content_length)
+            except ValueError:
+                content_length = -1
+
+            if content_length < 0:
+                self._send_json(400, {'error': 'Content-Length inválido'})
+                return
+
+            body = self.rfile.read(content_length)
+            content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+
+            try:
+                frame = decode_request_frame(content_type, self.headers, body)
+            except (KeyError, ValueError) as error:
+                self._send_json(400, {'error': str(error)})
+                return
+
+            try:
+                preds = batcher.submit(frame)
+            except Exception as error:
+                self._send_json(500, {'error': str(error)})
+                return
+
+            self._send_json(200, prediction_to_lists(preds))
+
+        def log_message(self, format, *args):
+            # evita registrar cada requisição no terminal
+            pass
+
+    return InferenceHandler
+
+
+def serve(checkpoint_path, host='127.0.0.1', port=8000, max_batch_size=8, max_wait_ms=10, detection_threshold=0.5):
+    '''
+    Função responsável por iniciar o serviço de inferência. Por padrão, o serviço escuta apenas em
+    localhost, sem qualquer acesso à rede externa.
+
+    Parâmetros
+    ----------
+        checkpoint_path : caminho para o arquivo .pth do modelo
+        host : endereço em que o serviço escuta
+        port : porta do serviço
+        max_batch_size : quantidade máxima de frames por batch
+        max_wait_ms : tempo máximo, em milissegundos, de espera para completar um batch
+        detection_threshold : confiança mínima das detecções
+    '''
+
+    detector = BatchDetector.from_checkpoint(checkpoint_path, detection_threshold=detection_threshold)
+    batcher = MicroBatcher(detector, max_batch_size=max_batch_size, max_wait_seconds=max_wait_ms / 1000)
+
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    print(f'Servindo em http://{host}:{port}')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serviço HTTP local de inferência com micro-batches.')
+    parser.add_argument('checkpoint_path', help='caminho do arquivo .pth do modelo')
+    parser.add_argument('--host', default='127.0.0.1', help='endereço em que o serviço escuta')
+    parser.add_argument('--port', type=int, default=8000, help='porta do serviço')
+    parser.add_argument('--max-batch-size', type=int, default=8, help='quantidade máxima de frames por batch')
+    parser.add_argument('--max-wait-ms', type=float, default=10, help='espera máxima para completar um batch')
+    parser.add_argument('--threshold', type=float, default=0.5, help='confiança mínima das detecções')
+    args = parser.parse_args()
+
+    serve(
+        checkpoint_path=args.checkpoint_path,
+        host=args.host,
+        port=args.port,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        detection_threshold=args.threshold
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+'''
+Quantização dinâmica em int8 das camadas lineares do modelo PyTorch, para inferência em CPU.
+
+Exemplo de uso (a partir da pasta codigos_de_desenvolvimento):
+
+    python -m project_utils.linear_quantization \
+        ../faster_rcnn/final_test/model_0/mmdet.faster_rcnn_resnext101_32x4d_fpn_1x.pth \
+        ../faster_rcnn/final_test/model_0/model_linear_int8.pt --parity-video demo.mp4
+
+Somente as camadas lineares (a cabeça da Faster R-CNN) são quantizadas: o backbone ResNeXt-101, que
+concentra a maior parte do custo, continua em fp32, de modo que o ganho de tempo é limitado. O artefato
+é o módulo PyTorch serializado (pickle) e, para ser carregado, exige o mesmo ambiente do treinamento
+(IceVision, mmdet e as mesmas classes); não se trata de um artefato ONNX ou TorchScript independente.
+'''
+
+import argparse
+import importlib
+import inspect
+import time
+
+import cv2
+import numpy as np
+
+from .inference import get_model_from_checkpoint
+from .tracking import greedy_match, iou_matrix
+from .video_inference import BatchDetector, read_frames
+
+
+def quantize_linear_layers(model):
+    '''
+    Função responsável por aplicar a quantização dinâmica em int8 sobre as camadas lineares do modelo.
+
+    Na Faster R-CNN, as camadas lineares correspondem às camadas totalmente conectadas da cabeça de
+    classificação e regressão das caixas, executadas para cada uma das propostas de região. Os pesos
+    passam a ser armazenados em int8 e as ativações são quantizadas dinamicamente durante a inferência.
+
+    Parâmetros
+    ----------
+        model : instância do modelo treinado
+
+    Retorno
+    ----------
+        Cópia quantizada do modelo, em modo de avaliação
+    '''
+
+    import torch
+
+    return torch.quantization.quantize_dynamic(model.eval().cpu(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_linear_quantized_model(checkpoint_path, output_path):
+    '''
+    Função responsável por carregar o checkpoint, quantizar as camadas lineares do modelo e salvar o artefato resultante.
+
+    O artefato contém o módulo quantizado serializado, o nome do módulo IceVision do tipo de modelo,
+    o tamanho de imagem e o mapa de classes. A rede não é reconstruída a partir da configuração, mas o
+    carregamento continua exigindo a IceVision e o mmdet instalados.
+
+    Parâmetros
+    ----------
+        checkpoint_path : caminho para o arquivo .pth do modelo treinado
+        output_path : caminho do artefato quantizado
+    '''
+
+    import torch
+
+    model_type, model, img_size, class_map = get_model_from_checkpoint(checkpoint_path)
+
+    torch.save({
+        'model': quantize_linear_layers(model),
+        'model_type': model_type.__name__,
+        'img_size': img_size,
+        'class_map': class_map,
+        'source_checkpoint': checkpoint_path,
+        'quantization': 'dynamic_int8_linear',
+    }, output_path)
+
+
+def load_linear_quantized_model(artifact_path):
+    '''
+    Função responsável por carregar um artefato gerado por export_linear_quantized_model.
+
+    O retorno segue o mesmo formato de get_model_from_checkpoint. Como o modelo quantizado continua
+    sendo um módulo do mesmo tipo, ele pode ser empregado diretamente em model_type.end2end_detect.
+
+    Parâmetros
+    ----------
+        artifact_path : caminho do artefato quantizado
+
+    Retorno
+    ----------
+        model_type : especificação da IceVision sobre o tipo do modelo
+        model : instância do modelo quantizado
+        img_size : tamanho de imagem empregado no treinamento
+        class_map : mapa de classes do conjunto com o qual o modelo foi treinado
+    '''
+
+    import torch
+
+    # o artefato é um módulo serializado (pickle); a partir do torch 2.6, torch.load carrega apenas pesos por padrão
+    options = {'weights_only': False} if 'weights_only' in inspect.signature(torch.load).parameters else {}
+    artifact = torch.load(artifact_path, map_location='cpu', **options)
+    model_type = importlib.import_module(artifact['model_type'])
+
+    return model_type, artifact['model'].eval(), artifact['img_size'], artifact['class_map']
+
+
+class LinearQuantizedDetector(BatchDetector):
+    '''
+    Classe responsável pela inferência em batch com o modelo de camadas lineares quantizadas. Possui a mesma
+    interface de BatchDetector e, portanto, pode substituí-lo nos pipelines de vídeo.
+    '''
+
+    @classmethod
+    def from_artifact(cls, artifact_path, detection_threshold=0.5):
+        model_type, model, img_size, class_map = load_linear_quantized_model(artifact_path)
+        return cls(model_type, model, img_size, class_map, detection_threshold=detection_threshold)
+
+
+def compare_predictions(reference, candidate, iou_threshold=0.5):
+    '''
+    Função responsável por comparar as predições de dois modelos para um mesmo frame.
+
+    Parâmetros
+    ----------
+        reference : dicionário de predições do modelo original
+        candidate : dicionário de predições do modelo quantizado
+        iou_threshold : IoU mínima para considerar duas caixas da mesma classe como equivalentes
+
+    Retorno
+    ----------
+        Dicionário com a quantidade de detecções de cada modelo, as associações, a soma das IoUs
+        e a soma das diferenças absolutas de score das associações
+    '''
+
+    ref, cand = reference['detection'], candidate['detection']
+
+    ref_boxes = np.array([bbox.xyxy for bbox in ref['bboxes']], dtype=np.float32).reshape(-1, 4)
+    cand_boxes = np.array([bbox.xyxy for bbox in cand['bboxes']], dtype=np.float32).reshape(-1, 4)
+
+    iou = iou_matrix(ref_boxes, cand_boxes)
+
+    # caixas de classes diferentes não podem ser associadas
+    for i, ref_label in enumerate(ref['labels']):
+        for j, cand_label in enumerate(cand['labels']):
+            if ref_label != cand_label:
+                iou[i, j] = 0.0
+
+    matches = greedy_match(iou, iou_threshold)
+
+    return {
+        'reference': len(ref_boxes),
+        'candidate': len(cand_boxes),
+        'matched': len(matches),
+        'iou_sum': float(sum(iou[i, j] for i, j in matches)),
+        'score_diff_sum': float(sum(abs(ref['scores'][i] - cand['scores'][j]) for i, j in matches)),
+    }
+
+
+def check_parity(reference_detector, candidate_detector, video_path, max_frames=50, batch_size=4, iou_threshold=0.5):
+    '''
+    Função responsável por verificar se o modelo quantizado reproduz as detecções do modelo original
+    sobre os frames de um vídeo, além de comparar o tempo de inferência de ambos.
+
+    Parâmetros
+    ----------
+        reference_detector : instância de BatchDetector com o modelo original
+        candidate_detector : instância de LinearQuantizedDetector
+        video_path : caminho do vídeo empregado na verificação
+        max_frames : quantidade de frames comparados
+        batch_size : quantidade de frames por batch
+        iou_threshold : IoU mínima para considerar duas caixas como equivalentes
+
+    Retorno
+    ----------
+        Dicionário com recall e precisão do modelo quantizado em relação ao original, IoU média,
+        diferença média de score e tempo de inferência de cada modelo
+    '''
+
+    video = cv2.VideoCapture(video_path)
+    frames = [frame for _, frame in read_frames(video, max_frames=max_frames)]
+    video.release()
+
+    totals = {'reference': 0, 'candidate': 0, 'matched': 0, 'iou_sum': 0.0, 'score_diff_sum': 0.0}
+    seconds = {'reference': 0.0, 'candidate': 0.0}
+
+    for start in range(0, len(frames), batch_size):
+        batch = frames[start:start + batch_size]
+
+        begin = time.perf_counter()
+        reference_preds = reference_detector.detect(batch)
+        seconds['reference'] += time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        candidate_preds = candidate_detector.detect(batch)
+        seconds['candidate'] += time.perf_counter() - begin
+
+        for reference, candidate in zip(reference_preds, candidate_preds):
+            for key, value in compare_predictions(reference, candidate, iou_threshold).items():
+                totals[key] += value
+
+    matched = max(totals['matched'], 1)
+
+    return {
+        'frames': len(frames),
+        'recall': totals['matched'] / totals['reference'] if totals['reference'] > 0 else 1.0,
+        'precision': totals['matched'] / totals['candidate'] if totals['candidate'] > 0 else 1.0,
+        'mean_iou': totals['iou_sum'] / matched,
+        'mean_score_diff': totals['score_diff_sum'] / matched,
+        'reference_seconds': seconds['reference'],
+        'candidate_seconds': seconds['candidate'],
+        'speedup': seconds['reference'] / seconds['candidate'] if seconds['candidate'] > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantiza em int8 as camadas lineares do modelo treinado.')
+    parser.add_argument('checkpoint_path', help='caminho do arquivo .pth do modelo')
+    parser.add_argument('output_path', help='caminho do artefato quantizado')
+    parser.add_argument('--parity-video', default=None, help='vídeo empregado na verificação de paridade')
+    parser.add_argument('--parity-frames', type=int, default=50, help='quantidade de frames da verificação')
+    args = parser.parse_args()
+
+    export_linear_quantized_model(args.checkpoint_path, args.output_path)
+    print(f'Artefato salvo em {args.output_path}')
+
+    if args.parity_video is not None:
+        report = check_parity(
+            BatchDetector.from_checkpoint(args.checkpoint_path),
+            LinearQuantizedDetector.from_artifact(args.output_path),
+            args.parity_video,
+            max_frames=args.parity_frames
+        )
+
+        for key, value in report.items():
+            print(f'{key}: {value:.4f}' if isinstance(value, float) else f'{key}: {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+import collections
+import os
+import threading
+
+from .inference import get_model_from_checkpoint, get_tfms
+
+# orçamento de memória (em MB) do registro compartilhado; sem a variável, nenhum modelo é descartado
+MEMORY_BUDGET_ENV = 'MODEL_REGISTRY_BUDGET_MB'
+
+
+class LoadedModel():
+    '''
+    Classe responsável por armazenar um modelo carregado e os dados necessários para a inferência.
+
+    Atributos
+    ----------
+        model_type : especificação da IceVision sobre o tipo do modelo
+        model : instância do modelo treinado, em modo de avaliação
+        img_size : tamanho de imagem empregado no treinamento
+        class_map : mapa de classes do conjunto com o qual o modelo foi treinado
+        infer_tfms : transformações de inferência (get_tfms com tfms_type='valid')
+        size_bytes : memória ocupada pelos parâmetros e buffers do modelo
+    '''
+
+    def __init__(self, model_type, model, img_size, class_map, infer_tfms, size_bytes):
+        self.model_type = model_type
+        self.model = model
+        self.img_size = img_size
+        self.class_map = class_map
+        self.infer_tfms = infer_tfms
+        self.size_bytes = size_bytes
+
+    def as_tuple(self):
+        '''
+        Retorna os dados no mesmo formato de get_model_from_checkpoint.
+        '''
+
+        return self.model_type, self.model, self.img_size, self.class_map
+
+
+def get_model_size(model):
+    '''
+    Função responsável por estimar a memória ocupada por um modelo a partir de seus parâmetros e buffers.
+    '''
+
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ModelRegistry():
+    '''
+    Classe responsável por manter os modelos carregados em memória, de modo que um mesmo checkpoint
+    seja carregado do disco uma única vez por processo.
+
+    Os modelos são identificados pelo caminho do checkpoint, sua data de modificação e o dispositivo.
+    Assim, um checkpoint sobrescrito é recarregado automaticamente. Quando a memória ocupada ultrapassa
+    o orçamento, os modelos usados há mais tempo são descartados (LRU). O acesso é protegido por locks,
+    e threads que solicitam o mesmo checkpoint simultaneamente aguardam um único carregamento.
+
+    Atributos
+    ----------
+        memory_budget_bytes : memória máxima ocupada pelos modelos (None desativa o limite)
+        loads : total de carregamentos realizados a partir do disco
+        hits : total de solicitações atendidas por modelos já carregados
+        evictions : total de modelos descartados
+    '''
+
+    def __init__(self, memory_budget_bytes=None):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._loading_locks = {}
+
+    def _key(self, checkpoint_path, device):
+        checkpoint_path = os.path.abspath(checkpoint_path)
+        return (checkpoint_path, os.path.getmtime(checkpoint_path), str(device))
+
+    def _load(self, key):
+        checkpoint_path, _, device = key
+
+        model_type, model, img_size, class_map = get_model_from_checkpoint(checkpoint_path)
+        model = model.to(device).eval()
+
+        return LoadedModel(
+            model_type=model_type,
+            model=model,
+            img_size=img_size,
+            class_map=class_map,
+            infer_tfms=get_tfms(img_size=img_size, tfms_type='valid'),
+            size_bytes=get_model_size(model)
+        )
+
+    def _evict(self, keep_key=None):
+        # deve ser chamado com self._lock adquirido; descarta versões anteriores do mesmo checkpoint
+        for key in list(self._entries):
+            if keep_key is not None and key != keep_key and key[0] == keep_key[0] and key[2] == keep_key[2]:
+                del self._entries[key]
+                self.evictions += 1
+
+        if self.memory_budget_bytes is None:
+            return
+
+        # descarta os modelos usados há mais tempo, preservando o recém-solicitado
+        while self.total_bytes() > self.memory_budget_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+
+            if key == keep_key:
+                self._entries.move_to_end(key)
+                continue
+
+            del self._entries[key]
+            self.evictions += 1
+
+    def get(self, checkpoint_path, device='cpu'):
+        '''
+        Retorna o modelo do checkpoint, carregando-o apenas se ainda não estiver em memória.
+
+        Parâmetros
+        ----------
+            checkpoint_path : caminho para o arquivo .pth do modelo
+            device : dispositivo onde o modelo é mantido
+
+        Retorno
+        ----------
+            Instância de LoadedModel
+        '''
+
+        key = self._key(checkpoint_path, device)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+            loading_lock = self._loading_locks.setdefault(key, threading.Lock())
+
+        # o carregamento ocorre fora do lock principal para não bloquear outros checkpoints
+        with loading_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+
+            try:
+                entry = self._load(key)
+
+                with self._lock:
+                    self._entries[key] = entry
+                    self.loads += 1
+                    self._evict(key)
+            finally:
+                # também em caso de erro, para que a próxima solicitação tente carregar novamente
+                with self._lock:
+                    self._loading_locks.pop(key, None)
+
+        return entry
+
+    def configure(self, memory_budget_bytes):
+        '''
+        Altera o orçamento de memória, descartando imediatamente os modelos excedentes.
+
+        Parâmetros
+        ----------
+            memory_budget_bytes : memória máxima ocupada pelos modelos (None desativa o limite)
+        '''
+
+        with self._lock:
+            self.memory_budget_bytes = memory_budget_bytes
+            self._evict()
+
+    def total_bytes(self):
+        '''
+        Retorna a memória ocupada pelos modelos carregados.
+        '''
+
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def clear(self):
+        '''
+        Descarta todos os modelos carregados.
+        '''
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        '''
+        Retorna um dicionário com as estatísticas do registro.
+        '''
+
+        with self._lock:
+            return {
+                'models': len(self._entries),
+                'total_bytes': self.total_bytes(),
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'loads': self.loads,
+                'hits': self.hits,
+                'evictions': self.evictions,
+            }
+
+
+def _budget_from_env():
+    budget_mb = os.environ.get(MEMORY_BUDGET_ENV)
+    return int(float(budget_mb) * 2**20) if budget_mb else None
+
+
+# registro compartilhado pelo processo
+_registry = ModelRegistry(memory_budget_bytes=_budget_from_env())
+
+
+def get_registry():
+    '''
+    Função responsável por retornar o registro de modelos compartilhado pelo processo.
+    '''
+
+    return _registry
+
+
+def configure(memory_budget_bytes):
+    '''
+    Função responsável por definir o orçamento de memória do registro compartilhado. O valor inicial é lido
+    da variável de ambiente MODEL_REGISTRY_BUDGET_MB (em MB); sem ela, nenhum modelo é descartado.
+
+    Parâmetros
+    ----------
+        memory_budget_bytes : memória máxima ocupada pelos modelos (None desativa o limite)
+    '''
+
+    _registry.configure(memory_budget_bytes)
+
+
+def get_cached_model(checkpoint_path, device='cpu'):
+    '''
+    Função responsável por retornar o modelo do checkpoint a partir do registro compartilhado.
+
+    Possui o mesmo retorno de get_model_from_checkpoint, mas o checkpoint é lido do disco apenas
+    no primeiro uso (ou quando o arquivo for modificado).
+
+    Parâmetros
+    ----------
+        checkpoint_path : caminho para o arquivo .pth do modelo
+        device : dispositivo onde o modelo é mantido
+
+    Retorno
+    ----------
+        model_type : especificação da IceVision sobre o tipo do modelo
+        model : instância do modelo treinado
+        img_size : tamanho de imagem empregado no treinamento
+        class_map : mapa de classes do conjunto com o qual o modelo foi treinado
+    '''
+
+    return _registry.get(checkpoint_path, device=device).as_tuple()
@@ -0,0 +1,284 @@
+import time
+
+import cv2
+import numpy as np
+
+from .video_inference import make_prediction_dict, read_frames
+
+
+class GateStats():
+    '''
+    Classe responsável por armazenar as estatísticas do portão de movimento.
+
+    Atributos
+    ----------
+        frames : total de frames avaliados
+        detected : total de frames enviados ao detector
+        skipped : total de frames descartados por não apresentarem movimento
+        forced : total de frames enviados ao detector por atingirem o limite de frames sem inferência
+    '''
+
+    def __init__(self):
+        self.frames = 0
+        self.detected = 0
+        self.skipped = 0
+        self.forced = 0
+
+    def report(self):
+        '''
+        Retorna um dicionário com as estatísticas, incluindo a proporção de frames descartados.
+        '''
+
+        return {
+            'frames': self.frames,
+            'detected': self.detected,
+            'skipped': self.skipped,
+            'forced': self.forced,
+            'skip_ratio': self.skipped / self.frames if self.frames > 0 else 0.0,
+        }
+
+
+class MotionGate():
+    '''
+    Classe responsável por decidir se um frame deve ser enviado ao detector, comparando-o com
+    um modelo de fundo atualizado continuamente (média móvel ponderada dos frames anteriores).
+
+    Os frames são convertidos para escala de cinza, reduzidos e suavizados antes da comparação,
+    o que torna o teste muito mais barato que a inferência e menos sensível a ruído da câmera.
+
+    Atributos
+    ----------
+        pixel_threshold : diferença mínima de intensidade (0-255) para que um pixel seja considerado alterado
+        min_changed_fraction : fração mínima de pixels alterados para que o frame seja enviado ao detector
+        learning_rate : peso do frame atual na atualização do modelo de fundo
+        downscale_width : largura para a qual os frames são reduzidos antes da comparação
+        max_skipped_frames : quantidade máxima de frames consecutivos sem inferência (None desativa)
+        stats : instância de GateStats
+    '''
+
+    def __init__(self,
+                 pixel_threshold=25,
+                 min_changed_fraction=0.005,
+                 learning_rate=0.05,
+                 downscale_width=320,
+                 max_skipped_frames=None):
+
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.learning_rate = learning_rate
+        self.downscale_width = downscale_width
+        self.max_skipped_frames = max_skipped_frames
+        self.stats = GateStats()
+
+        self._background = None
+        self._consecutive_skipped = 0
+
+    def _preprocess(self, frame):
+        height, width = frame.shape[:2]
+        scale = self.downscale_width / width
+
+        small = cv2.resize(frame, (self.downscale_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def motion_mask(self, frame):
+        '''
+        Calcula a máscara de pixels alterados em relação ao modelo de fundo e atualiza o modelo.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+
+        Retorno
+        ----------
+            Máscara binária (uint8, 0 ou 255) na resolução reduzida (largura downscale_width)
+            ou None para o primeiro frame, que apenas inicializa o modelo de fundo
+        '''
+
+        gray = self._preprocess(frame)
+
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            return None
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+
+        return mask
+
+    def changed_fraction(self, frame):
+        '''
+        Calcula a fração de pixels do frame que diferem do modelo de fundo e atualiza o modelo.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+
+        Retorno
+        ----------
+            Fração de pixels alterados (1.0 para o primeiro frame)
+        '''
+
+        mask = self.motion_mask(frame)
+
+        # o primeiro frame inicializa o modelo de fundo e sempre é considerado alterado
+        if mask is None:
+            return 1.0
+
+        return np.count_nonzero(mask) / mask.size
+
+    def should_detect(self, frame):
+        '''
+        Decide se o frame deve ser enviado ao detector e registra a decisão nas estatísticas.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+
+        Retorno
+        ----------
+            True caso o frame deva ser inferido, False caso contrário
+        '''
+
+        self.stats.frames += 1
+
+        if self.changed_fraction(frame) >= self.min_changed_fraction:
+            self.stats.detected += 1
+            self._consecutive_skipped = 0
+            return True
+
+        # força uma nova inferência após muitos frames sem movimento
+        if self.max_skipped_frames is not None and self._consecutive_skipped >= self.max_skipped_frames:
+            self.stats.detected += 1
+            self.stats.forced += 1
+            self._consecutive_skipped = 0
+            return True
+
+        self.stats.skipped += 1
+        self._consecutive_skipped += 1
+        return False
+
+
+def empty_prediction(frame):
+    '''
+    Função responsável por criar o dicionário de predições de um frame sem pássaros.
+    '''
+
+    height, width = frame.shape[:2]
+    return make_prediction_dict(bboxes=[], labels=[], scores=[], width=width, height=height)
+
+
+def detect_frames_gated(detector, frames, gate, batch_size=8, reuse_last=True, meter=None, max_pending=None):
+    '''
+    Função responsável por inferir um fluxo de frames enviando ao detector apenas aqueles com movimento.
+
+    Os frames aprovados pelo portão são agrupados em batches. Os frames descartados recebem as predições
+    do último frame inferido que os antecede (reuse_last=True) ou uma predição vazia (reuse_last=False).
+    A ordem dos frames é sempre preservada.
+
+    Parâmetros
+    ----------
+        detector : instância de BatchDetector
+        frames : iterável de tuplas (índice do frame, frame BGR)
+        gate : instância de MotionGate
+        batch_size : quantidade de frames inferidos por batch
+        reuse_last : se os frames descartados reutilizam as últimas predições
+        meter : instância opcional de ThroughputMeter
+        max_pending : quantidade máxima de frames retidos aguardando um batch (por padrão, 4 * batch_size)
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR, predições)
+    '''
+
+    if max_pending is None:
+        max_pending = 4 * batch_size
+
+    # lista de tuplas (índice, frame, se deve ser inferido) aguardando o próximo batch
+    pending = []
+    num_pending_detect = 0
+    last_preds = None
+
+    def resolve(frame):
+        if reuse_last and last_preds is not None:
+            return last_preds
+        return empty_prediction(frame)
+
+    def flush():
+        nonlocal last_preds
+
+        to_detect = [frame for _, frame, detect in pending if detect]
+
+        start = time.perf_counter()
+        predictions = iter(detector.detect(to_detect))
+
+        if meter is not None and to_detect:
+            meter.update(len(to_detect), time.perf_counter() - start)
+
+        for frame_index, frame, detect in pending:
+            if detect:
+                last_preds = next(predictions)
+                yield frame_index, frame, last_preds
+            else:
+                yield frame_index, frame, resolve(frame)
+
+        pending.clear()
+
+    for frame_index, frame in frames:
+        detect = gate.should_detect(frame)
+
+        # sem frames pendentes de inferência, um frame descartado pode ser emitido imediatamente
+        if not detect and num_pending_detect == 0:
+            yield frame_index, frame, resolve(frame)
+            continue
+
+        pending.append((frame_index, frame, detect))
+        num_pending_detect += int(detect)
+
+        if num_pending_detect == batch_size or len(pending) >= max_pending:
+            yield from flush()
+            num_pending_detect = 0
+
+    if pending:
+        yield from flush()
+
+
+def detect_video_gated(video_path, detector, gate, batch_size=8, reuse_last=True, meter=None, max_frames=None):
+    '''
+    Função responsável por inferir um arquivo de vídeo enviando ao detector apenas os frames com movimento.
+    As estatísticas de frames descartados ficam disponíveis em gate.stats.
+
+    Parâmetros
+    ----------
+        video_path : caminho do arquivo de vídeo
+        detector : instância de BatchDetector
+        gate : instância de MotionGate
+        batch_size : quantidade de frames inferidos por batch
+        reuse_last : se os frames descartados reutilizam as últimas predições
+        meter : instância opcional de ThroughputMeter
+        max_frames : quantidade máxima de frames lidos
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR, predições)
+    '''
+
+    video = cv2.VideoCapture(video_path)
+
+    if not video.isOpened():
+        raise IOError(f'Erro ao abrir arquivo: {video_path}')
+
+    try:
+        yield from detect_frames_gated(
+            detector,
+            read_frames(video, max_frames=max_frames),
+            gate,
+            batch_size=batch_size,
+            reuse_last=reuse_last,
+            meter=meter
+        )
+    finally:
+        video.release()
@@ -0,0 +1,325 @@
+'''
+Pré-anotação (pseudo-labeling) dos frames salvos pelo app Streamlit com o modelo treinado.
+
+Exemplo de uso (a partir da pasta codigos_de_desenvolvimento):
+
+    python -m project_utils.pseudo_labeling ../streamlit_app/local_dataset/ \
+        ../faster_rcnn/final_test/model_0/mmdet.faster_rcnn_resnext101_32x4d_fpn_1x.pth \
+        --workers 2 --torch-threads 2 --batch-size 8
+
+Para cada imagem sem anotação, é gerado um arquivo XML no formato VOC Pascal (o mesmo lido por
+parsers.VOCBBoxParser em training_pipeline.parse_data), com as detecções acima do score mínimo.
+As anotações com detecções de baixa confiança são marcadas para revisão; as imagens sem detecções
+não recebem XML e são apenas listadas para revisão.
+
+Os XMLs são salvos em uma pasta separada (por padrão, pseudo_labels/, ao lado da pasta das imagens),
+para que um treinamento sobre a pasta das imagens nunca use pseudo-anotações não revisadas. Após a
+revisão, o anotador move os XMLs aprovados para a pasta das imagens.
+'''
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import time
+import warnings
+from xml.dom import minidom
+
+from . import video_sharding
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+REVIEW_FILENAME = 'needs_review.jsonl'
+
+PSEUDO_LABELS_DIRNAME = 'pseudo_labels'
+
+
+def default_annotations_dir(images_dir):
+    '''
+    Retorna a pasta padrão das pseudo-anotações: pseudo_labels/, ao lado da pasta das imagens
+    (e não dentro dela, para que não seja percorrida junto com as anotações revisadas).
+    '''
+
+    return os.path.join(os.path.dirname(os.path.normpath(images_dir)), PSEUDO_LABELS_DIRNAME)
+
+
+def list_unlabelled_images(images_dir, annotations_dir=None):
+    '''
+    Função responsável por listar as imagens que ainda não possuem um arquivo XML de mesmo nome, nem
+    na pasta das imagens (anotações revisadas) nem na pasta das pseudo-anotações, e que ainda não foram
+    listadas para revisão (imagens sem detecções).
+
+    Parâmetros
+    ----------
+        images_dir : pasta das imagens
+        annotations_dir : pasta das pseudo-anotações (por padrão, default_annotations_dir(images_dir))
+
+    Retorno
+    ----------
+        Lista ordenada com os nomes das imagens sem anotação
+    '''
+
+    annotations_dir = annotations_dir or default_annotations_dir(images_dir)
+    annotated = set()
+
+    for directory in {images_dir, annotations_dir}:
+        if os.path.isdir(directory):
+            annotated.update(os.path.splitext(name)[0] for name in os.listdir(directory) if name.lower().endswith('.xml'))
+
+    review_path = os.path.join(annotations_dir, REVIEW_FILENAME)
+
+    if os.path.exists(review_path):
+        with open(review_path) as review_file:
+            for line in review_file:
+                try:
+                    annotated.add(os.path.splitext(json.loads(line)['image'])[0])
+                except (json.JSONDecodeError, KeyError):
+                    continue
+
+    return sorted(
+        name for name in os.listdir(images_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS) and os.path.splitext(name)[0] not in annotated
+    )
+
+
+def _add_text(document, parent, tag, value=None):
+    element = document.createElement(tag)
+
+    if value is not None:
+        element.appendChild(document.createTextNode(str(value)))
+
+    parent.appendChild(element)
+
+    return element
+
+
+def make_voc_annotation(filename, width, height, objects, needs_review=False, depth=3):
+    '''
+    Função responsável por criar o conteúdo de um arquivo XML no formato VOC Pascal, com a mesma estrutura
+    das anotações exportadas pelo roboflow (por exemplo, dataset/partial_dataset/101.xml).
+
+    Parâmetros
+    ----------
+        filename : nome da imagem
+        width : largura da imagem
+        height : altura da imagem
+        objects : lista de tuplas (classe, xmin, ymin, xmax, ymax, score)
+        needs_review : indica se a anotação deve ser revisada
+        depth : quantidade de canais da imagem
+
+    Retorno
+    ----------
+        String com o conteúdo do arquivo XML
+    '''
+
+    document = minidom.Document()
+    annotation = document.createElement('annotation')
+    document.appendChild(annotation)
+
+    _add_text(document, annotation, 'folder')
+    _add_text(document, annotation, 'filename', filename)
+    _add_text(document, annotation, 'path', filename)
+
+    source = _add_text(document, annotation, 'source')
+    _add_text(document, source, 'database', 'pseudo_labeling')
+
+    size = _add_text(document, annotation, 'size')
+    _add_text(document, size, 'width', width)
+    _add_text(document, size, 'height', height)
+    _add_text(document, size, 'depth', depth)
+
+    _add_text(document, annotation, 'segmented', 0)
+
+    # campo ignorado pelo VOCBBoxParser, empregado apenas para filtrar as anotações a revisar
+    _add_text(document, annotation, 'needs_review', int(needs_review))
+
+    for label, xmin, ymin, xmax, ymax, score in objects:
+        obj = _add_text(document, annotation, 'object')
+        _add_text(document, obj, 'name', label)
+        _add_text(document, obj, 'pose', 'Unspecified')
+        _add_text(document, obj, 'truncated', 0)
+        _add_text(document, obj, 'difficult', 0)
+        _add_text(document, obj, 'occluded', 0)
+
+        bndbox = _add_text(document, obj, 'bndbox')
+        _add_text(document, bndbox, 'xmin', xmin)
+        _add_text(document, bndbox, 'xmax', xmax)
+        _add_text(document, bndbox, 'ymin', ymin)
+        _add_text(document, bndbox, 'ymax', ymax)
+
+        _add_text(document, obj, 'score', f'{score:.4f}')
+
+    # mesma formatação dos arquivos do roboflow: declaração e raiz na mesma linha, indentação com tabs
+    return '<?xml version="1.0" ?>' + annotation.toprettyxml(indent='\t').rstrip('\n')
+
+
+def predictions_to_objects(preds):
+    '''
+    Função responsável por converter o dicionário de predições de uma imagem em objetos VOC,
+    com as coordenadas arredondadas e limitadas às dimensões da imagem.
+    '''
+
+    detection = preds['detection']
+    objects = []
+
+    for bbox, label, score in zip(detection['bboxes'], detection['labels'], detection['scores']):
+        xmin, ymin, xmax, ymax = bbox.xyxy
+
+        objects.append((
+            label,
+            int(round(min(max(xmin, 0), preds['width']))),
+            int(round(min(max(ymin, 0), preds['height']))),
+            int(round(min(max(xmax, 0), preds['width']))),
+            int(round(min(max(ymax, 0), preds['height']))),
+            float(score),
+        ))
+
+    return objects
+
+
+def _label_chunk(images_dir, filenames, batch_size):
+    import cv2
+
+    results = []
+
+    for start in range(0, len(filenames), batch_size):
+        batch_names = filenames[start:start + batch_size]
+        frames = [cv2.imread(os.path.join(images_dir, name)) for name in batch_names]
+
+        # imagens ilegíveis são ignoradas e permanecem sem anotação
+        valid = [(name, frame) for name, frame in zip(batch_names, frames) if frame is not None]
+        preds = video_sharding.get_worker_detector().detect([frame for _, frame in valid])
+
+        for (name, frame), pred in zip(valid, preds):
+            results.append((name, frame.shape[1], frame.shape[0], frame.shape[2], predictions_to_objects(pred)))
+
+    return results
+
+
+def run_pseudo_labeling(images_dir,
+                        checkpoint_path,
+                        annotations_dir=None,
+                        num_workers=1,
+                        torch_threads=1,
+                        batch_size=8,
+                        chunk_size=64,
+                        score_threshold=0.5,
+                        review_threshold=0.8):
+    '''
+    Função responsável por pré-anotar todas as imagens sem anotação de uma pasta.
+
+    As imagens são divididas em blocos de chunk_size imagens, distribuídos entre num_workers processos;
+    cada processo carrega o modelo uma única vez e executa a inferência em batches de batch_size imagens.
+    Uma anotação é marcada para revisão (needs_review) quando alguma detecção possui score abaixo de
+    review_threshold. As imagens sem detecções não recebem XML. As imagens marcadas e as sem detecções são
+    listadas em needs_review.jsonl, na pasta das pseudo-anotações.
+
+    Parâmetros
+    ----------
+        images_dir : pasta das imagens
+        checkpoint_path : caminho do arquivo .pth do modelo
+        annotations_dir : pasta onde os arquivos XML são salvos (por padrão, pseudo_labels/ ao lado da pasta das imagens)
+        num_workers : quantidade de processos de inferência
+        torch_threads : quantidade de threads do PyTorch em cada processo
+        batch_size : quantidade de imagens por batch de inferência
+        chunk_size : quantidade de imagens enviadas a um processo por vez
+        score_threshold : score mínimo para que uma detecção seja incluída na anotação
+        review_threshold : score abaixo do qual a anotação é marcada para revisão
+
+    Retorno
+    ----------
+        Dicionário com a quantidade de imagens sem anotação, anotadas, sem detecções, marcadas para revisão e o tempo total
+    '''
+
+    annotations_dir = annotations_dir or default_annotations_dir(images_dir)
+
+    if os.path.abspath(annotations_dir) == os.path.abspath(images_dir):
+        # os XMLs seriam lidos como anotações revisadas em um treinamento sobre a pasta das imagens
+        warnings.warn('As pseudo-anotações serão salvas na pasta das imagens, sem revisão')
+
+    os.makedirs(annotations_dir, exist_ok=True)
+
+    filenames = list_unlabelled_images(images_dir, annotations_dir)
+
+    start = time.perf_counter()
+    labelled, review, empty = 0, 0, 0
+
+    if not filenames:
+        return {'images': 0, 'labelled': 0, 'needs_review': 0, 'empty': 0, 'seconds': 0.0}
+
+    context = multiprocessing.get_context('spawn')
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=context,
+            initializer=video_sharding.init_worker,
+            initargs=(checkpoint_path, torch_threads, score_threshold)) as executor:
+
+        futures = [
+            executor.submit(_label_chunk, images_dir, filenames[i:i + chunk_size], batch_size)
+            for i in range(0, len(filenames), chunk_size)
+        ]
+
+        for future in concurrent.futures.as_completed(futures):
+            for name, width, height, depth, objects in future.result():
+                needs_review = len(objects) == 0 or any(obj[-1] < review_threshold for obj in objects)
+                xml_name = None
+
+                if objects:
+                    xml_name = os.path.splitext(name)[0] + '.xml'
+                    xml_path = os.path.join(annotations_dir, xml_name)
+
+                    # escrita atômica, para que uma interrupção não deixe um XML incompleto
+                    with open(xml_path + '.tmp', 'w') as xml_file:
+                        xml_file.write(make_voc_annotation(name, width, height, objects, needs_review, depth))
+                    os.replace(xml_path + '.tmp', xml_path)
+
+                    labelled += 1
+                else:
+                    empty += 1
+
+                if needs_review:
+                    with open(os.path.join(annotations_dir, REVIEW_FILENAME), 'a') as review_file:
+                        review_file.write(json.dumps({
+                            'image': name,
+                            'annotation': xml_name,
+                            'detections': len(objects),
+                            'min_score': min((obj[-1] for obj in objects), default=None),
+                        }) + '\n')
+                    review += 1
+
+    return {'images': len(filenames), 'labelled': labelled, 'needs_review': review, 'empty': empty, 'seconds': time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pré-anota as imagens sem anotação no formato VOC Pascal.')
+    parser.add_argument('images_dir', help='pasta das imagens (por exemplo, ../streamlit_app/local_dataset/)')
+    parser.add_argument('checkpoint_path', help='caminho do arquivo .pth do modelo')
+    parser.add_argument('--annotations-dir', default=None, help='pasta dos arquivos XML (por padrão, pseudo_labels/ ao lado da pasta das imagens)')
+    parser.add_argument('--workers', type=int, default=1, help='quantidade de processos de inferência')
+    parser.add_argument('--torch-threads', type=int, default=1, help='threads do PyTorch em cada processo')
+    parser.add_argument('--batch-size', type=int, default=8, help='imagens por batch de inferência')
+    parser.add_argument('--chunk-size', type=int, default=64, help='imagens enviadas a um processo por vez')
+    parser.add_argument('--threshold', type=float, default=0.5, help='score mínimo das detecções incluídas')
+    parser.add_argument('--review-threshold', type=float, default=0.8, help='score abaixo do qual a anotação é marcada para revisão')
+    args = parser.parse_args()
+
+    report = run_pseudo_labeling(
+        images_dir=args.images_dir,
+        checkpoint_path=args.checkpoint_path,
+        annotations_dir=args.annotations_dir,
+        num_workers=args.workers,
+        torch_threads=args.torch_threads,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        score_threshold=args.threshold,
+        review_threshold=args.review_threshold
+    )
+
+    print(f"{report['images']} imagem(ns) sem anotação: {report['labelled']} anotadas, {report['empty']} sem detecções, "
+          f"{report['needs_review']} marcadas para revisão, {report['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+import threading
+import time
+
+from .video_inference import BatchDetector
+
+
+class LatestFrameSlot():
+    '''
+    Classe responsável por armazenar apenas o frame mais recente enviado para inferência.
+
+    Um novo frame substitui o anterior caso este ainda não tenha sido consumido, de modo que o
+    detector sempre trabalha sobre o frame mais atual e nunca acumula atraso. Os frames
+    substituídos são contabilizados como descartados.
+
+    Atributos
+    ----------
+        received : total de frames recebidos
+        dropped : total de frames substituídos antes de serem inferidos
+    '''
+
+    def __init__(self):
+        self.received = 0
+        self.dropped = 0
+
+        self._item = None
+        self._condition = threading.Condition()
+
+    def put(self, frame_index, frame):
+        '''
+        Armazena o frame sem bloquear, descartando o frame anterior ainda não consumido.
+        '''
+
+        with self._condition:
+            self.received += 1
+
+            if self._item is not None:
+                self.dropped += 1
+
+            self._item = (frame_index, frame, time.perf_counter())
+            self._condition.notify()
+
+    def drop(self):
+        '''
+        Contabiliza um frame descartado pelo consumidor (por exemplo, por estar obsoleto).
+        '''
+
+        with self._condition:
+            self.dropped += 1
+
+    def get(self, timeout=None):
+        '''
+        Retorna o frame mais recente (índice, frame, instante de chegada), aguardando até timeout segundos.
+        Retorna None caso nenhum frame chegue a tempo.
+        '''
+
+        with self._condition:
+            if self._item is None:
+                self._condition.wait(timeout)
+
+            item, self._item = self._item, None
+
+            return item
+
+
+def make_size_ladder(img_size, min_scale=0.5, step=32):
+    '''
+    Função responsável por criar os tamanhos de imagem empregados no ajuste adaptativo de resolução.
+
+    Os tamanhos vão de img_size até min_scale * img_size e são múltiplos de step, já que as redes com
+    FPN reduzem a imagem por fatores de 2 até 32.
+
+    Parâmetros
+    ----------
+        img_size : tamanho de imagem empregado no treinamento
+        min_scale : fração mínima de img_size
+        step : os tamanhos são múltiplos deste valor
+
+    Retorno
+    ----------
+        Lista de tamanhos, em ordem decrescente
+    '''
+
+    sizes = []
+    size = (img_size // step) * step
+
+    while size >= max(min_scale * img_size, step):
+        sizes.append(size)
+        size -= step
+
+    return sizes or [img_size]
+
+
+class RealTimeDetector():
+    '''
+    Classe responsável pela inferência em tempo real com um orçamento de latência por frame.
+
+    Os frames são enviados por submit sem bloquear quem captura. Uma thread de inferência consome sempre
+    o frame mais recente e descarta frames mais antigos que max_frame_age. Enquanto a latência da inferência
+    ultrapassa o orçamento, o img_size passado para get_tfms é reduzido um degrau por frame; quando a latência
+    fica abaixo de headroom * orçamento por upscale_after frames consecutivos, o img_size volta a subir.
+
+    Atributos
+    ----------
+        latency_budget : latência máxima desejada por frame, em segundos
+        max_frame_age : idade máxima, em segundos, de um frame para que ainda seja inferido
+        headroom : fração do orçamento abaixo da qual a resolução pode ser aumentada
+        upscale_after : quantidade de frames consecutivos com folga antes de aumentar a resolução
+        sizes : tamanhos de imagem disponíveis, em ordem decrescente
+        level : índice do tamanho atual em sizes
+        on_result : função opcional chamada a cada frame inferido com (índice, predições, estatísticas)
+        last_error : mensagem da última falha de inferência (None se não houve falha)
+    '''
+
+    def __init__(self,
+                 model_type,
+                 model,
+                 img_size,
+                 class_map,
+                 latency_budget=0.1,
+                 max_frame_age=None,
+                 headroom=0.6,
+                 upscale_after=10,
+                 min_scale=0.5,
+                 detection_threshold=0.5,
+                 on_result=None):
+
+        self.latency_budget = latency_budget
+        self.max_frame_age = max_frame_age if max_frame_age is not None else 2 * latency_budget
+        self.headroom = headroom
+        self.upscale_after = upscale_after
+        self.sizes = make_size_ladder(img_size, min_scale=min_scale)
+        self.level = 0
+        self.on_result = on_result
+        self.last_error = None
+
+        # um detector por degrau, todos compartilhando o mesmo modelo
+        self._detectors = [
+            BatchDetector(model_type, model, size, class_map, detection_threshold=detection_threshold)
+            for size in self.sizes
+        ]
+
+        self._slot = LatestFrameSlot()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._processed = 0
+        self._stale = 0
+        self._errors = 0
+        self._failing = False
+        self._last_latency = 0.0
+        self._fps = 0.0
+        self._last_finished = None
+        self._headroom_frames = 0
+
+        self._running = False
+        self._thread = None
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint_path, **kwargs):
+        '''
+        Instancia o detector a partir de um arquivo .pth, por meio do registro de modelos.
+        '''
+
+        from .model_registry import get_cached_model
+
+        model_type, model, img_size, class_map = get_cached_model(checkpoint_path)
+        return cls(model_type, model, img_size, class_map, **kwargs)
+
+    def start(self):
+        '''
+        Inicia a thread de inferência.
+        '''
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        '''
+        Encerra a thread de inferência.
+        '''
+
+        self._running = False
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, frame_index, frame):
+        '''
+        Envia um frame para inferência sem bloquear.
+        '''
+
+        self._slot.put(frame_index, frame)
+
+    def latest(self):
+        '''
+        Retorna a tupla (índice do frame, predições) da inferência mais recente ou None.
+        '''
+
+        with self._lock:
+            return self._latest
+
+    def _adapt(self, latency):
+        if latency > self.latency_budget:
+            self._headroom_frames = 0
+            self.level = min(self.level + 1, len(self.sizes) - 1)
+
+        elif latency < self.headroom * self.latency_budget:
+            self._headroom_frames += 1
+
+            if self._headroom_frames >= self.upscale_after and self.level > 0:
+                self.level -= 1
+                self._headroom_frames = 0
+
+        else:
+            self._headroom_frames = 0
+
+    def _run(self):
+        while self._running:
+            item = self._slot.get(timeout=0.1)
+
+            if item is None:
+                continue
+
+            frame_index, frame, arrived_at = item
+
+            # frames que aguardaram demais já não representam a cena atual
+            if time.perf_counter() - arrived_at > self.max_frame_age:
+                self._slot.drop()
+                with self._lock:
+                    self._stale += 1
+                continue
+
+            start = time.perf_counter()
+
+            try:
+                preds = self._detectors[self.level].detect([frame])[0]
+            except Exception as error:
+                # a thread continua com os próximos frames; a falha é registrada e exibida por stats
+                self._record_error(error)
+                continue
+
+            finished = time.perf_counter()
+
+            latency = finished - start
+            self._adapt(latency)
+
+            with self._lock:
+                self._latest = (frame_index, preds)
+                self._processed += 1
+                self._last_latency = latency
+
+                # média móvel exponencial do FPS alcançado
+                if self._last_finished is not None:
+                    instant_fps = 1.0 / max(finished - self._last_finished, 1e-6)
+                    self._fps = instant_fps if self._fps == 0 else 0.9 * self._fps + 0.1 * instant_fps
+
+                self._last_finished = finished
+                self._failing = False
+
+            if self.on_result is not None:
+                try:
+                    self.on_result(frame_index, preds, self.stats())
+                except Exception as error:
+                    self._record_error(error)
+
+    def _record_error(self, error):
+        with self._lock:
+            self.last_error = f'{type(error).__name__}: {error}'
+            self._errors += 1
+
+            # as detecções anteriores deixam de representar a cena atual
+            self._latest = None
+
+            # exibe apenas a primeira falha de cada sequência, para não repetir a mensagem a cada frame
+            first = not self._failing
+            self._failing = True
+
+        if first:
+            print(f'Falha na inferência em tempo real: {self.last_error}')
+
+    def stats(self):
+        '''
+        Retorna um dicionário com o FPS alcançado, a taxa de descarte, a resolução atual, a última latência
+        e as falhas de inferência.
+        '''
+
+        with self._lock:
+            received = self._slot.received
+
+            return {
+                'received': received,
+                'processed': self._processed,
+                'dropped': self._slot.dropped,
+                'stale': self._stale,
+                'drop_rate': self._slot.dropped / received if received > 0 else 0.0,
+                'fps': self._fps,
+                'img_size': self.sizes[self.level],
+                'latency': self._last_latency,
+                'errors': self._errors,
+                'last_error': self.last_error,
+            }
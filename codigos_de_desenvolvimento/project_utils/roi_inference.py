@@ -0,0 +1,428 @@
+import time
+
+import cv2
+import numpy as np
+
+from .motion_gate import MotionGate
+from .tracking import iou_matrix
+from .video_inference import make_prediction_dict, read_frames
+
+
+def merge_rects(rects):
+    '''
+    Função responsável por unir retângulos que se sobrepõem até que nenhum par se sobreponha.
+
+    Parâmetros
+    ----------
+        rects : lista de retângulos no formato [xmin, ymin, xmax, ymax]
+
+    Retorno
+    ----------
+        Lista de retângulos sem sobreposição
+    '''
+
+    rects = [list(rect) for rect in rects]
+    merged = True
+
+    while merged:
+        merged = False
+
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del rects[j]
+                    merged = True
+                    break
+
+            if merged:
+                break
+
+    return rects
+
+
+def nms(boxes, scores, iou_threshold):
+    '''
+    Função responsável pela supressão de não máximos (NMS) entre caixas.
+
+    Parâmetros
+    ----------
+        boxes : array (N, 4) de caixas no formato xyxy
+        scores : array (N,) com a confiança de cada caixa
+        iou_threshold : IoU acima da qual a caixa de menor confiança é descartada
+
+    Retorno
+    ----------
+        Lista com os índices das caixas mantidas, em ordem decrescente de confiança
+    '''
+
+    order = list(np.argsort(-np.asarray(scores)))
+    iou = iou_matrix(boxes, boxes)
+    keep = []
+
+    while order:
+        index = order.pop(0)
+        keep.append(index)
+        order = [other for other in order if iou[index, other] <= iou_threshold]
+
+    return keep
+
+
+class RoiFinder():
+    '''
+    Classe responsável por encontrar as regiões de interesse (ROIs) de um frame, isto é, as regiões que
+    devem ser enviadas ao detector.
+
+    As ROIs são obtidas a partir das regiões com movimento (máscara de MotionGate) e/ou de regiões fixas,
+    como a área do comedouro. Cada região recebe uma margem, tem um tamanho mínimo e regiões sobrepostas
+    são unidas. O tamanho mínimo evita recortes minúsculos e, como o recorte é redimensionado para o
+    img_size do modelo, pássaros pequenos passam a ocupar mais pixels na entrada do detector.
+
+    Atributos
+    ----------
+        gate : instância de MotionGate empregada para obter a máscara de movimento (None quando use_motion=False)
+        fixed_rois : lista de retângulos [xmin, ymin, xmax, ymax] sempre inferidos (por exemplo, o comedouro)
+        min_area : área mínima (na resolução reduzida de gate) de uma região com movimento
+        padding : margem, em pixels do frame, adicionada em torno de cada região
+        min_size : largura e altura mínimas de cada ROI, em pixels do frame
+    '''
+
+    def __init__(self, gate=None, fixed_rois=None, use_motion=True, min_area=20, padding=32, min_size=320):
+        self.gate = (gate if gate is not None else MotionGate()) if use_motion else None
+        self.fixed_rois = list(fixed_rois) if fixed_rois is not None else []
+        self.min_area = min_area
+        self.padding = padding
+        self.min_size = min_size
+
+    def _expand(self, rect, frame_width, frame_height):
+        xmin, ymin, xmax, ymax = rect
+
+        xmin, ymin = xmin - self.padding, ymin - self.padding
+        xmax, ymax = xmax + self.padding, ymax + self.padding
+
+        # aumenta a região em torno do centro até o tamanho mínimo
+        for low, high, limit in ((0, 2, frame_width), (1, 3, frame_height)):
+            values = [xmin, ymin, xmax, ymax]
+            missing = self.min_size - (values[high] - values[low])
+
+            if missing > 0:
+                values[low] -= missing // 2
+                values[high] += missing - missing // 2
+
+            # desloca a região para dentro do frame, preservando o tamanho quando possível
+            if values[low] < 0:
+                values[high] -= values[low]
+                values[low] = 0
+            if values[high] > limit:
+                values[low] = max(values[low] - (values[high] - limit), 0)
+                values[high] = limit
+
+            xmin, ymin, xmax, ymax = values
+
+        return [int(xmin), int(ymin), int(xmax), int(ymax)]
+
+    def find(self, frame):
+        '''
+        Encontra as ROIs do frame.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+
+        Retorno
+        ----------
+            Lista de retângulos [xmin, ymin, xmax, ymax] nas coordenadas do frame
+        '''
+
+        frame_height, frame_width = frame.shape[:2]
+        rects = list(self.fixed_rois)
+
+        mask = self.gate.motion_mask(frame) if self.gate is not None else None
+
+        # sem modelo de fundo ainda (primeiro frame), todo o frame é inferido
+        if mask is None and self.gate is not None:
+            return [[0, 0, frame_width, frame_height]]
+
+        if mask is not None:
+            scale = frame_width / mask.shape[1]
+
+            # une pixels próximos para formar regiões contínuas
+            mask = cv2.dilate(mask, None, iterations=2)
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+            for contour in contours:
+                if cv2.contourArea(contour) < self.min_area:
+                    continue
+
+                x, y, w, h = cv2.boundingRect(contour)
+                rects.append([x * scale, y * scale, (x + w) * scale, (y + h) * scale])
+
+        rects = [self._expand(rect, frame_width, frame_height) for rect in rects]
+
+        return merge_rects(rects)
+
+
+class RoiStats():
+    '''
+    Classe responsável por registrar a proporção de pixels efetivamente enviados ao detector.
+
+    Atributos
+    ----------
+        frames : total de frames processados
+        crops : total de recortes inferidos
+        frame_pixels : total de pixels dos frames
+        crop_pixels : total de pixels dos recortes
+    '''
+
+    def __init__(self):
+        self.frames = 0
+        self.crops = 0
+        self.frame_pixels = 0
+        self.crop_pixels = 0
+
+    def report(self):
+        return {
+            'frames': self.frames,
+            'crops': self.crops,
+            'crops_per_frame': self.crops / self.frames if self.frames > 0 else 0.0,
+            'pixel_ratio': self.crop_pixels / self.frame_pixels if self.frame_pixels > 0 else 0.0,
+        }
+
+
+def _touches_crop_edge(box, roi, frame_width, frame_height, tolerance):
+    # bordas do recorte que coincidem com a borda do frame não cortam o objeto
+    xmin, ymin, xmax, ymax = roi
+
+    return ((xmin > 0 and box[0] - xmin <= tolerance)
+            or (ymin > 0 and box[1] - ymin <= tolerance)
+            or (xmax < frame_width and xmax - box[2] <= tolerance)
+            or (ymax < frame_height and ymax - box[3] <= tolerance))
+
+
+def stitch_edge_boxes(boxes, labels, scores, crop_ids, rois, frame_width, frame_height, tolerance=4):
+    '''
+    Função responsável por unir as caixas de um objeto dividido entre recortes vizinhos.
+
+    Como os recortes não se sobrepõem (merge_rects), um pássaro na divisa entre dois recortes é detectado
+    como duas caixas truncadas, com IoU baixa, que o NMS não remove. Duas caixas da mesma classe, de
+    recortes diferentes, são unidas quando ambas tocam uma borda interna do seu recorte e se tocam
+    (a menos de tolerance pixels). A caixa unida recebe o maior score entre as partes.
+
+    Parâmetros
+    ----------
+        boxes : lista de caixas [xmin, ymin, xmax, ymax] nas coordenadas do frame
+        labels : lista com a classe de cada caixa
+        scores : lista com a confiança de cada caixa
+        crop_ids : lista com o índice do recorte de cada caixa
+        rois : lista de retângulos [xmin, ymin, xmax, ymax] dos recortes
+        frame_width : largura do frame
+        frame_height : altura do frame
+        tolerance : distância máxima, em pixels, para considerar que uma caixa toca a borda ou outra caixa
+
+    Retorno
+    ----------
+        Tupla (caixas, classes, scores) após a união
+    '''
+
+    parent = list(range(len(boxes)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    on_edge = [_touches_crop_edge(box, rois[crop_id], frame_width, frame_height, tolerance) for box, crop_id in zip(boxes, crop_ids)]
+
+    for i in range(len(boxes)):
+        if not on_edge[i]:
+            continue
+
+        for j in range(i + 1, len(boxes)):
+            if not on_edge[j] or crop_ids[i] == crop_ids[j] or labels[i] != labels[j]:
+                continue
+
+            a, b = boxes[i], boxes[j]
+
+            if (a[0] <= b[2] + tolerance and b[0] <= a[2] + tolerance
+                    and a[1] <= b[3] + tolerance and b[1] <= a[3] + tolerance):
+                parent[find(j)] = find(i)
+
+    groups = {}
+
+    for index in range(len(boxes)):
+        groups.setdefault(find(index), []).append(index)
+
+    stitched_boxes, stitched_labels, stitched_scores = [], [], []
+
+    for indexes in groups.values():
+        stitched_boxes.append([
+            min(boxes[index][0] for index in indexes),
+            min(boxes[index][1] for index in indexes),
+            max(boxes[index][2] for index in indexes),
+            max(boxes[index][3] for index in indexes),
+        ])
+        stitched_labels.append(labels[indexes[0]])
+        stitched_scores.append(max(scores[index] for index in indexes))
+
+    return stitched_boxes, stitched_labels, stitched_scores
+
+
+def merge_crop_predictions(frame, rois, crop_preds, iou_threshold=0.5, edge_tolerance=4):
+    '''
+    Função responsável por converter as predições dos recortes para as coordenadas do frame, unir as
+    caixas divididas entre recortes vizinhos (stitch_edge_boxes) e aplicar NMS, por classe, para remover
+    detecções duplicadas.
+
+    Parâmetros
+    ----------
+        frame : frame BGR
+        rois : lista de retângulos [xmin, ymin, xmax, ymax] dos recortes
+        crop_preds : lista com o dicionário de predições de cada recorte
+        iou_threshold : IoU do NMS entre recortes
+        edge_tolerance : distância, em pixels, empregada na união das caixas divididas entre recortes
+
+    Retorno
+    ----------
+        Dicionário de predições do frame
+    '''
+
+    frame_height, frame_width = frame.shape[:2]
+    boxes, labels, scores, crop_ids = [], [], [], []
+
+    for crop_id, ((xmin, ymin, _, _), preds) in enumerate(zip(rois, crop_preds)):
+        detection = preds['detection']
+
+        for bbox, label, score in zip(detection['bboxes'], detection['labels'], detection['scores']):
+            bxmin, bymin, bxmax, bymax = bbox.xyxy
+            boxes.append([bxmin + xmin, bymin + ymin, bxmax + xmin, bymax + ymin])
+            labels.append(label)
+            scores.append(float(score))
+            crop_ids.append(crop_id)
+
+    boxes, labels, scores = stitch_edge_boxes(boxes, labels, scores, crop_ids, rois, frame_width, frame_height, edge_tolerance)
+
+    from icevision.core import BBox
+
+    keep = []
+
+    for label in set(labels):
+        indexes = [index for index, other in enumerate(labels) if other == label]
+        kept = nms(np.array([boxes[index] for index in indexes]), [scores[index] for index in indexes], iou_threshold)
+        keep.extend(indexes[index] for index in kept)
+
+    keep.sort(key=lambda index: -scores[index])
+
+    return make_prediction_dict(
+        bboxes=[BBox.from_xyxy(*[int(value) for value in boxes[index]]) for index in keep],
+        labels=[labels[index] for index in keep],
+        scores=[scores[index] for index in keep],
+        width=frame_width,
+        height=frame_height
+    )
+
+
+def detect_frames_roi(detector, frames, roi_finder, batch_size=8, iou_threshold=0.5, stats=None, meter=None):
+    '''
+    Função responsável por inferir um fluxo de frames enviando ao detector apenas os recortes das ROIs.
+
+    Os recortes de frames consecutivos são agrupados em um mesmo batch até somarem batch_size recortes,
+    e as predições são convertidas de volta para as coordenadas de cada frame, preservando a ordem.
+    Frames sem nenhuma ROI recebem uma predição vazia.
+
+    Parâmetros
+    ----------
+        detector : instância de BatchDetector
+        frames : iterável de tuplas (índice do frame, frame BGR)
+        roi_finder : instância de RoiFinder
+        batch_size : quantidade de recortes por batch
+        iou_threshold : IoU do NMS entre recortes
+        stats : instância opcional de RoiStats
+        meter : instância opcional de ThroughputMeter (conta recortes inferidos)
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR, predições)
+    '''
+
+    pending = []
+    num_pending_crops = 0
+
+    def flush():
+        crops = [frame[ymin:ymax, xmin:xmax] for _, frame, rois in pending for xmin, ymin, xmax, ymax in rois]
+
+        start = time.perf_counter()
+        crop_preds = detector.detect(crops)
+
+        if meter is not None and crops:
+            meter.update(len(crops), time.perf_counter() - start)
+
+        offset = 0
+
+        for frame_index, frame, rois in pending:
+            preds = merge_crop_predictions(frame, rois, crop_preds[offset:offset + len(rois)], iou_threshold)
+            offset += len(rois)
+            yield frame_index, frame, preds
+
+        pending.clear()
+
+    for frame_index, frame in frames:
+        rois = roi_finder.find(frame)
+
+        if stats is not None:
+            stats.frames += 1
+            stats.crops += len(rois)
+            stats.frame_pixels += frame.shape[0] * frame.shape[1]
+            stats.crop_pixels += sum((xmax - xmin) * (ymax - ymin) for xmin, ymin, xmax, ymax in rois)
+
+        pending.append((frame_index, frame, rois))
+        num_pending_crops += len(rois)
+
+        # o limite de frames retidos mantém a memória constante em trechos sem movimento
+        if num_pending_crops >= batch_size or len(pending) >= 4 * batch_size:
+            yield from flush()
+            num_pending_crops = 0
+
+    if pending:
+        yield from flush()
+
+
+def detect_video_roi(video_path, detector, roi_finder, batch_size=8, iou_threshold=0.5, stats=None, meter=None, max_frames=None):
+    '''
+    Função responsável por inferir um arquivo de vídeo enviando ao detector apenas os recortes das ROIs.
+
+    Parâmetros
+    ----------
+        video_path : caminho do arquivo de vídeo
+        detector : instância de BatchDetector
+        roi_finder : instância de RoiFinder
+        batch_size : quantidade de recortes por batch
+        iou_threshold : IoU do NMS entre recortes
+        stats : instância opcional de RoiStats
+        meter : instância opcional de ThroughputMeter
+        max_frames : quantidade máxima de frames lidos
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR, predições)
+    '''
+
+    video = cv2.VideoCapture(video_path)
+
+    if not video.isOpened():
+        raise IOError(f'Erro ao abrir arquivo: {video_path}')
+
+    try:
+        yield from detect_frames_roi(
+            detector,
+            read_frames(video, max_frames=max_frames),
+            roi_finder,
+            batch_size=batch_size,
+            iou_threshold=iou_threshold,
+            stats=stats,
+            meter=meter
+        )
+    finally:
+        video.release()
@@ -0,0 +1,301 @@
+import cv2
+import numpy as np
+
+from .video_inference import make_prediction_dict, read_frames
+
+
+def iou_matrix(boxes_a, boxes_b):
+    '''
+    Função responsável por calcular a intersection over union (IoU) entre todos os pares de caixas.
+
+    Parâmetros
+    ----------
+        boxes_a : array (N, 4) de caixas no formato xyxy
+        boxes_b : array (M, 4) de caixas no formato xyxy
+
+    Retorno
+    ----------
+        Array (N, M) com a IoU de cada par
+    '''
+
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    xmin = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    ymin = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    xmax = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    ymax = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+
+    intersection = np.clip(xmax - xmin, 0, None) * np.clip(ymax - ymin, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+
+    return np.where(union > 0, intersection / np.maximum(union, 1e-6), 0.0)
+
+
+def greedy_match(iou, iou_threshold):
+    '''
+    Função responsável por associar linhas e colunas de uma matriz de IoU de forma gulosa,
+    priorizando os pares de maior IoU.
+
+    Parâmetros
+    ----------
+        iou : array (N, M) com a IoU entre caixas
+        iou_threshold : IoU mínima para que um par seja associado
+
+    Retorno
+    ----------
+        Lista de tuplas (linha, coluna) associadas
+    '''
+
+    matches = []
+
+    if iou.size == 0:
+        return matches
+
+    used_rows, used_cols = set(), set()
+
+    # percorre os pares em ordem decrescente de IoU
+    for flat_index in np.argsort(-iou, axis=None):
+        row, col = np.unravel_index(flat_index, iou.shape)
+
+        if iou[row, col] < iou_threshold:
+            break
+
+        if row in used_rows or col in used_cols:
+            continue
+
+        matches.append((int(row), int(col)))
+        used_rows.add(row)
+        used_cols.add(col)
+
+    return matches
+
+
+class Track():
+    '''
+    Classe responsável por armazenar o estado de um pássaro rastreado entre frames.
+
+    Atributos
+    ----------
+        track_id : identificador estável do pássaro
+        xyxy : array com as coordenadas atuais da caixa
+        label : classe predita na última detecção
+        label_id : id da classe no mapa de classes
+        score : confiança da última detecção
+        confidence : confiança do rastreamento desde a última detecção (1.0 logo após a detecção)
+    '''
+
+    def __init__(self, track_id, xyxy, label, label_id, score):
+        self.track_id = track_id
+        self.xyxy = np.asarray(xyxy, dtype=np.float32)
+        self.label = label
+        self.label_id = label_id
+        self.score = score
+        self.confidence = 1.0
+
+
+class KeyframeTracker():
+    '''
+    Classe responsável por executar o detector apenas em frames-chave (a cada keyframe_interval frames)
+    e propagar as caixas nos frames intermediários por meio do fluxo óptico esparso de Lucas-Kanade.
+
+    Em cada frame intermediário, pontos de canto são amostrados dentro de cada caixa e rastreados até o
+    frame atual. A caixa é deslocada pela mediana do deslocamento dos pontos, e a confiança do rastreamento
+    é a fração de pontos que passaram na verificação de ida e volta. Caso a confiança de alguma caixa fique
+    abaixo de min_track_confidence, o detector é executado antecipadamente.
+
+    Nos frames-chave, as novas detecções são associadas às caixas rastreadas por IoU, de modo que cada
+    pássaro mantém o mesmo track_id ao longo do vídeo.
+
+    Atributos
+    ----------
+        detector : instância de BatchDetector
+        keyframe_interval : quantidade de frames entre duas execuções do detector
+        iou_threshold : IoU mínima para associar uma detecção a uma caixa rastreada
+        min_track_confidence : confiança mínima do rastreamento antes de executar o detector antecipadamente
+        max_points : quantidade máxima de pontos rastreados por caixa
+        fb_threshold : erro máximo (em pixels) da verificação de ida e volta do fluxo óptico
+        detections : total de execuções do detector
+        early_detections : total de execuções antecipadas do detector
+    '''
+
+    def __init__(self,
+                 detector,
+                 keyframe_interval=5,
+                 iou_threshold=0.3,
+                 min_track_confidence=0.5,
+                 max_points=30,
+                 fb_threshold=1.0):
+
+        self.detector = detector
+        self.keyframe_interval = keyframe_interval
+        self.iou_threshold = iou_threshold
+        self.min_track_confidence = min_track_confidence
+        self.max_points = max_points
+        self.fb_threshold = fb_threshold
+
+        self.detections = 0
+        self.early_detections = 0
+
+        self._tracks = []
+        self._next_track_id = 0
+        self._previous_gray = None
+        self._frames_since_detection = 0
+
+    def _detect(self, frame):
+        preds = self.detector.detect([frame])[0]['detection']
+        self.detections += 1
+        self._frames_since_detection = 0
+
+        boxes = np.array([bbox.xyxy for bbox in preds['bboxes']], dtype=np.float32).reshape(-1, 4)
+        label_ids = preds.get('label_ids', [None] * len(boxes))
+
+        current = np.array([track.xyxy for track in self._tracks], dtype=np.float32).reshape(-1, 4)
+        matches = dict((col, row) for row, col in greedy_match(iou_matrix(current, boxes), self.iou_threshold))
+
+        tracks = []
+
+        for index, xyxy in enumerate(boxes):
+            # detecções associadas mantêm o identificador da caixa rastreada
+            if index in matches:
+                track_id = self._tracks[matches[index]].track_id
+            else:
+                track_id = self._next_track_id
+                self._next_track_id += 1
+
+            tracks.append(Track(track_id, xyxy, preds['labels'][index], label_ids[index], float(preds['scores'][index])))
+
+        # caixas rastreadas sem detecção correspondente são descartadas
+        self._tracks = tracks
+
+    def _propagate(self, gray):
+        height, width = gray.shape[:2]
+
+        for track in self._tracks:
+            xmin, ymin, xmax, ymax = track.xyxy.astype(int)
+
+            # máscara restrita à caixa para amostrar pontos apenas sobre o pássaro
+            mask = np.zeros_like(self._previous_gray)
+            mask[max(ymin, 0):max(ymax, 0), max(xmin, 0):max(xmax, 0)] = 255
+
+            points = cv2.goodFeaturesToTrack(self._previous_gray, self.max_points, 0.01, 3, mask=mask)
+
+            if points is None:
+                track.confidence = 0.0
+                continue
+
+            next_points, status, _ = cv2.calcOpticalFlowPyrLK(self._previous_gray, gray, points, None)
+            back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._previous_gray, next_points, None)
+
+            # verificação de ida e volta: o ponto deve retornar próximo à posição original
+            fb_error = np.linalg.norm(points - back_points, axis=2).ravel()
+            valid = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.fb_threshold)
+
+            track.confidence *= valid.mean()
+
+            if not valid.any():
+                continue
+
+            dx, dy = np.median((next_points - points).reshape(-1, 2)[valid], axis=0)
+
+            track.xyxy = track.xyxy + np.array([dx, dy, dx, dy], dtype=np.float32)
+            track.xyxy[[0, 2]] = np.clip(track.xyxy[[0, 2]], 0, width)
+            track.xyxy[[1, 3]] = np.clip(track.xyxy[[1, 3]], 0, height)
+
+    def _to_prediction(self, frame):
+        from icevision.core import BBox
+
+        height, width = frame.shape[:2]
+
+        preds = make_prediction_dict(
+            bboxes=[BBox.from_xyxy(*track.xyxy.round().astype(int).tolist()) for track in self._tracks],
+            labels=[track.label for track in self._tracks],
+            scores=[track.score for track in self._tracks],
+            width=width,
+            height=height,
+            label_ids=[track.label_id for track in self._tracks]
+        )
+
+        preds['detection']['track_ids'] = [track.track_id for track in self._tracks]
+        preds['detection']['track_confidences'] = np.array([track.confidence for track in self._tracks], dtype=np.float32)
+
+        return preds
+
+    def step(self, frame):
+        '''
+        Processa o próximo frame do vídeo, executando o detector ou propagando as caixas.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+
+        Retorno
+        ----------
+            Dicionário de predições do frame (mesma estrutura consumida por draw_bb), acrescido das
+            chaves track_ids e track_confidences em preds['detection']
+        '''
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self._previous_gray is None or self._frames_since_detection + 1 >= self.keyframe_interval:
+            self._detect(frame)
+
+        else:
+            self._propagate(gray)
+            self._frames_since_detection += 1
+
+            # executa o detector antecipadamente caso o rastreamento tenha se degradado
+            if any(track.confidence < self.min_track_confidence for track in self._tracks):
+                self.early_detections += 1
+                self._detect(frame)
+
+        self._previous_gray = gray
+
+        return self._to_prediction(frame)
+
+
+def track_frames(tracker, frames):
+    '''
+    Função responsável por aplicar o rastreador sobre um fluxo de frames.
+
+    Parâmetros
+    ----------
+        tracker : instância de KeyframeTracker
+        frames : iterável de tuplas (índice do frame, frame BGR)
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR, predições)
+    '''
+
+    for frame_index, frame in frames:
+        yield frame_index, frame, tracker.step(frame)
+
+
+def track_video(video_path, tracker, max_frames=None):
+    '''
+    Função responsável por aplicar o rastreador sobre todos os frames de um arquivo de vídeo.
+
+    Parâmetros
+    ----------
+        video_path : caminho do arquivo de vídeo
+        tracker : instância de KeyframeTracker
+        max_frames : quantidade máxima de frames lidos
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR, predições)
+    '''
+
+    video = cv2.VideoCapture(video_path)
+
+    if not video.isOpened():
+        raise IOError(f'Erro ao abrir arquivo: {video_path}')
+
+    try:
+        yield from track_frames(tracker, read_frames(video, max_frames=max_frames))
+    finally:
+        video.release()
@@ -3,9 +3,7 @@ import os
 from icevision.all import *
 from icevision.models import *
 
-import pandas as pd
-import fiftyone as fo
-import plotly.express as px
+from .inference import get_tfms
 
 ## dicionário com as cores padrões das bounding boxes dos pássaros
 
@@ -98,58 +96,6 @@ def parse_data(dataset_type='partial'):
 
     return train_records, valid_records, class_map
 
-def get_tfms(img_size, presize=None, tfms_type ='valid'):
-    '''
-    Função responsável por especificir os tipos de transformações 
-    aplicadas sobre as imagens para o redimensionamento ou aumento de dados.
-    
-    Vale ressaltar que a IceVision emprega a biblioteca Albumentations para realizar as transformações.
-    Além disso, as transformações são aplicadas on-the-fly, isto é, elas existem em tempo de execução apenas, 
-    não havendo a criação de imagens estáticas transformadas. 
-
-    Caso as transformações sejam referentes aos dados de treinamento, é empregada a função tfms.A.aug_tfms 
-    que retorna uma lista de transformações da biblioteca Albumentations pré-definidas pela IceVision a saber: 
-
-        - HorizontalFlip : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.transforms.HorizontalFlip
-        - ShiftScaleRotate : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.transforms.ShiftScaleRotate        
-        - RGBShift : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.transforms.RGBShift
-        - RandomBrightnessContrast : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.transforms.RandomBrightnessContrast
-        - Blur : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.blur.transforms.Blur
-        - RandomSizedBBoxSafeCrop: https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.crops.transforms.RandomSizedBBoxSafeCrop
-        - PadIfNeeded : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.transforms.PadIfNeeded
-    
-    Outro ponto importante a ser ressaltado é que as transformações são aplicadas aleatoriamente. Dessa forma, nem sempre todas 
-    as transformações especificadas serão aplicadas, além disso os valores que as especificam pode variar.
-
-    Caso as transformações sejam referentes aos dados de validação, é empregada a função tfms.A.resize_and_pad que apenas
-    especifica transformações de redimensionamento (com padding), a saber:   
-        - LongestMaxSize : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.resize.LongestMaxSize
-        - PadIfNeeded : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.geometric.transforms.PadIfNeeded
-
-    Eem ambos os casos, é realizada a normalização das imagens por meio da classe Normalize da bilioteca Albumentations.
-    A normalização é dada pela fórmula img = (img - mean * max_pixel_value) / (std * max_pixel_value). 
-        - Normalize : https://albumentations.ai/docs/api_reference/full_reference/#albumentations.augmentations.transforms.Normalize
-
-    Parâmetros
-    ----------
-        img_size : tamanho da imagem a ser redimensionada
-        presize : tamanho do presizing (técnica introduzida pela biblioteca Fastai)
-        tfms_type : tipo de transformação (train para conjunto de treinamento ou valid para conjunto de validação)
-    
-    Retorna
-    ----------
-        Uma lista com transformações especificadas
-    '''
-
-    # se os dados forem de treinamento
-    if tfms_type  == 'train':
-        return tfms.A.Adapter([*tfms.A.aug_tfms(size=img_size, presize=presize), tfms.A.Normalize()]) 
-
-    # se os dados forem de validação
-    if tfms_type == 'valid':
-        return tfms.A.Adapter([*tfms.A.resize_and_pad(img_size), tfms.A.Normalize()])
-        
-    
 def get_dataset(records, tfms):
     '''
     Cria uma instância da classe Dataset, que por sua vez é um container para uma lista de records e transformações.
@@ -377,6 +323,8 @@ def save_epoch_history(learner, path_to_save):
         path_dir : caminho onde os 
     '''
 
+    import pandas as pd
+
     # armazena o histórico de epochs incluindo valores das losses de treinamento, validação e métrica de mAP
     record_values = learner.recorder.values
     # armazena o histórico em uma tabela na forma de um DataFrame
@@ -399,6 +347,8 @@ def save_hyperparameters(hyperparameters, path_to_save):
         Sem retorno
     '''
 
+    import pandas as pd
+
     # armazena os valores dos atributos do objeto em um dicionário
     hyperparameters_dict = hyperparameters.__dict__
     # os valores dos hiperparâmetros são armazenados em um DataFrame Pandas
@@ -0,0 +1,410 @@
+import time
+
+import cv2
+import PIL.Image
+import numpy as np
+
+from .inference import get_tfms
+
+# a IceVision é importada dentro das funções que a empregam (ver project_utils.inference)
+
+
+def frame_to_pil(frame):
+    '''
+    Função responsável por converter um frame lido pela OpenCV (BGR) em uma imagem PIL (RGB),
+    formato esperado pelas transformações de inferência da IceVision.
+
+    Parâmetros
+    ----------
+        frame : array numpy no formato BGR retornado por cv2.VideoCapture.read
+
+    Retorno
+    ----------
+        Instância de PIL.Image no formato RGB
+    '''
+
+    return PIL.Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def bbox_to_original(bbox, frame_width, frame_height, img_size):
+    '''
+    Função responsável por converter uma caixa delimitadora predita sobre a imagem transformada
+    (redimensionada e com padding) para as coordenadas do frame original.
+
+    As transformações de validação (get_tfms com tfms_type='valid') aplicam LongestMaxSize seguido de
+    PadIfNeeded centralizado. Assim, basta remover o padding e desfazer a escala.
+
+    Parâmetros
+    ----------
+        bbox : instância de BBox da IceVision no espaço da imagem transformada
+        frame_width : largura do frame original
+        frame_height : altura do frame original
+        img_size : tamanho da imagem empregado na inferência
+
+    Retorno
+    ----------
+        Instância de BBox nas coordenadas do frame original
+    '''
+
+    from icevision.core import BBox
+
+    # escala aplicada pelo LongestMaxSize
+    scale = img_size / max(frame_width, frame_height)
+
+    # padding aplicado pelo PadIfNeeded (centralizado)
+    pad_x = (img_size - int(round(frame_width * scale))) // 2
+    pad_y = (img_size - int(round(frame_height * scale))) // 2
+
+    xmin, ymin, xmax, ymax = bbox.xyxy
+
+    # remove o padding, desfaz a escala e limita as coordenadas ao frame
+    xmin = int(np.clip((xmin - pad_x) / scale, 0, frame_width))
+    ymin = int(np.clip((ymin - pad_y) / scale, 0, frame_height))
+    xmax = int(np.clip((xmax - pad_x) / scale, 0, frame_width))
+    ymax = int(np.clip((ymax - pad_y) / scale, 0, frame_height))
+
+    return BBox.from_xyxy(xmin, ymin, xmax, ymax)
+
+
+def make_prediction_dict(bboxes, labels, scores, width, height, label_ids=None):
+    '''
+    Função responsável por montar o dicionário de predições de um frame na mesma estrutura
+    retornada por model_type.end2end_detect (sem a imagem desenhada) e consumida por draw_bb.
+
+    Parâmetros
+    ----------
+        bboxes : lista de instâncias de BBox nas coordenadas do frame
+        labels : lista com o nome da classe de cada caixa
+        scores : lista com a confiança de cada caixa
+        width : largura do frame
+        height : altura do frame
+        label_ids : lista opcional com o id de cada classe no mapa de classes
+
+    Retorno
+    ----------
+        Dicionário de predições do frame
+    '''
+
+    detection = {
+        'bboxes': list(bboxes),
+        'labels': list(labels),
+        'scores': np.asarray(scores, dtype=np.float32),
+    }
+
+    if label_ids is not None:
+        detection['label_ids'] = list(label_ids)
+
+    return {'detection': detection, 'width': width, 'height': height}
+
+
+def prediction_to_lists(preds):
+    '''
+    Função responsável por converter o dicionário de predições de um frame em listas simples,
+    que podem ser serializadas (pickle, JSON) sem depender das classes da IceVision.
+
+    Parâmetros
+    ----------
+        preds : dicionário de predições do frame
+
+    Retorno
+    ----------
+        Dicionário com as chaves xyxy, labels, scores, width e height
+    '''
+
+    detection = preds['detection']
+
+    return {
+        'xyxy': [[int(value) for value in bbox.xyxy] for bbox in detection['bboxes']],
+        'labels': list(detection['labels']),
+        'scores': [float(score) for score in detection['scores']],
+        'width': preds['width'],
+        'height': preds['height'],
+    }
+
+
+def prediction_from_lists(lists):
+    '''
+    Função responsável por reconstruir o dicionário de predições a partir do retorno de prediction_to_lists.
+    '''
+
+    from icevision.core import BBox
+
+    return make_prediction_dict(
+        bboxes=[BBox.from_xyxy(*xyxy) for xyxy in lists['xyxy']],
+        labels=lists['labels'],
+        scores=lists['scores'],
+        width=lists['width'],
+        height=lists['height']
+    )
+
+
+def batch_iterable(iterable, batch_size):
+    '''
+    Função responsável por agrupar os itens de um iterável em listas de tamanho batch_size.
+    O último batch pode conter menos itens.
+
+    Parâmetros
+    ----------
+        iterable : iterável com os itens a serem agrupados
+        batch_size : quantidade de itens por batch
+
+    Retorno
+    ----------
+        Gerador de listas com no máximo batch_size itens
+    '''
+
+    batch = []
+
+    for item in iterable:
+        batch.append(item)
+
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def read_frames(video, start_frame=0, max_frames=None):
+    '''
+    Função responsável por ler sequencialmente os frames de um vídeo.
+
+    Parâmetros
+    ----------
+        video : instância de cv2.VideoCapture
+        start_frame : índice do primeiro frame a ser lido
+        max_frames : quantidade máxima de frames a serem lidos (None lê até o fim do vídeo)
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR)
+    '''
+
+    if start_frame > 0:
+        video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    frame_index = start_frame
+
+    while max_frames is None or frame_index - start_frame < max_frames:
+        ret, frame = video.read()
+
+        # caso não haja mais frames válidos para ler, encerra a leitura
+        if not ret:
+            break
+
+        yield frame_index, frame
+        frame_index += 1
+
+
+class ThroughputMeter():
+    '''
+    Classe responsável por acumular as estatísticas de vazão (frames por segundo) da inferência em batch.
+
+    Atributos
+    ----------
+        frames : total de frames inferidos
+        batches : total de batches inferidos
+        infer_seconds : tempo total gasto na inferência (transformações e modelo)
+        start_time : instante em que a medição começou
+    '''
+
+    def __init__(self):
+        self.frames = 0
+        self.batches = 0
+        self.infer_seconds = 0.0
+        self.start_time = time.perf_counter()
+
+    def update(self, num_frames, seconds):
+        self.frames += num_frames
+        self.batches += 1
+        self.infer_seconds += seconds
+
+    def report(self):
+        '''
+        Retorna um dicionário com a vazão da inferência e a vazão total (incluindo leitura dos frames).
+        '''
+
+        wall_seconds = time.perf_counter() - self.start_time
+
+        return {
+            'frames': self.frames,
+            'batches': self.batches,
+            'infer_seconds': self.infer_seconds,
+            'wall_seconds': wall_seconds,
+            'infer_fps': self.frames / self.infer_seconds if self.infer_seconds > 0 else 0.0,
+            'wall_fps': self.frames / wall_seconds if wall_seconds > 0 else 0.0,
+            'mean_batch_seconds': self.infer_seconds / self.batches if self.batches > 0 else 0.0,
+        }
+
+
+class BatchDetector():
+    '''
+    Classe responsável por realizar a inferência do modelo sobre vários frames de uma única vez.
+
+    Ao contrário de model_type.end2end_detect, que cria um dataset, aplica as transformações e executa o modelo
+    para cada imagem, aqui as transformações são criadas uma única vez e o modelo é executado uma vez por batch.
+
+    Atributos
+    ----------
+        model_type : especificação da IceVision sobre o tipo do modelo
+        model : instância do modelo treinado
+        img_size : tamanho de imagem empregado na inferência
+        class_map : mapa de classes do conjunto com o qual o modelo foi treinado
+        infer_tfms : transformações de inferência (get_tfms com tfms_type='valid')
+        detection_threshold : confiança mínima das detecções
+    '''
+
+    def __init__(self, model_type, model, img_size, class_map, detection_threshold=0.5, infer_tfms=None):
+        self.model_type = model_type
+        self.model = model.eval()
+        self.img_size = img_size
+        self.class_map = class_map
+        self.infer_tfms = infer_tfms if infer_tfms is not None else get_tfms(img_size=img_size, tfms_type='valid')
+        self.detection_threshold = detection_threshold
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint_path, detection_threshold=0.5, device='cpu'):
+        '''
+        Instancia o detector a partir de um arquivo .pth. O modelo e as transformações são obtidos do
+        registro de modelos do processo, de modo que o checkpoint é lido do disco apenas uma vez.
+        '''
+
+        from .model_registry import get_registry
+
+        entry = get_registry().get(checkpoint_path, device=device)
+
+        return cls(entry.model_type, entry.model, entry.img_size, entry.class_map,
+                   detection_threshold=detection_threshold, infer_tfms=entry.infer_tfms)
+
+    def detect(self, frames):
+        '''
+        Realiza a inferência sobre uma lista de frames BGR.
+
+        Parâmetros
+        ----------
+            frames : lista de frames BGR (arrays numpy) de mesmo tamanho ou não
+
+        Retorno
+        ----------
+            Lista com o dicionário de predições de cada frame, na mesma ordem dos frames
+        '''
+
+        if len(frames) == 0:
+            return []
+
+        from icevision.data import Dataset
+
+        pil_frames = [frame_to_pil(frame) for frame in frames]
+
+        # cria um único dataset de inferência para todo o batch
+        infer_ds = Dataset.from_images(pil_frames, self.infer_tfms, class_map=self.class_map)
+
+        # executa o modelo uma única vez sobre o batch
+        preds = self.model_type.predict(self.model, infer_ds, detection_threshold=self.detection_threshold)
+
+        predictions = []
+
+        for frame, pred in zip(frames, preds):
+            frame_height, frame_width = frame.shape[:2]
+            detection = pred.pred.detection
+
+            # converte as caixas para as coordenadas do frame original
+            bboxes = [bbox_to_original(bbox, frame_width, frame_height, self.img_size) for bbox in detection.bboxes]
+
+            predictions.append(make_prediction_dict(
+                bboxes=bboxes,
+                labels=detection.labels,
+                scores=detection.scores,
+                width=frame_width,
+                height=frame_height,
+                label_ids=detection.label_ids
+            ))
+
+        return predictions
+
+
+def detect_frames(detector, frames, batch_size=8, meter=None):
+    '''
+    Função responsável por inferir um fluxo de frames em batches, preservando a ordem.
+
+    Parâmetros
+    ----------
+        detector : instância de BatchDetector
+        frames : iterável de tuplas (índice do frame, frame BGR)
+        batch_size : quantidade de frames por batch
+        meter : instância opcional de ThroughputMeter para registrar a vazão
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR, predições)
+    '''
+
+    for batch in batch_iterable(frames, batch_size):
+        indexes, batch_frames = zip(*batch)
+
+        start = time.perf_counter()
+        predictions = detector.detect(list(batch_frames))
+
+        if meter is not None:
+            meter.update(len(batch_frames), time.perf_counter() - start)
+
+        yield from zip(indexes, batch_frames, predictions)
+
+
+def detect_video(video_path, detector, batch_size=8, meter=None, max_frames=None):
+    '''
+    Função responsável por inferir todos os frames de um arquivo de vídeo em batches.
+
+    Parâmetros
+    ----------
+        video_path : caminho do arquivo de vídeo
+        detector : instância de BatchDetector
+        batch_size : quantidade de frames por batch
+        meter : instância opcional de ThroughputMeter para registrar a vazão
+        max_frames : quantidade máxima de frames a serem inferidos
+
+    Retorno
+    ----------
+        Gerador de tuplas (índice do frame, frame BGR, predições)
+    '''
+
+    video = cv2.VideoCapture(video_path)
+
+    if not video.isOpened():
+        raise IOError(f'Erro ao abrir arquivo: {video_path}')
+
+    try:
+        yield from detect_frames(detector, read_frames(video, max_frames=max_frames), batch_size=batch_size, meter=meter)
+    finally:
+        video.release()
+
+
+def benchmark_batch_sizes(video_path, detector, batch_sizes=(1, 2, 4, 8, 16), max_frames=64):
+    '''
+    Função responsável por comparar a vazão da inferência para diferentes tamanhos de batch.
+
+    Parâmetros
+    ----------
+        video_path : caminho do arquivo de vídeo
+        detector : instância de BatchDetector
+        batch_sizes : tamanhos de batch a serem avaliados
+        max_frames : quantidade de frames inferidos para cada tamanho de batch
+
+    Retorno
+    ----------
+        Dicionário com o relatório de vazão (ThroughputMeter.report) de cada tamanho de batch
+    '''
+
+    reports = {}
+
+    for batch_size in batch_sizes:
+        meter = ThroughputMeter()
+
+        # consome o gerador apenas para medir a vazão
+        for _ in detect_video(video_path, detector, batch_size=batch_size, meter=meter, max_frames=max_frames):
+            pass
+
+        reports[batch_size] = meter.report()
+
+    return reports
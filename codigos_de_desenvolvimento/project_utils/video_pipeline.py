@@ -0,0 +1,230 @@
+import queue
+import threading
+import time
+
+import cv2
+
+from .draw_detections import draw_bb
+from .video_inference import detect_frames, read_frames
+
+# marcador de fim de fluxo entre as etapas
+_END = object()
+
+
+class StageStats():
+    '''
+    Classe responsável por armazenar o tempo gasto por uma etapa do pipeline.
+
+    Atributos
+    ----------
+        name : nome da etapa
+        items : total de frames processados pela etapa
+        busy_seconds : tempo gasto efetivamente processando frames
+        wait_input_seconds : tempo bloqueado aguardando frames da etapa anterior
+        wait_output_seconds : tempo bloqueado aguardando espaço na fila seguinte (back-pressure)
+        max_queue_depth : maior ocupação observada na fila de saída
+    '''
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.wait_input_seconds = 0.0
+        self.wait_output_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def report(self):
+        return {
+            'items': self.items,
+            'busy_seconds': self.busy_seconds,
+            'wait_input_seconds': self.wait_input_seconds,
+            'wait_output_seconds': self.wait_output_seconds,
+            'max_queue_depth': self.max_queue_depth,
+            'fps': self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0,
+        }
+
+
+def _put(output_queue, item, stats):
+    # registra o tempo bloqueado quando a fila seguinte está cheia
+    start = time.perf_counter()
+    output_queue.put(item)
+    stats.wait_output_seconds += time.perf_counter() - start
+    stats.max_queue_depth = max(stats.max_queue_depth, output_queue.qsize())
+
+
+def _iter_queue(input_queue, stats):
+    # consome a fila até o marcador de fim, registrando o tempo de espera
+    while True:
+        start = time.perf_counter()
+        item = input_queue.get()
+        stats.wait_input_seconds += time.perf_counter() - start
+
+        if item is _END:
+            return
+
+        yield item
+
+
+class VideoPipeline():
+    '''
+    Classe responsável por anotar um vídeo em três etapas concorrentes: decodificação, inferência e codificação.
+
+    A decodificação (cv2.VideoCapture.read) e a codificação (draw_bb e cv2.VideoWriter.write) são executadas
+    em threads dedicadas, enquanto a inferência é executada na thread que chama run. As etapas são ligadas
+    por filas limitadas: quando uma etapa é mais lenta, a anterior bloqueia ao encontrar a fila cheia
+    (back-pressure), de modo que o uso de memória permanece constante independentemente da duração do vídeo.
+    Como cada etapa processa os frames sequencialmente, a ordem dos frames de saída é preservada.
+
+    Atributos
+    ----------
+        process_frames : função que recebe um iterável de (índice, frame) e retorna um iterável de (índice, frame, predições)
+        queue_size : capacidade de cada fila entre as etapas
+        fourcc : código FourCC do codec do vídeo de saída
+        draw : função que desenha as predições sobre o frame (por padrão, draw_bb)
+        stats : dicionário com as instâncias de StageStats de cada etapa
+    '''
+
+    def __init__(self, process_frames, queue_size=16, fourcc='mp4v', draw=draw_bb):
+        self.process_frames = process_frames
+        self.queue_size = queue_size
+        self.fourcc = fourcc
+        self.draw = draw
+        self.stats = {name: StageStats(name) for name in ('decode', 'infer', 'encode')}
+
+        self._errors = []
+
+    @classmethod
+    def from_detector(cls, detector, batch_size=4, **kwargs):
+        '''
+        Instancia o pipeline com a inferência em batch de um BatchDetector.
+        '''
+
+        return cls(lambda frames: detect_frames(detector, frames, batch_size=batch_size), **kwargs)
+
+    def _decode(self, video, decode_queue):
+        stats = self.stats['decode']
+
+        try:
+            frames = read_frames(video)
+
+            while True:
+                start = time.perf_counter()
+                item = next(frames, None)
+                stats.busy_seconds += time.perf_counter() - start
+
+                if item is None:
+                    break
+
+                stats.items += 1
+                _put(decode_queue, item, stats)
+
+        except Exception as error:
+            self._errors.append(error)
+
+        finally:
+            decode_queue.put(_END)
+
+    def _encode(self, writer, encode_queue):
+        stats = self.stats['encode']
+
+        try:
+            for _, frame, preds in _iter_queue(encode_queue, stats):
+                start = time.perf_counter()
+                writer.write(self.draw(frame, preds))
+                stats.busy_seconds += time.perf_counter() - start
+                stats.items += 1
+
+        except Exception as error:
+            self._errors.append(error)
+
+            # continua consumindo a fila para não bloquear a etapa de inferência
+            for _ in _iter_queue(encode_queue, stats):
+                pass
+
+    def run(self, video_path, output_path, fps=None):
+        '''
+        Anota o vídeo e salva o resultado.
+
+        Parâmetros
+        ----------
+            video_path : caminho do vídeo de entrada
+            output_path : caminho do vídeo anotado
+            fps : FPS do vídeo de saída (por padrão, o mesmo do vídeo de entrada)
+
+        Retorno
+        ----------
+            Dicionário com o relatório de cada etapa (StageStats.report) e o tempo total
+        '''
+
+        # o relatório e os erros se referem apenas a esta execução
+        self.stats = {name: StageStats(name) for name in ('decode', 'infer', 'encode')}
+        self._errors = []
+
+        video = cv2.VideoCapture(video_path)
+
+        if not video.isOpened():
+            raise IOError(f'Erro ao abrir arquivo: {video_path}')
+
+        frame_width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        frame_height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = fps or video.get(cv2.CAP_PROP_FPS) or 30
+
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*self.fourcc), fps, (frame_width, frame_height))
+
+        if not writer.isOpened():
+            # sem o codec (ou sem a pasta de saída), o cv2.VideoWriter descartaria os frames sem erro
+            video.release()
+            raise IOError(f'Erro ao criar arquivo: {output_path}')
+
+        decode_queue = queue.Queue(maxsize=self.queue_size)
+        encode_queue = queue.Queue(maxsize=self.queue_size)
+
+        decoder = threading.Thread(target=self._decode, args=(video, decode_queue), daemon=True)
+        encoder = threading.Thread(target=self._encode, args=(writer, encode_queue), daemon=True)
+
+        start = time.perf_counter()
+        decoder.start()
+        encoder.start()
+
+        stats = self.stats['infer']
+
+        try:
+            results = iter(self.process_frames(_iter_queue(decode_queue, stats)))
+
+            while True:
+                infer_start = time.perf_counter()
+                waited = stats.wait_input_seconds
+                result = next(results, None)
+                elapsed = time.perf_counter() - infer_start
+
+                if result is None:
+                    break
+
+                # a espera pela decodificação ocorre dentro de next(results) e já foi contabilizada em _iter_queue,
+                # por isso é descontada do tempo ocupado, como nas demais etapas
+                stats.busy_seconds += max(elapsed - (stats.wait_input_seconds - waited), 0.0)
+                stats.items += 1
+                _put(encode_queue, result, stats)
+
+        finally:
+            encode_queue.put(_END)
+            encoder.join()
+
+            # esvazia a fila de decodificação caso a inferência tenha sido interrompida
+            while decoder.is_alive():
+                try:
+                    decode_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+            decoder.join()
+            video.release()
+            writer.release()
+
+        if self._errors:
+            raise self._errors[0]
+
+        report = {name: stage.report() for name, stage in self.stats.items()}
+        report['wall_seconds'] = time.perf_counter() - start
+
+        return report
@@ -0,0 +1,282 @@
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+
+import cv2
+
+# detector carregado uma única vez em cada processo worker
+_worker_detector = None
+
+
+def split_segments(total_frames, num_segments, min_segment_frames=100):
+    '''
+    Função responsável por dividir um vídeo em intervalos contíguos de frames.
+
+    A quantidade de frames informada pelo container (CAP_PROP_FRAME_COUNT) é apenas uma estimativa,
+    frequentemente menor que a real (ou 0) em arquivos AVI/MJPEG. Por isso, o último segmento não tem
+    fim definido e é lido até o fim do vídeo, e uma contagem desconhecida resulta em um único segmento.
+
+    Parâmetros
+    ----------
+        total_frames : quantidade total de frames do vídeo (estimada)
+        num_segments : quantidade desejada de segmentos
+        min_segment_frames : quantidade mínima de frames por segmento (evita segmentos muito curtos)
+
+    Retorno
+    ----------
+        Lista de tuplas (frame inicial, frame final exclusivo ou None para ler até o fim do vídeo)
+    '''
+
+    if total_frames <= 0:
+        return [(0, None)]
+
+    num_segments = max(1, min(num_segments, total_frames // max(min_segment_frames, 1)))
+    segment_size, remainder = divmod(total_frames, num_segments)
+
+    segments = []
+    start = 0
+
+    for index in range(num_segments):
+        # os primeiros segmentos absorvem os frames restantes da divisão
+        end = start + segment_size + (1 if index < remainder else 0)
+        segments.append((start, end))
+        start = end
+
+    # o último segmento inclui os frames além da contagem estimada
+    segments[-1] = (segments[-1][0], None)
+
+    return segments
+
+
+def seek_frame(video, frame_index):
+    '''
+    Função responsável por posicionar o vídeo no frame informado.
+
+    A busca por CAP_PROP_POS_FRAMES é imprecisa em alguns containers (por exemplo, MP4 com B-frames).
+    Quando a posição obtida difere da solicitada, o vídeo é reposicionado no início e os frames anteriores
+    são decodificados sequencialmente (grab), sem conversão, o que garante a posição exata.
+
+    Parâmetros
+    ----------
+        video : instância de cv2.VideoCapture
+        frame_index : índice do frame a ser lido em seguida
+
+    Retorno
+    ----------
+        True se o vídeo foi posicionado, False se o vídeo possui menos de frame_index frames
+    '''
+
+    if frame_index <= 0:
+        return True
+
+    if video.set(cv2.CAP_PROP_POS_FRAMES, frame_index) and int(video.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index:
+        return True
+
+    video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    for _ in range(frame_index):
+        if not video.grab():
+            return False
+
+    return True
+
+
+def init_worker(checkpoint_path, torch_threads, detection_threshold):
+    '''
+    Função responsável por carregar o modelo em um processo worker. Deve ser passada como initializer
+    dos pools de processos (multiprocessing.Pool ou ProcessPoolExecutor) que executam a inferência.
+
+    Parâmetros
+    ----------
+        checkpoint_path : caminho para o arquivo .pth do modelo
+        torch_threads : quantidade de threads do PyTorch no processo
+        detection_threshold : confiança mínima das detecções
+    '''
+
+    global _worker_detector
+
+    import torch
+    from .video_inference import BatchDetector
+
+    # limita as threads de cada processo para não sobrecarregar os núcleos da máquina
+    torch.set_num_threads(torch_threads)
+    cv2.setNumThreads(1)
+
+    _worker_detector = BatchDetector.from_checkpoint(checkpoint_path, detection_threshold=detection_threshold)
+
+
+def get_worker_detector():
+    '''
+    Retorna a instância de BatchDetector carregada por init_worker no processo atual.
+    '''
+
+    if _worker_detector is None:
+        raise RuntimeError('O modelo não foi carregado neste processo (init_worker não foi executado)')
+
+    return _worker_detector
+
+
+def _process_segment(task):
+    from .draw_detections import draw_bb
+    from .video_inference import detect_frames, prediction_to_lists, read_frames
+
+    video_path, start, end, batch_size, segment_path = task
+
+    video = cv2.VideoCapture(video_path)
+
+    writer = None
+
+    if segment_path is not None:
+        fps = video.get(cv2.CAP_PROP_FPS) or 30
+        resolution = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        writer = cv2.VideoWriter(segment_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, resolution)
+
+    detections = []
+
+    try:
+        if not seek_frame(video, start):
+            # a contagem estimada era maior que a quantidade real de frames
+            return detections
+
+        # os índices são contados a partir da posição verificada, e não da busca do container
+        frames = ((start + offset, frame) for offset, frame in read_frames(video, max_frames=None if end is None else end - start))
+
+        for frame_index, frame, preds in detect_frames(get_worker_detector(), frames, batch_size=batch_size):
+            detections.append((frame_index, prediction_to_lists(preds)))
+
+            if writer is not None:
+                writer.write(draw_bb(frame, preds))
+
+    finally:
+        video.release()
+
+        if writer is not None:
+            writer.release()
+
+    return detections
+
+
+def concat_segments(segment_paths, output_path):
+    '''
+    Função responsável por juntar os segmentos anotados em um único vídeo, na ordem recebida.
+
+    Caso o ffmpeg esteja disponível, os segmentos são concatenados sem recodificação. Caso contrário,
+    os frames são relidos e escritos novamente por meio da OpenCV.
+
+    Parâmetros
+    ----------
+        segment_paths : lista ordenada com os caminhos dos segmentos
+        output_path : caminho do vídeo final
+    '''
+
+    if shutil.which('ffmpeg') is not None:
+        list_path = output_path + '.segments.txt'
+
+        with open(list_path, 'w') as list_file:
+            for segment_path in segment_paths:
+                list_file.write(f"file '{os.path.abspath(segment_path)}'\n")
+
+        try:
+            subprocess.run(
+                ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', output_path],
+                check=True
+            )
+        finally:
+            os.remove(list_path)
+
+        return
+
+    writer = None
+
+    for segment_path in segment_paths:
+        segment = cv2.VideoCapture(segment_path)
+
+        if writer is None:
+            fps = segment.get(cv2.CAP_PROP_FPS) or 30
+            resolution = (int(segment.get(cv2.CAP_PROP_FRAME_WIDTH)), int(segment.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, resolution)
+
+        while True:
+            ret, frame = segment.read()
+
+            if not ret:
+                break
+
+            writer.write(frame)
+
+        segment.release()
+
+    if writer is not None:
+        writer.release()
+
+
+def run_sharded_video_job(video_path,
+                          checkpoint_path,
+                          output_path=None,
+                          num_workers=None,
+                          torch_threads=1,
+                          batch_size=4,
+                          detection_threshold=0.5,
+                          min_segment_frames=100):
+    '''
+    Função responsável por processar um vídeo longo em paralelo, dividindo-o em segmentos de frames
+    distribuídos entre processos workers. Cada worker carrega o checkpoint uma única vez.
+
+    O produto de num_workers por torch_threads não deve ultrapassar a quantidade de núcleos da máquina.
+
+    Parâmetros
+    ----------
+        video_path : caminho do vídeo de entrada
+        checkpoint_path : caminho do arquivo .pth do modelo
+        output_path : caminho do vídeo anotado (None retorna apenas as detecções)
+        num_workers : quantidade de processos (por padrão, núcleos disponíveis / torch_threads)
+        torch_threads : quantidade de threads do PyTorch em cada processo
+        batch_size : quantidade de frames por batch de inferência
+        detection_threshold : confiança mínima das detecções
+        min_segment_frames : quantidade mínima de frames por segmento
+
+    Retorno
+    ----------
+        Lista ordenada de tuplas (índice do frame, predições no formato de prediction_to_lists)
+    '''
+
+    if num_workers is None:
+        num_workers = max(1, (os.cpu_count() or 1) // torch_threads)
+
+    video = cv2.VideoCapture(video_path)
+
+    if not video.isOpened():
+        raise IOError(f'Erro ao abrir arquivo: {video_path}')
+
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video.release()
+
+    segments = split_segments(total_frames, num_workers, min_segment_frames=min_segment_frames)
+
+    temp_dir = tempfile.mkdtemp(prefix='segments_') if output_path is not None else None
+    segment_paths = [os.path.join(temp_dir, f'{index}.mp4') if temp_dir else None for index in range(len(segments))]
+
+    tasks = [(video_path, start, end, batch_size, segment_path) for (start, end), segment_path in zip(segments, segment_paths)]
+
+    # spawn evita herdar o estado de threads do PyTorch do processo principal
+    context = multiprocessing.get_context('spawn')
+
+    try:
+        with context.Pool(processes=min(num_workers, len(tasks)),
+                          initializer=init_worker,
+                          initargs=(checkpoint_path, torch_threads, detection_threshold)) as pool:
+
+            # map preserva a ordem dos segmentos
+            results = pool.map(_process_segment, tasks)
+
+        if output_path is not None:
+            # segmentos vazios (contagem estimada maior que a real) não entram no vídeo final
+            concat_segments([path for path, result in zip(segment_paths, results) if result], output_path)
+
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return [detection for segment_detections in results for detection in segment_detections]
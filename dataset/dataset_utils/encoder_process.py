@@ -0,0 +1,416 @@
+'''
+Codificação dos segmentos gravados em um processo separado da captura.
+
+Os frames são copiados para slots de uma área de memória compartilhada (multiprocessing.shared_memory),
+e apenas o índice do slot é enviado ao processo de codificação, que devolve o slot após gravar o frame.
+Quando não há slot livre, o frame é descartado e contabilizado, sem bloquear a captura, e write retorna
+False, para que o gravador não registre o timestamp de um frame ausente no vídeo.
+
+O processo de codificação é iniciado como um script separado (e não com multiprocessing.Process) porque,
+no Windows, o multiprocessing executaria novamente o script de captura no processo filho.
+
+Se o processo de codificação não conseguir abrir um segmento (por exemplo, por falta do codec) ou for
+encerrado, a falha é registrada em last_error e os próximos frames levantam RuntimeError, em vez de a
+gravação produzir arquivos vazios ou parar sem aviso.
+'''
+
+import datetime
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+def template_pattern(file_name_template):
+    '''
+    Retorna a expressão regular que reconhece os nomes gerados por um padrão de nome de arquivo,
+    como "{}-{}-{} {}-{}-{}.avi", em que cada campo é um número.
+    '''
+
+    return re.compile('^' + re.escape(file_name_template).replace(re.escape('{}'), r'\d+') + '$')
+
+
+def enforce_disk_budget(directory, budget_bytes, file_name_template, archive_dir=None, keep=()):
+    '''
+    Função responsável por manter o espaço ocupado pelas gravações de uma pasta dentro do orçamento,
+    apagando (ou movendo para archive_dir) os segmentos mais antigos e seus arquivos auxiliares.
+
+    Apenas os arquivos cujo nome segue file_name_template (os segmentos gravados pelo script de captura)
+    são considerados; outros vídeos da pasta nunca são removidos nem contabilizados.
+
+    Parâmetros
+    ----------
+        directory : pasta das gravações
+        budget_bytes : espaço máximo ocupado pelas gravações, em bytes
+        file_name_template : padrão do nome dos segmentos (o mesmo empregado por SegmentRotator)
+        archive_dir : pasta para onde os segmentos mais antigos são movidos; se None, são apagados
+        keep : caminhos que não podem ser removidos (segmentos ainda em gravação)
+
+    Retorno
+    ----------
+        Lista com os caminhos dos segmentos removidos
+    '''
+
+    pattern = template_pattern(file_name_template)
+    keep = {os.path.abspath(path) for path in keep}
+    segments = []
+
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+
+        if pattern.match(name) and os.path.isfile(path):
+            # o segmento e seus arquivos auxiliares (por exemplo, os timestamps em CSV) são removidos juntos
+            stem = os.path.splitext(path)[0]
+            files = [path] + [stem + ext for ext in ('.csv',) if os.path.exists(stem + ext)]
+            segments.append((os.path.getmtime(path), path, files, sum(os.path.getsize(f) for f in files)))
+
+    segments.sort()
+    total = sum(size for _, _, _, size in segments)
+    removed = []
+
+    for _, path, files, size in segments:
+        if total <= budget_bytes:
+            break
+
+        if os.path.abspath(path) in keep:
+            continue
+
+        for file in files:
+            if archive_dir is not None:
+                shutil.move(file, os.path.join(archive_dir, os.path.basename(file)))
+            else:
+                os.remove(file)
+
+        total -= size
+        removed.append(path)
+
+    return removed
+
+
+class EncodedSegment():
+    '''
+    Classe com a mesma interface de cv2.VideoWriter (write e release), que envia os frames de um
+    segmento ao processo de codificação. É criada por EncoderProcess.writer_factory.
+
+    Diferentemente de cv2.VideoWriter, write retorna False quando o frame é descartado por falta de slot livre
+    e levanta RuntimeError quando o processo de codificação falhou.
+    '''
+
+    def __init__(self, encoder, segment_id):
+        self.encoder = encoder
+        self.segment_id = segment_id
+
+    def write(self, frame):
+        return self.encoder._write(self.segment_id, frame)
+
+    def release(self):
+        if self.encoder.last_error is not None:
+            # o processo de codificação já falhou e não há mais o que finalizar
+            return
+
+        self.encoder._send({'cmd': 'release', 'id': self.segment_id})
+
+
+class EncoderProcess():
+    '''
+    Classe responsável por iniciar e alimentar o processo de codificação.
+
+    Atributos
+    ----------
+        resolution : resolução (largura, altura) dos frames
+        fps : FPS dos vídeos gravados
+        fourcc : código FourCC do codec empregado pelo processo de codificação (por exemplo, XVID ou MJPG)
+        slots : quantidade de frames que podem aguardar a codificação na memória compartilhada
+        disk_budget_bytes : espaço máximo ocupado pelas gravações em cada pasta; se None, não há limite
+        file_name_template : padrão do nome dos segmentos; apenas esses arquivos são removidos pelo orçamento
+        archive_dir : pasta para onde os segmentos mais antigos são movidos; se None, são apagados
+        sent : total de frames enviados para codificação
+        dropped : total de frames descartados por falta de slot livre
+        segments : estatísticas de cada segmento finalizado pelo processo de codificação
+        last_error : mensagem da falha do processo de codificação (None se não houve falha)
+    '''
+
+    def __init__(self, resolution, fps, fourcc='XVID', slots=32, disk_budget_bytes=None, file_name_template=None, archive_dir=None):
+        if disk_budget_bytes is not None and file_name_template is None:
+            raise ValueError('file_name_template é obrigatório quando há um orçamento de disco')
+
+        self.resolution = resolution
+        self.fps = fps
+        self.fourcc = fourcc
+        self.slots = slots
+        self.disk_budget_bytes = disk_budget_bytes
+        self.file_name_template = file_name_template
+        self.archive_dir = archive_dir
+        self.sent = 0
+        self.dropped = 0
+        self.segments = []
+        self.last_error = None
+
+        width, height = resolution
+        self._frame_shape = (height, width, 3)
+        self._frame_bytes = height * width * 3
+
+        self._memory = None
+        self._frames = None
+        self._process = None
+        self._reader = None
+        self._free = queue.Queue()
+        self._send_lock = threading.Lock()
+        self._next_id = 0
+        self._stopping = False
+
+    def start(self):
+        '''
+        Cria a memória compartilhada e inicia o processo de codificação.
+        '''
+
+        self._memory = shared_memory.SharedMemory(create=True, size=self.slots * self._frame_bytes)
+        self._frames = np.ndarray((self.slots,) + self._frame_shape, dtype=np.uint8, buffer=self._memory.buf)
+
+        for slot in range(self.slots):
+            self._free.put(slot)
+
+        config = {
+            'memory': self._memory.name,
+            'slots': self.slots,
+            'resolution': list(self.resolution),
+            'fps': self.fps,
+            'fourcc': self.fourcc,
+            'disk_budget_bytes': self.disk_budget_bytes,
+            'file_name_template': self.file_name_template,
+            'archive_dir': self.archive_dir,
+        }
+
+        self._process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), json.dumps(config)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+
+        self._reader = threading.Thread(target=self._read_replies, daemon=True)
+        self._reader.start()
+
+        return self
+
+    def _fail(self, message):
+        # apenas a primeira falha é registrada, pois as seguintes costumam ser consequência dela
+        if self.last_error is None:
+            self.last_error = message
+            print(f'Falha na codificação: {message}')
+
+    def _send(self, message):
+        if self.last_error is not None:
+            raise RuntimeError(self.last_error)
+
+        try:
+            with self._send_lock:
+                self._process.stdin.write(json.dumps(message) + '\n')
+        except (BrokenPipeError, OSError, ValueError):
+            # ValueError: o stdin já foi fechado
+            self._fail(f'o processo de codificação foi encerrado (código {self._process.poll()})')
+            raise RuntimeError(self.last_error)
+
+    def _read_replies(self):
+        for line in self._process.stdout:
+            reply = json.loads(line)
+
+            if 'slot' in reply:
+                self._free.put(reply['slot'])
+            elif 'segment' in reply:
+                self.segments.append(reply['segment'])
+            elif 'error' in reply:
+                self._fail(reply['error'])
+
+        if not self._stopping:
+            # o processo terminou sem que stop fosse chamado
+            self._fail(f'o processo de codificação foi encerrado (código {self._process.wait()})')
+
+    def writer_factory(self, file_name):
+        '''
+        Abre um segmento no processo de codificação e retorna um objeto com write e release,
+        podendo ser empregado como writer_factory de SegmentRotator e TriggeredRecorder.
+        '''
+
+        segment_id, self._next_id = self._next_id, self._next_id + 1
+        self._send({'cmd': 'open', 'id': segment_id, 'path': os.path.abspath(file_name)})
+
+        return EncodedSegment(self, segment_id)
+
+    def _write(self, segment_id, frame):
+        if self.last_error is not None:
+            raise RuntimeError(self.last_error)
+
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            # o processo de codificação está atrasado; o frame é descartado sem bloquear a captura
+            self.dropped += 1
+            return False
+
+        np.copyto(self._frames[slot], frame)
+        self._send({'cmd': 'frame', 'id': segment_id, 'slot': slot})
+        self.sent += 1
+
+        return True
+
+    def stop(self):
+        '''
+        Aguarda a codificação dos frames pendentes, encerra o processo e libera a memória compartilhada.
+        '''
+
+        self._stopping = True
+
+        try:
+            with self._send_lock:
+                self._process.stdin.write(json.dumps({'cmd': 'stop'}) + '\n')
+                self._process.stdin.close()
+        except (BrokenPipeError, OSError, ValueError):
+            # o processo já havia sido encerrado; a falha foi registrada em last_error
+            pass
+
+        self._process.wait()
+        self._reader.join()
+
+        self._frames = None
+        self._memory.close()
+        self._memory.unlink()
+
+    def report(self):
+        '''
+        Retorna uma string com a vazão da codificação e o espaço ocupado por hora de gravação.
+        '''
+
+        frames = sum(segment['frames'] for segment in self.segments)
+        size = sum(segment['bytes'] for segment in self.segments)
+        seconds = sum(segment['encode_seconds'] for segment in self.segments)
+        recorded_hours = frames / self.fps / 3600
+
+        return (f"{frames} frames codificados ({frames / seconds if seconds > 0 else 0.0:.1f} fps), "
+                f"{self.dropped} descartados, "
+                f"{size / recorded_hours / 1e9 if recorded_hours > 0 else 0.0:.2f} GB por hora gravada")
+
+
+def _run_worker(config):
+    memory = shared_memory.SharedMemory(name=config['memory'])
+
+    try:
+        # a memória pertence ao processo de captura, que é o responsável por liberá-la
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(memory._name, 'shared_memory')
+    except (ImportError, AttributeError, KeyError):
+        pass
+
+    width, height = config['resolution']
+    frames = np.ndarray((config['slots'], height, width, 3), dtype=np.uint8, buffer=memory.buf)
+    fourcc = cv2.VideoWriter_fourcc(*config['fourcc'])
+
+    segments = {}
+
+    def reply(message):
+        sys.stdout.write(json.dumps(message) + '\n')
+        sys.stdout.flush()
+
+    for line in sys.stdin:
+        message = json.loads(line)
+        cmd = message['cmd']
+
+        if cmd == 'open':
+            writer = cv2.VideoWriter(message['path'], fourcc, config['fps'], (width, height))
+
+            if not writer.isOpened():
+                # sem o codec (ou sem permissão na pasta), o cv2.VideoWriter produziria um arquivo vazio sem erro
+                error = f"não foi possível abrir {message['path']} com o codec {config['fourcc']}"
+                print(error, file=sys.stderr)
+                reply({'error': error, 'id': message['id']})
+                writer = None
+
+            segments[message['id']] = {
+                'path': message['path'],
+                'writer': writer,
+                'frames': 0,
+                'encode_seconds': 0.0,
+            }
+
+        elif cmd == 'frame':
+            segment = segments[message['id']]
+
+            if segment['writer'] is None:
+                # o segmento não pôde ser aberto; o slot é devolvido sem gravar
+                reply({'slot': message['slot']})
+                continue
+
+            start = time.perf_counter()
+            segment['writer'].write(frames[message['slot']])
+            segment['encode_seconds'] += time.perf_counter() - start
+            segment['frames'] += 1
+
+            reply({'slot': message['slot']})
+
+        elif cmd == 'release':
+            segment = segments.pop(message['id'])
+
+            if segment['writer'] is not None:
+                segment['writer'].release()
+
+            if segment['frames'] == 0:
+                # segmento aberto com antecedência que não chegou a receber frames
+                if os.path.exists(segment['path']):
+                    os.remove(segment['path'])
+                continue
+
+            size = os.path.getsize(segment['path']) if os.path.exists(segment['path']) else 0
+            recorded_seconds = segment['frames'] / config['fps']
+
+            stats = {
+                'file': segment['path'],
+                'finished': datetime.datetime.now().isoformat(),
+                'frames': segment['frames'],
+                'bytes': size,
+                'encode_seconds': segment['encode_seconds'],
+                'encode_fps': segment['frames'] / segment['encode_seconds'] if segment['encode_seconds'] > 0 else 0.0,
+                'bytes_per_hour': size * 3600 / recorded_seconds if recorded_seconds > 0 else 0.0,
+            }
+
+            directory = os.path.dirname(segment['path'])
+
+            if config['disk_budget_bytes'] is not None:
+                # os segmentos ainda em gravação (inclusive o próximo, já aberto) nunca são removidos
+                stats['removed'] = enforce_disk_budget(
+                    directory,
+                    config['disk_budget_bytes'],
+                    config['file_name_template'],
+                    archive_dir=config['archive_dir'],
+                    keep=[open_segment['path'] for open_segment in segments.values()]
+                )
+
+            with open(os.path.join(directory, 'encoding_stats.jsonl'), 'a') as stats_file:
+                stats_file.write(json.dumps(stats) + '\n')
+
+            print(f"{os.path.basename(segment['path'])}: {stats['frames']} frames, {stats['encode_fps']:.1f} fps de codificação, "
+                  f"{stats['bytes_per_hour'] / 1e9:.2f} GB/h", file=sys.stderr)
+
+            reply({'segment': stats})
+
+        elif cmd == 'stop':
+            break
+
+    for segment in segments.values():
+        if segment['writer'] is not None:
+            segment['writer'].release()
+
+    del frames
+    memory.close()
+
+
+if __name__ == '__main__':
+    _run_worker(json.loads(sys.argv[1]))
@@ -0,0 +1,77 @@
+import os
+import sys
+
+# permite importar o pacote project_utils, localizado em codigos_de_desenvolvimento
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'codigos_de_desenvolvimento'))
+
+
+class LivePreview():
+    '''
+    Classe responsável por exibir as detecções do modelo treinado sobre a pré-visualização da captura.
+
+    A inferência é executada em uma thread separada (RealTimeDetector), que recebe os frames sem bloquear
+    o laço de captura e gravação. A pré-visualização exibe as detecções mais recentes disponíveis, que
+    podem ser de alguns frames atrás quando a inferência é mais lenta que a captura. Os frames gravados
+    nunca são alterados, pois o desenho é feito em um buffer separado.
+
+    Atributos
+    ----------
+        detector : instância de RealTimeDetector
+        renderer : instância de OverlayRenderer empregada no desenho das detecções
+        frame_index : índice do próximo frame capturado
+    '''
+
+    def __init__(self, checkpoint_path, latency_budget=0.5, detection_threshold=0.5):
+        from project_utils.draw_detections import OverlayRenderer
+        from project_utils.realtime import RealTimeDetector
+
+        self.detector = RealTimeDetector.from_checkpoint(
+            checkpoint_path,
+            latency_budget=latency_budget,
+            detection_threshold=detection_threshold
+        ).start()
+
+        self.renderer = OverlayRenderer()
+        self.frame_index = 0
+
+    def submit(self, frame):
+        '''
+        Envia o frame capturado para inferência sem bloquear. Deve ser chamada para todo frame capturado
+        (por exemplo, como on_frame de CaptureThread), para que os frames não inferidos sejam contabilizados.
+        '''
+
+        self.detector.submit(self.frame_index, frame)
+        self.frame_index += 1
+
+    def annotate(self, frame):
+        '''
+        Retorna uma cópia do frame com as detecções mais recentes desenhadas.
+        '''
+
+        latest = self.detector.latest()
+
+        if latest is None:
+            return frame
+
+        _, preds = latest
+
+        return self.renderer.draw(frame, preds, copy=True)
+
+    def report(self):
+        '''
+        Retorna uma string com as estatísticas da inferência, incluindo os frames não inferidos.
+        '''
+
+        stats = self.detector.stats()
+
+        report = (f"inferidos {stats['processed']}/{stats['received']} frames, "
+                  f"não inferidos {stats['dropped']} ({100 * stats['drop_rate']:.1f}%), "
+                  f"{stats['fps']:.1f} fps, img_size {stats['img_size']}")
+
+        if stats['errors'] > 0:
+            report += f", {stats['errors']} falha(s) de inferência (última: {stats['last_error']})"
+
+        return report
+
+    def stop(self):
+        self.detector.stop()
@@ -1,8 +1,26 @@
 import cv2 # import da biblioteca OpenCV
 import datetime # import da biblioteca datetime para anotação da data de gravação
+import os # import da biblioteca os para manipulação do nome dos arquivos
+
+from encoder_process import EncoderProcess
+from segmented_capture import CaptureThread, FrameRing, SegmentRotator, WriterThread
 
 camera_id = 1 # id da câmera entre as três conectadas
 
+live_mode = False # se True, exibe na janela as detecções do modelo treinado (a gravação não é alterada)
+checkpoint_path = "../../faster_rcnn/final_test/model_0/mmdet.faster_rcnn_resnext101_32x4d_fpn_1x.pth" # checkpoint empregado no modo ao vivo
+live_latency_budget = 0.5 # latência desejada (em segundos) da inferência no modo ao vivo
+
+recording_mode = "continuous" # "continuous" grava tudo; "triggered" grava apenas os trechos com pássaros
+pre_roll_seconds = 3 # tempo gravado antes da primeira indicação de pássaros (modo "triggered")
+post_roll_seconds = 5 # tempo gravado após a última indicação de pássaros (modo "triggered")
+
+offload_encoding = False # se True, a codificação é feita em um processo separado, com o codec abaixo
+encoder_fourcc = "MJPG" # codec empregado pelo processo de codificação; "XVID" ocupa bem menos espaço em disco, mas altera o formato das gravações
+encoder_extension = ".avi" # extensão compatível com o codec; o AVI continua legível se a gravação for interrompida (ao contrário do MP4)
+disk_budget_gb = None # se definido, espaço máximo ocupado pelas gravações; os segmentos mais antigos deste script são removidos
+archive_path = None # se definido, os segmentos mais antigos são movidos para esta pasta em vez de apagados
+
 webcam = cv2.VideoCapture(camera_id, cv2.CAP_DSHOW) # objeto de captura do conteúdo da webcam
 webcam.set(cv2.CAP_PROP_FRAME_WIDTH, 1280) # define a largura para 1280 (720p)
 webcam.set(cv2.CAP_PROP_FRAME_HEIGHT, 720) # define a altura para 720 (720p)
@@ -21,56 +39,134 @@ file_name_template = "{}-{}-{} {}-{}-{}.avi" # f-string referente ao nome do arq
 file_path = "" # caminho onde as gravações serão armazenadas
 fps = 10 # FPS do vídeo
 
-date_reading = datetime.datetime.now() # lê a data atual
-day, month, year = date_reading.day, date_reading.month, date_reading.year # recupera dia, mês e ano
-
 time_interval = 5*60 # define o intervalo de tempo da gravação (5 min)
 
+encoder = None
+writer_factory = None
+
+if offload_encoding:
+    # os frames são enviados ao processo de codificação por memória compartilhada
+    file_name_template = os.path.splitext(file_name_template)[0] + encoder_extension
+    encoder = EncoderProcess(
+        resolution, fps,
+        fourcc=encoder_fourcc,
+        disk_budget_bytes=int(disk_budget_gb * 1e9) if disk_budget_gb is not None else None,
+        file_name_template=file_name_template,
+        archive_dir=archive_path
+    ).start()
+    writer_factory = encoder.writer_factory
+
+live_preview = None
+
+if live_mode:
+    # a inferência roda em uma thread separada e nunca bloqueia a captura e a gravação
+    from live_detection import LivePreview
+    live_preview = LivePreview(checkpoint_path, latency_budget=live_latency_budget)
+
+recorder = None
+
+if recording_mode == "triggered":
+    from triggered_recording import DetectorPresence, MotionPresence, TriggeredRecorder
+    # com o modo ao vivo, a presença é indicada pelo detector; caso contrário, pelo movimento na cena
+    presence = DetectorPresence(live_preview.detector) if live_preview is not None else MotionPresence()
+    recorder = TriggeredRecorder(
+        file_path or ".", fps, resolution, presence,
+        codec=codec,
+        pre_roll_seconds=pre_roll_seconds,
+        post_roll_seconds=post_roll_seconds,
+        file_name_template=file_name_template,
+        writer_factory=writer_factory
+    )
+
 # ao todo, serão realizadas 12 gravações de 5 minutos por execução de script totalizando 1 hora de gravações. 
 # após esse período, o script deve ser executado novamente.
-# dessa forma, haverá 12 loops nos quais uma gravação de 5 minutos será realizada.
+# dessa forma, haverá 12 segmentos nos quais uma gravação de 5 minutos será realizada.
 
-loop_counting = 0 
 amount_of_loop = 12 
+ring_capacity = 5*fps # quantidade de frames que aguardam a gravação antes de começarem a ser descartados
+
+# a leitura da webcam e a gravação rodam em threads separadas, ligadas por um buffer circular,
+# de modo que a pré-visualização e eventuais lentidões do disco não atrasam a captura
+ring = FrameRing(capacity=ring_capacity)
+# no modo ao vivo, todo frame capturado é enviado à inferência pela própria thread de captura (sem bloquear),
+# de modo que os frames não inferidos são contabilizados mesmo quando a janela não chega a exibi-los;
+# no modo "triggered", os frames são enviados pela verificação de presença do gravador
+on_frame = live_preview.submit if live_preview is not None and recorder is None else None
+capture = CaptureThread(webcam, ring, on_frame=on_frame)
+
+if recorder is None:
+    # o gravador do próximo segmento é aberto com antecedência, para que a troca não perca frames
+    sink = SegmentRotator(file_path, file_name_template, codec, fps, resolution,
+                          segment_seconds=time_interval, amount_of_segments=amount_of_loop,
+                          writer_factory=writer_factory)
+else:
+    sink = recorder
 
-while loop_counting < amount_of_loop: 
-    # leitura do horário em que a gravação começou
-    first_time_reading  = datetime.datetime.now()
-    #recupera hora, minuto e segundo
-    hour, minute, second  = first_time_reading.hour, first_time_reading.minute, first_time_reading.second
-    # define o nome do arquivo com o timestamp do início da gravação
-    file_name = file_path + file_name_template.format(day, month, year, hour, minute, second)
-    # objeto que gravará os vídeos localmente
-    video_writer = cv2.VideoWriter(file_name, codec, fps, resolution)
-
-    while True:
-        # horário de leitura do próximo frame
-        last_time_reading = datetime.datetime.now() 
-        # leitura do próximo frame
-        ret, frame = webcam.read()
-        if ret:
-            # se o frame tiver sido lido corretamente, mostre o frame na janela
+writer = WriterThread(ring, sink)
+
+capture.start()
+writer.start()
+
+# leitura do horário em que a gravação começou
+first_time_reading = datetime.datetime.now()
+last_shown = None
+
+while True:
+    latest = capture.latest
+    if latest is not None and latest[0] != last_shown:
+        # mostra o frame mais recente na janela
+        last_shown, frame = latest
+        if live_preview is not None:
+            # mostra as detecções mais recentes na janela
+            cv2.imshow(f"CAM {camera_id}", live_preview.annotate(frame))
+        else:
             cv2.imshow(f"CAM {camera_id}", frame)
-            # grave o frame
-            video_writer.write(frame)
-        else: 
-            # caso contrário, indique que houve falha na leitura
-            print("A leitura do frame falhou!")
-    
-        if cv2.waitKey(1) == ord("q"):
-            # se a tecla q for pressionada, encerra a gravação
-            video_writer.release()
-            loop_counting = 100
-            break
-        
-        if (last_time_reading - first_time_reading).seconds >= time_interval:
-            # se o tempo de gravação for atingido, encerre a gravação 
-            video_writer.release()
-            break
-    # inicia um novo ciclo de gravação
-    loop_counting +=1 
-
-# no final das 12 gravações, libere a webcam    
+
+    if cv2.waitKey(1) == ord("q"):
+        # se a tecla q for pressionada, encerra a gravação
+        break
+
+    if not capture.is_alive():
+        # a câmera parou de responder (a thread de captura encerrou após falhas consecutivas)
+        break
+
+    if not writer.is_alive():
+        # a gravação falhou (por exemplo, o processo de codificação foi encerrado)
+        break
+
+    if recorder is None and sink.finished:
+        # todos os segmentos foram gravados
+        break
+
+    if (datetime.datetime.now() - first_time_reading).seconds >= time_interval*amount_of_loop:
+        # se o tempo total de gravação for atingido, encerre a gravação
+        break
+
+# encerra a captura, grava os frames restantes no buffer e finaliza o segmento atual
+capture.stop()
+writer.stop()
+sink.close()
+
+if recorder is None:
+    for segment in sink.segments:
+        print(f"{segment['file']}: {segment['frames']} frames gravados, {segment['dropped']} descartados")
+else:
+    # informa quantos trechos foram gravados
+    print(f"{recorder.events} trechos gravados")
+print(f"{capture.captured} frames capturados, {ring.dropped} descartados, {capture.failed} leituras falharam")
+if writer.last_error is not None:
+    print(f"A gravação foi interrompida: {writer.last_error}")
+
+if encoder is not None:
+    # aguarda a codificação dos frames pendentes e informa a vazão e o espaço ocupado por hora
+    encoder.stop()
+    print(encoder.report())
+
+# encerra a inferência e libera a webcam
+if live_preview is not None:
+    # informa os frames que o detector não conseguiu inferir
+    print(live_preview.report())
+    live_preview.stop()
 webcam.release()
 # libera todas as janelas
 cv2.destroyAllWindows()
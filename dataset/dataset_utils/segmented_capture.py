@@ -0,0 +1,345 @@
+import csv
+import datetime
+import os
+import threading
+import time
+
+import cv2
+
+
+class FrameRing():
+    '''
+    Classe responsável por um buffer circular de frames com um único produtor e um único consumidor.
+
+    O produtor altera apenas head e o consumidor altera apenas tail, de modo que nenhuma trava é
+    necessária. Quando o buffer está cheio, o frame é descartado e contabilizado em dropped, e o
+    produtor nunca é bloqueado.
+
+    Atributos
+    ----------
+        capacity : quantidade máxima de frames no buffer
+        dropped : total de frames descartados por falta de espaço
+    '''
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.dropped = 0
+
+        self._slots = [None] * capacity
+        self._head = 0 # próxima posição escrita (produtor)
+        self._tail = 0 # próxima posição lida (consumidor)
+
+    def __len__(self):
+        return self._head - self._tail
+
+    def put(self, item):
+        '''
+        Armazena o item sem bloquear. Retorna False caso o buffer esteja cheio.
+        '''
+
+        if self._head - self._tail >= self.capacity:
+            self.dropped += 1
+            return False
+
+        self._slots[self._head % self.capacity] = item
+        self._head += 1
+
+        return True
+
+    def get(self):
+        '''
+        Retorna o item mais antigo ou None caso o buffer esteja vazio.
+        '''
+
+        if self._tail == self._head:
+            return None
+
+        index = self._tail % self.capacity
+        item, self._slots[index] = self._slots[index], None
+        self._tail += 1
+
+        return item
+
+
+class CaptureThread(threading.Thread):
+    '''
+    Classe responsável pela leitura da webcam em uma thread dedicada.
+
+    Cada frame lido é enviado ao buffer circular com o instante de captura e a quantidade de frames
+    descartados até então. O frame mais recente também fica disponível em latest para a pré-visualização.
+    Após uma leitura que falhou, a thread aguarda retry_seconds antes de tentar novamente e, após
+    max_failures falhas consecutivas (câmera desconectada), encerra a captura. Se informada, a função
+    on_frame recebe cada frame lido (por exemplo, para a inferência ao vivo) e não deve bloquear.
+
+    Atributos
+    ----------
+        webcam : objeto cv2.VideoCapture
+        ring : instância de FrameRing
+        retry_seconds : espera após uma leitura que falhou
+        max_failures : quantidade de falhas consecutivas que encerra a captura
+        on_frame : função opcional chamada com cada frame lido
+        captured : total de frames lidos
+        failed : total de leituras que falharam
+        latest : tupla (índice, frame) do frame mais recente
+    '''
+
+    def __init__(self, webcam, ring, retry_seconds=0.1, max_failures=50, on_frame=None):
+        super().__init__(daemon=True)
+
+        self.webcam = webcam
+        self.ring = ring
+        self.retry_seconds = retry_seconds
+        self.max_failures = max_failures
+        self.on_frame = on_frame
+        self.captured = 0
+        self.failed = 0
+        self.latest = None
+
+        self._running = True
+
+    def run(self):
+        consecutive_failures = 0
+
+        while self._running:
+            ret, frame = self.webcam.read()
+            timestamp = datetime.datetime.now()
+
+            if not ret:
+                self.failed += 1
+                consecutive_failures += 1
+
+                if consecutive_failures == 1:
+                    print("A leitura do frame falhou!")
+
+                if consecutive_failures >= self.max_failures:
+                    print(f"{consecutive_failures} leituras consecutivas falharam, encerrando a captura!")
+                    break
+
+                # evita ocupar um núcleo inteiro enquanto a câmera não responde
+                time.sleep(self.retry_seconds)
+                continue
+
+            if consecutive_failures > 0:
+                print(f"Leitura restabelecida após {consecutive_failures} falha(s)")
+                consecutive_failures = 0
+
+            self.latest = (self.captured, frame)
+            self.captured += 1
+            self.ring.put((frame, timestamp, self.ring.dropped))
+
+            if self.on_frame is not None:
+                self.on_frame(frame)
+
+    def stop(self):
+        self._running = False
+        self.join()
+
+
+class SegmentRotator():
+    '''
+    Classe responsável por gravar os frames em segmentos de duração fixa, sem perder frames na troca.
+
+    O gravador do próximo segmento é aberto com antecedência, logo após o início do segmento atual,
+    de modo que a troca consiste apenas em substituir um objeto pelo outro. Para cada segmento, é
+    salvo um arquivo CSV com o instante de captura de cada frame e os frames descartados antes dele.
+    Quando o gravador informa que descartou o frame (write retorna False, como em EncodedSegment),
+    nenhuma linha é escrita e o descarte é somado ao próximo frame gravado, mantendo o CSV alinhado ao vídeo.
+
+    Atributos
+    ----------
+        file_path : pasta onde as gravações serão armazenadas
+        file_name_template : padrão do nome dos arquivos, preenchido com o timestamp do início do segmento
+        segment_seconds : duração de cada segmento
+        amount_of_segments : quantidade de segmentos gravados
+        writer_factory : função que recebe o nome do arquivo e retorna um objeto com write e release
+        segments : lista com as estatísticas de cada segmento finalizado
+        finished : indica se todos os segmentos foram gravados
+    '''
+
+    def __init__(self,
+                 file_path,
+                 file_name_template,
+                 codec,
+                 fps,
+                 resolution,
+                 segment_seconds=5*60,
+                 amount_of_segments=12,
+                 writer_factory=None):
+
+        self.file_path = file_path
+        self.file_name_template = file_name_template
+        self.segment_seconds = segment_seconds
+        self.amount_of_segments = amount_of_segments
+        self.writer_factory = writer_factory or (lambda file_name: cv2.VideoWriter(file_name, codec, fps, resolution))
+        self.segments = []
+        self.finished = False
+
+        self._current = None
+        self._next = None
+        self._started = 0
+
+    def _open(self, start_time):
+        file_name = self.file_path + self.file_name_template.format(
+            start_time.day, start_time.month, start_time.year,
+            start_time.hour, start_time.minute, start_time.second
+        )
+
+        timestamps_file = open(os.path.splitext(file_name)[0] + '.csv', 'w', newline='')
+        timestamps = csv.writer(timestamps_file)
+        timestamps.writerow(['frame', 'timestamp', 'dropped_before'])
+
+        self._started += 1
+
+        return {
+            'file': file_name,
+            'start': start_time,
+            'end': start_time + datetime.timedelta(seconds=self.segment_seconds),
+            'writer': self.writer_factory(file_name),
+            'timestamps_file': timestamps_file,
+            'timestamps': timestamps,
+            'frames': 0,
+            'dropped': 0,
+            'last_dropped': None,
+            'unrecorded': 0, # descartes ainda não registrados no CSV
+        }
+
+    def _close(self, segment):
+        segment['writer'].release()
+        segment['timestamps_file'].close()
+
+        self.segments.append({
+            'file': segment['file'],
+            'frames': segment['frames'],
+            'dropped': segment['dropped'],
+        })
+
+    def _rotate(self):
+        finished, self._current, self._next = self._current, self._next, None
+
+        # o último frame do segmento anterior define os descartes a partir do novo segmento
+        if self._current is not None:
+            self._current['last_dropped'] = finished['last_dropped']
+
+        self._close(finished)
+
+        if self._current is None:
+            self.finished = True
+            return
+
+        # abre o próximo gravador enquanto o atual ainda tem todo o segmento pela frente
+        if self._started < self.amount_of_segments:
+            self._next = self._open(self._current['end'])
+
+    def process(self, frame, timestamp, dropped=0):
+        '''
+        Grava o frame no segmento correspondente ao instante de captura.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+            timestamp : instante da captura (datetime)
+            dropped : total acumulado de frames descartados até a captura deste frame
+        '''
+
+        if self.finished:
+            return
+
+        if self._current is None:
+            self._current = self._open(timestamp)
+
+            if self._started < self.amount_of_segments:
+                self._next = self._open(self._current['end'])
+
+        while timestamp >= self._current['end']:
+            self._rotate()
+
+            if self.finished:
+                return
+
+        segment = self._current
+        dropped_before = dropped - segment['last_dropped'] if segment['last_dropped'] is not None else 0
+        segment['last_dropped'] = dropped
+        segment['dropped'] += dropped_before
+        segment['unrecorded'] += dropped_before
+
+        if segment['writer'].write(frame) is False:
+            # o frame não foi gravado (cv2.VideoWriter retorna None, e não False)
+            segment['dropped'] += 1
+            segment['unrecorded'] += 1
+            return
+
+        segment['timestamps'].writerow([segment['frames'], timestamp.isoformat(), segment['unrecorded']])
+        segment['unrecorded'] = 0
+        segment['frames'] += 1
+
+    def close(self):
+        '''
+        Encerra o segmento em gravação e remove o próximo, caso já tenha sido aberto sem receber frames.
+        '''
+
+        if self._current is not None:
+            self._close(self._current)
+            self._current = None
+
+        if self._next is not None:
+            self._next['writer'].release()
+            self._next['timestamps_file'].close()
+
+            for file_name in (self._next['file'], os.path.splitext(self._next['file'])[0] + '.csv'):
+                try:
+                    os.remove(file_name)
+                except OSError:
+                    # o arquivo pode não existir ou ainda estar sendo liberado por outro processo
+                    pass
+
+            self._next = None
+
+        self.finished = True
+
+
+class WriterThread(threading.Thread):
+    '''
+    Classe responsável por consumir o buffer circular e entregar os frames ao gravador em uma thread
+    separada da captura e da pré-visualização.
+
+    Atributos
+    ----------
+        ring : instância de FrameRing
+        sink : objeto com o método process(frame, timestamp, dropped), como SegmentRotator
+        written : total de frames entregues ao gravador
+        last_error : mensagem da falha que encerrou a gravação (None se não houve falha)
+    '''
+
+    def __init__(self, ring, sink, idle_seconds=0.005):
+        super().__init__(daemon=True)
+
+        self.ring = ring
+        self.sink = sink
+        self.idle_seconds = idle_seconds
+        self.written = 0
+        self.last_error = None
+
+        self._running = True
+
+    def run(self):
+        # ao encerrar, os frames ainda no buffer são gravados antes de sair
+        while self._running or len(self.ring) > 0:
+            item = self.ring.get()
+
+            if item is None:
+                time.sleep(self.idle_seconds)
+                continue
+
+            try:
+                self.sink.process(*item)
+            except Exception as error:
+                # a thread encerra, e quem a iniciou percebe a falha por is_alive e last_error
+                self.last_error = f'{type(error).__name__}: {error}'
+                print(f'Falha na gravação: {self.last_error}')
+                return
+
+            self.written += 1
+
+    def stop(self):
+        self._running = False
+        self.join()
@@ -0,0 +1,205 @@
+import collections
+import datetime
+import json
+import os
+import sys
+
+import cv2
+
+# permite importar o pacote project_utils, localizado em codigos_de_desenvolvimento
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'codigos_de_desenvolvimento'))
+
+
+class MotionPresence():
+    '''
+    Classe responsável por indicar a presença de pássaros por meio de movimento na cena,
+    comparando cada frame com um modelo de fundo (MotionGate de project_utils).
+
+    Atributos
+    ----------
+        gate : instância de MotionGate
+        min_changed_fraction : fração mínima de pixels alterados para considerar que há pássaros
+    '''
+
+    def __init__(self, min_changed_fraction=0.005, **gate_kwargs):
+        from project_utils.motion_gate import MotionGate
+
+        self.gate = MotionGate(**gate_kwargs)
+        self.min_changed_fraction = min_changed_fraction
+        self._first = True
+
+    def __call__(self, frame):
+        changed = self.gate.changed_fraction(frame)
+
+        # o primeiro frame apenas inicializa o modelo de fundo
+        if self._first:
+            self._first = False
+            return False, set()
+
+        return changed >= self.min_changed_fraction, set()
+
+
+class DetectorPresence():
+    '''
+    Classe responsável por indicar a presença de pássaros a partir das detecções mais recentes de um
+    RealTimeDetector, que roda em outra thread. Além da presença, retorna as espécies detectadas.
+
+    Atributos
+    ----------
+        detector : instância de RealTimeDetector já iniciada
+    '''
+
+    def __init__(self, detector):
+        self.detector = detector
+        self._frame_index = 0
+
+    def __call__(self, frame):
+        self.detector.submit(self._frame_index, frame)
+        self._frame_index += 1
+
+        latest = self.detector.latest()
+
+        if latest is None:
+            return False, set()
+
+        labels = set(latest[1]['detection']['labels'])
+
+        return len(labels) > 0, labels
+
+
+class TriggeredRecorder():
+    '''
+    Classe responsável por gravar apenas os trechos em que há pássaros na cena.
+
+    Os frames mais recentes ficam em um buffer circular com pre_roll_seconds de duração. Quando a
+    verificação de presença indica pássaros, um novo arquivo é aberto, o buffer é gravado (pre-roll) e
+    os frames seguintes passam a ser gravados. O arquivo é fechado post_roll_seconds após a última
+    indicação de presença. Cada trecho gravado é registrado no índice de eventos (events.jsonl) com
+    início, fim, arquivo e espécies observadas.
+
+    Atributos
+    ----------
+        output_dir : pasta onde os trechos e o índice de eventos são salvos
+        fps : FPS dos vídeos gravados
+        resolution : resolução (largura, altura) dos frames
+        codec : código FourCC do codec
+        file_name_template : padrão do nome dos arquivos, preenchido com o timestamp do início do trecho
+        writer_factory : função que recebe o nome do arquivo e retorna um objeto com write e release
+        presence : função que recebe um frame e retorna (há pássaros, conjunto de espécies)
+        pre_roll_frames : quantidade de frames gravados antes da primeira indicação de presença
+        post_roll_seconds : tempo gravado após a última indicação de presença
+        events : total de trechos gravados
+    '''
+
+    def __init__(self,
+                 output_dir,
+                 fps,
+                 resolution,
+                 presence,
+                 codec=cv2.VideoWriter_fourcc(*"MJPG"),
+                 pre_roll_seconds=3,
+                 post_roll_seconds=5,
+                 file_name_template="{}-{}-{} {}-{}-{}.avi",
+                 writer_factory=None):
+
+        self.output_dir = output_dir
+        self.fps = fps
+        self.resolution = resolution
+        self.codec = codec
+        self.presence = presence
+        self.pre_roll_frames = int(pre_roll_seconds * fps)
+        self.post_roll_seconds = post_roll_seconds
+        self.file_name_template = file_name_template
+        self.writer_factory = writer_factory or (lambda file_name: cv2.VideoWriter(file_name, codec, fps, resolution))
+        self.events = 0
+
+        self._buffer = collections.deque(maxlen=max(self.pre_roll_frames, 1))
+        self._writer = None
+        self._event = None
+        self._last_present = None
+        self._last_written = None
+
+    def _open(self, start_time):
+        # mesmo padrão de nome das gravações contínuas (timestamp do primeiro frame do trecho)
+        file_name = self.file_name_template.format(
+            start_time.day, start_time.month, start_time.year,
+            start_time.hour, start_time.minute, start_time.second
+        )
+        self._writer = self.writer_factory(os.path.join(self.output_dir, file_name))
+        self._event = {'file': file_name, 'start': start_time.isoformat(), 'species': set(), 'frames': 0}
+
+    def _close(self, end_time):
+        self._writer.release()
+        self._writer = None
+
+        self._event['end'] = end_time.isoformat()
+        self._event['species'] = sorted(self._event['species'])
+        self._event.pop('dropped_at_start', None)
+
+        # o índice é apenas acrescido, um evento por linha
+        with open(os.path.join(self.output_dir, 'events.jsonl'), 'a') as index_file:
+            index_file.write(json.dumps(self._event) + '\n')
+
+        self._event = None
+        self.events += 1
+
+    def _write(self, timestamp, frame):
+        # instante do último frame entregue ao gravador, que define o fim do trecho
+        self._last_written = timestamp
+
+        if self._writer.write(frame) is False:
+            # frame descartado pelo processo de codificação (EncodedSegment)
+            self._event['encoder_dropped'] = self._event.get('encoder_dropped', 0) + 1
+            return
+
+        self._event['frames'] += 1
+
+    def process(self, frame, timestamp=None, dropped=None):
+        '''
+        Processa um frame capturado, gravando-o apenas se fizer parte de um trecho com pássaros.
+
+        Parâmetros
+        ----------
+            frame : frame BGR
+            timestamp : instante da captura (datetime); por padrão, o instante atual
+            dropped : total acumulado de frames descartados na captura, registrado no índice de eventos
+        '''
+
+        timestamp = timestamp or datetime.datetime.now()
+        present, species = self.presence(frame)
+
+        if present:
+            self._last_present = timestamp
+
+        if self._writer is None:
+            if not present:
+                if self.pre_roll_frames > 0:
+                    self._buffer.append((timestamp, frame))
+                return
+
+            # abre o trecho a partir do frame mais antigo do pre-roll
+            start_time = self._buffer[0][0] if self._buffer else timestamp
+            self._open(start_time)
+
+            while self._buffer:
+                self._write(*self._buffer.popleft())
+
+        self._event['species'].update(species)
+
+        if dropped is not None:
+            # descartes ocorridos durante o trecho (a partir do primeiro frame gravado após a abertura)
+            self._event.setdefault('dropped_at_start', dropped)
+            self._event['dropped'] = dropped - self._event['dropped_at_start']
+
+        self._write(timestamp, frame)
+
+        if (timestamp - self._last_present).total_seconds() > self.post_roll_seconds:
+            self._close(timestamp)
+
+    def close(self):
+        '''
+        Encerra o trecho em gravação, caso exista, no instante do último frame gravado.
+        '''
+
+        if self._writer is not None:
+            self._close(self._last_written)
@@ -1,17 +1,25 @@
 from app_utils import *
 
-path = 'species/'
-species = get_dircontent(path)
-
+# deve ser o primeiro comando do Streamlit, antes das funções em cache (que exibem um spinner)
 st.set_page_config(  layout = 'centered' )
 
+path = 'species/'
+# os seletores e os limites do slider são atendidos pelo catálogo, sem acessar a pasta a cada interação
+catalog = get_catalog(path)
+species = catalog.species()
+start_thumbnail_job(path)
+
 selected_species = st.sidebar.selectbox(
      label = 'Espécies: ',
      options = species,
 )
 
+if selected_species is None:
+     st.warning('Nenhuma gravação catalogada na pasta species.')
+     st.stop()
+
 path = path + selected_species + '/'
-dates = get_dircontent(path)
+dates = catalog.dates(selected_species)
 
 selected_date = st.sidebar.selectbox(
      label = 'Datas: ',
@@ -19,7 +27,7 @@ selected_date = st.sidebar.selectbox(
 )
 
 path = path + selected_date + '/'
-files = get_dircontent(path)
+files = catalog.files(selected_species, selected_date)
 
 selected_file = st.sidebar.selectbox(
       label = 'Arquivos: ',
@@ -27,10 +35,44 @@ selected_file = st.sidebar.selectbox(
       key = 'selected_file'
 )
 
+if selected_file is None:
+     # nenhuma gravação catalogada para a espécie e a data selecionadas
+     st.warning('Nenhuma gravação encontrada.')
+     st.stop()
+
 path = path + selected_file
 
-video = get_video(path)
-frame_count = get_frame_count(video)
+recording = catalog.get(selected_species, selected_date, selected_file)
+
+if recording is None:
+     # gravação removida ou ainda não catalogada pela atualização em segundo plano
+     catalog.refresh()
+     recording = catalog.get(selected_species, selected_date, selected_file)
+
+if recording is None:
+     st.warning(f'A gravação {selected_file} não está mais disponível.')
+     st.stop()
+
+frame_count = recording['frame_count']
+
+if frame_count < 2:
+     # o slider e o botão Random precisam de pelo menos dois frames
+     st.warning(f'A gravação {selected_file} não possui frames suficientes para navegação.')
+     st.stop()
+
+show_detections = st.sidebar.checkbox('Mostrar detecções', value=True)
+min_score = st.sidebar.slider('Score mínimo: ', min_value=0.0, max_value=1.0, value=0.5, step=0.05)
+
+# detecções pré-computadas por project_utils.bulk_inference (None caso o vídeo ainda não tenha sido processado)
+detections = load_detections(path, min_score) if show_detections else None
+target_species = None
+
+if detections is not None:
+     selected_target = st.sidebar.selectbox(label='Buscar espécie: ', options=['Qualquer espécie'] + detections.species)
+     target_species = None if selected_target == 'Qualquer espécie' else selected_target
+
+session_id = get_session_id()
+reader = get_frame_reader(path)
 
 selected_frame = st.slider(
     label = 'Frames: ',
@@ -41,12 +83,39 @@ selected_frame = st.slider(
     key="test_slider"
 )
 
-frame = get_frame(video, selected_frame)
-st.image(frame, caption = f'Arquivo {files.index(selected_file) + 1} de {len(files)}')
+frame = reader.read(selected_frame, session_id)
+
+if frame is None:
+     # vídeo truncado ou corrompido (ou ainda em gravação) a partir deste frame
+     st.error(f'Não foi possível decodificar o frame {selected_frame} de {selected_file}.')
+     st.stop()
+
+# decodifica em segundo plano os frames vizinhos e o próximo frame do botão Random
+random_frame = np.random.randint(0, frame_count-1)
+reader.prefetch_neighbours(selected_frame, session_id)
+reader.prefetch([random_frame], session_id)
+shown_frame = draw_detections(frame, detections.predictions_for_frame(selected_frame)) if detections is not None else frame
+st.image(shown_frame, caption = f'Arquivo {files.index(selected_file) + 1} de {len(files)}')
+
+# miniaturas pré-geradas: permitem saltar para uma posição sem abrir o vídeo
+thumbnails = load_thumbnails(path)
+
+if thumbnails is not None and len(thumbnails[0]) > 0:
+     frame_indices, strip = thumbnails
+     window = get_thumbnail_window(frame_indices, selected_frame, size=6)
+
+     for column, i in zip(st.columns(len(window)), window):
+          with column:
+               st.image(strip[i])
+               st.button(f'{frame_indices[i]}', key=f'thumbnail_{i}', on_click=update_slider, kwargs={'value': frame_indices[i]})
+
+     with st.expander('Todas as miniaturas'):
+          st.image(make_contact_sheet(strip), caption=f'Um frame a cada {frame_indices[1] - frame_indices[0] if len(frame_indices) > 1 else 1}')
 
 
 
 placeholder = st.empty()
+show_save_status(placeholder)
 
 c1, c2, c3, c4 = st.columns(4)
 
@@ -55,14 +124,35 @@ with c1:
       st.button('Anterior ⬅️', on_click=update_selected_file, kwargs={'direction':'left', 'value': selected_file, 'files':files})
 
 with c2: 
-     st.button('Random 🎲', on_click= update_slider, kwargs={"value": np.random.randint(0, frame_count-1)})
+     st.button('Random 🎲', on_click= update_slider, kwargs={"value": random_frame})
 
 with c3:
-     save_button = st.button('Salvar 💾', on_click=save_frame , kwargs={'frame':frame, 'placeholder': placeholder})
+     save_button = st.button('Salvar 💾', on_click=save_frame , kwargs={'frame':frame, 'source_video': path, 'frame_index': selected_frame})
 
 with c4: 
      st.button('Próximo ➡️', on_click=update_selected_file, kwargs={'direction':'right', 'value': selected_file, 'files':files})
 
+if detections is not None:
+     # navegação pelos frames com detecções (busca binária nos frames de cada espécie)
+     previous_bird = detections.previous_frame(selected_frame, target_species)
+     next_bird = detections.next_frame(selected_frame, target_species)
+
+     c5, c6 = st.columns(2)
+
+     with c5:
+          st.button('⏪ Pássaro anterior', on_click=update_slider, kwargs={'value': previous_bird}, disabled=previous_bird is None)
+
+     with c6:
+          st.button('Próximo pássaro ⏩', on_click=update_slider, kwargs={'value': next_bird}, disabled=next_bird is None)
+
+
+
+
+with st.sidebar.expander('Métricas'):
+     pool_metrics = get_capture_pool().metrics()
+     st.write(f"VideoCaptures abertos: {pool_metrics['open_handles']}/{pool_metrics['max_handles']} "
+              f"({pool_metrics['sessions']} sessões, ~{pool_metrics['frame_buffer_bytes'] / 2**20:.0f} MB em frames decodificados)")
+     st.write(f"Cache de frames: {get_frame_cache().total_bytes() / 2**20:.0f} MB")
 
 
 
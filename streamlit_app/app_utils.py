@@ -1,50 +1,97 @@
 from PIL import Image
 import streamlit as st
 import numpy as np
-import time
 import cv2
+import bisect
 import os
 
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from capture_pool import CapturePool
+from catalog import Catalog
+from frame_access import FrameCache, FrameReader
+from frame_store import FrameSaver
+from detections import VideoDetections, draw_detections, get_detections_path
+from thumbnails import load_thumbnails, make_contact_sheet, start_background_job
+
 def get_dircontent(path):
     return sorted(os.listdir(path))
 
-@st.cache(hash_funcs={cv2.VideoCapture:id})
-def get_video(path):
-    video = cv2.VideoCapture(path)
-    return video
+@st.cache_resource
+def get_catalog(path):
+    # o catálogo é atualizado uma vez na inicialização e depois em segundo plano
+    catalog = Catalog(path)
+    catalog.refresh()
+    catalog.start_background_refresh(interval=60)
+    return catalog
+
+def is_session_active(session_id):
+    # as sessões encerradas (abas fechadas) deixam de existir no runtime do Streamlit
+    return runtime.exists() and runtime.get_instance().is_active_session(session_id)
+
+@st.cache_resource
+def get_capture_pool():
+    # um único pool por servidor, compartilhado por todas as sessões
+    return CapturePool(max_handles=16, idle_seconds=300, is_session_active=is_session_active)
+
+@st.cache_resource
+def get_frame_cache():
+    return FrameCache(memory_budget_bytes=512 * 2**20)
+
+@st.cache_resource(max_entries=64)
+def get_frame_reader(path):
+    # um leitor por vídeo aberto; os menos usados são descartados (o cache de frames é compartilhado)
+    return FrameReader(path, get_frame_cache(), get_capture_pool())
 
-def get_frame_count(video):
-    frame_count = video.get(cv2.CAP_PROP_FRAME_COUNT)
-    return int(frame_count)
+@st.cache_resource
+def start_thumbnail_job(path):
+    # uma única thread por servidor gera as miniaturas dos vídeos novos ou alterados
+    return start_background_job(path)
 
-def get_frame(video, selected_frame):
-    video.set(cv2.CAP_PROP_POS_FRAMES, selected_frame)
-    _, frame = video.read()
-    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+def get_thumbnail_window(frame_indices, selected_frame, size):
+    # posição da miniatura mais próxima do frame atual e janela de size miniaturas centrada nela
+    position = max(bisect.bisect_right(frame_indices, selected_frame) - 1, 0)
+    start = min(max(position - size // 2, 0), max(len(frame_indices) - size, 0))
+    return range(start, min(start + size, len(frame_indices)))
 
-def save_frame(frame, placeholder): 
-    dataset_path = 'local_dataset/'    
-    txt_file = open(dataset_path + 'index.txt', 'r+')
-        
-    lines = txt_file.readlines()
+@st.cache_resource(max_entries=32)
+def get_video_detections(detections_path, mtime, min_score):
+    # mtime faz parte da chave, para que detecções regeneradas sejam recarregadas
+    return VideoDetections(detections_path, min_score)
 
-    if len(lines) == 0: 
-        last_value = 0
+def load_detections(path, min_score):
+    detections_path = get_detections_path(path)
+    if not os.path.exists(detections_path):
+        return None
+    return get_video_detections(detections_path, os.path.getmtime(detections_path), min_score)
 
-    else:
-        last_value = lines[-1].strip()
+def get_session_id():
+    # identifica a sessão (aba do navegador) dona dos objetos VideoCapture do pool; o mesmo identificador
+    # do runtime, para que o pool feche os objetos quando a sessão for encerrada
+    return get_script_run_ctx().session_id
 
-    next_value = int(last_value) + 1
 
-    image = Image.fromarray(frame)
-    image.save(dataset_path + f'{next_value}.png')
+@st.cache_resource
+def get_frame_saver():
+    return FrameSaver(dataset_path='local_dataset/')
 
-    txt_file.write(f'\n{next_value}')
-    txt_file.close()
+def save_frame(frame, source_video=None, frame_index=None):
+    # o identificador é alocado no banco e a imagem é escrita em segundo plano; a mensagem é exibida
+    # uma única vez, na execução seguinte ao clique
+    frame_id = get_frame_saver().save(frame, source_video, frame_index)
+    st.session_state['save_message'] = f'Salvo! ({frame_id})'
 
-    placeholder.success('Salvo!')
-    time.sleep(0.5)
-    placeholder.text('')
+def show_save_status(placeholder):
+    # mensagem do último salvamento (removida após ser exibida) e novas falhas da escrita em segundo plano
+    saver = get_frame_saver()
+    failed = saver.failed()
+    reported = st.session_state.setdefault('reported_failures', failed)
+    if failed > reported:
+        st.session_state['reported_failures'] = failed
+        placeholder.warning(f'{failed - reported} frame(s) não puderam ser salvos. Última falha: {saver.last_error}')
+    elif 'save_message' in st.session_state:
+        placeholder.success(st.session_state.pop('save_message'))
 
 
 def update_slider(value):
@@ -0,0 +1,196 @@
+import collections
+import contextlib
+import threading
+import time
+
+import cv2
+
+
+class PooledCapture():
+    '''
+    Classe responsável por um objeto cv2.VideoCapture do pool e pela posição atual de leitura.
+
+    Atributos
+    ----------
+        session_id : identificador da sessão dona do objeto
+        path : caminho do vídeo
+        video : objeto cv2.VideoCapture (None enquanto o vídeo é aberto)
+        position : índice do próximo frame lido (-1 quando desconhecido)
+        frame_bytes : memória ocupada por um frame decodificado (BGR)
+        last_used : instante do último uso
+        in_use : indica se o objeto está emprestado
+    '''
+
+    def __init__(self, session_id, path):
+        self.session_id = session_id
+        self.path = path
+        self.video = None
+        self.position = 0
+        self.frame_bytes = 0
+        self.last_used = time.monotonic()
+        self.in_use = False
+
+    def open(self):
+        self.video = cv2.VideoCapture(self.path)
+        self.frame_bytes = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH)) * int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT)) * 3
+
+
+class CapturePool():
+    '''
+    Classe responsável por limitar os objetos cv2.VideoCapture abertos pelo app.
+
+    Cada sessão (aba do navegador) possui seus próprios objetos, identificados por (sessão, vídeo), de modo
+    que sessões diferentes nunca disputam a posição de leitura de um mesmo objeto. Um objeto é emprestado
+    a uma única thread por vez (lease). Quando o limite de objetos abertos é atingido, o objeto livre usado
+    há mais tempo é fechado; se todos estiverem emprestados, a thread aguarda. A vaga é reservada com a
+    trava adquirida, mas o vídeo é aberto fora dela, para que uma abertura lenta não bloqueie as outras sessões.
+
+    Uma thread em segundo plano fecha os objetos sem uso por idle_seconds e todos os objetos das sessões
+    encerradas (segundo is_session_active) ou sem nenhuma leitura há idle_seconds.
+
+    Atributos
+    ----------
+        max_handles : quantidade máxima de objetos abertos
+        idle_seconds : tempo sem uso após o qual um objeto é fechado
+        is_session_active : função que recebe o identificador da sessão e indica se ela ainda existe (opcional)
+        opened : total de objetos abertos
+        evicted : total de objetos fechados por limite ou inatividade
+    '''
+
+    def __init__(self, max_handles=16, idle_seconds=300, is_session_active=None):
+        self.max_handles = max_handles
+        self.idle_seconds = idle_seconds
+        self.is_session_active = is_session_active
+        self.opened = 0
+        self.evicted = 0
+
+        self._captures = collections.OrderedDict()
+        self._condition = threading.Condition()
+
+        self._janitor = threading.Thread(target=self._evict_idle_forever, daemon=True)
+        self._janitor.start()
+
+    def _close(self, key):
+        # deve ser chamado com self._condition adquirido
+        capture = self._captures.pop(key)
+
+        if capture.video is not None:
+            capture.video.release()
+
+        self.evicted += 1
+        self._condition.notify_all()
+
+    def _evict_lru(self):
+        # deve ser chamado com self._condition adquirido; retorna False se todos estiverem emprestados
+        for key, capture in self._captures.items():
+            if not capture.in_use:
+                self._close(key)
+                return True
+
+        return False
+
+    def evict_idle(self):
+        '''
+        Fecha os objetos livres que não são usados há mais de idle_seconds e os objetos das sessões
+        encerradas ou inativas.
+        '''
+
+        now = time.monotonic()
+
+        with self._condition:
+            idle = [key for key, capture in self._captures.items()
+                    if not capture.in_use and now - capture.last_used > self.idle_seconds]
+
+            for key in idle:
+                self._close(key)
+
+            last_used = {}
+
+            for capture in self._captures.values():
+                last_used[capture.session_id] = max(last_used.get(capture.session_id, 0), capture.last_used)
+
+        for session_id, session_last_used in last_used.items():
+            if now - session_last_used > self.idle_seconds or (
+                    self.is_session_active is not None and not self.is_session_active(session_id)):
+                self.release_session(session_id)
+
+    def _evict_idle_forever(self):
+        while True:
+            time.sleep(max(self.idle_seconds / 4, 1))
+            self.evict_idle()
+
+    @contextlib.contextmanager
+    def lease(self, session_id, path):
+        '''
+        Empresta o objeto PooledCapture da sessão para o vídeo, abrindo-o se necessário.
+        '''
+
+        key = (session_id, path)
+        opening = False
+
+        with self._condition:
+            while True:
+                capture = self._captures.get(key)
+
+                if capture is not None and not capture.in_use:
+                    break
+
+                if capture is None and (len(self._captures) < self.max_handles or self._evict_lru()):
+                    # reserva a vaga; o vídeo é aberto após liberar a trava
+                    capture = self._captures[key] = PooledCapture(session_id, path)
+                    opening = True
+                    break
+
+                self._condition.wait()
+
+            capture.in_use = True
+            self._captures.move_to_end(key)
+
+        if opening:
+            try:
+                capture.open()
+            except BaseException:
+                with self._condition:
+                    self._captures.pop(key, None)
+                    self._condition.notify_all()
+                raise
+
+            with self._condition:
+                self.opened += 1
+
+        try:
+            yield capture
+
+        finally:
+            with self._condition:
+                capture.in_use = False
+                capture.last_used = time.monotonic()
+                self._condition.notify_all()
+
+    def release_session(self, session_id):
+        '''
+        Fecha todos os objetos livres da sessão.
+        '''
+
+        with self._condition:
+            for key in [key for key, capture in self._captures.items()
+                        if capture.session_id == session_id and not capture.in_use]:
+                self._close(key)
+
+    def metrics(self):
+        '''
+        Retorna um dicionário com os objetos abertos, as sessões ativas e a memória estimada dos frames decodificados.
+        '''
+
+        with self._condition:
+            captures = list(self._captures.values())
+
+            return {
+                'open_handles': len(captures),
+                'max_handles': self.max_handles,
+                'in_use': sum(capture.in_use for capture in captures),
+                'sessions': len({capture.session_id for capture in captures}),
+                'opened': self.opened,
+                'evicted': self.evicted,
+                'frame_buffer_bytes': sum(capture.frame_bytes for capture in captures),
+            }
@@ -0,0 +1,206 @@
+'''
+Catálogo persistente das gravações da pasta species (espécie/data/arquivo) e de seus metadados.
+
+Exemplo de uso (a partir da pasta streamlit_app):
+
+    python catalog.py species/
+
+Apenas os vídeos novos ou alterados (tamanho ou data de modificação) desde a última atualização são abertos.
+'''
+
+import argparse
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.sqlite')
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv', '.mov')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS recordings (
+    species TEXT,
+    date TEXT,
+    file TEXT,
+    size INTEGER,
+    mtime REAL,
+    fps REAL,
+    frame_count INTEGER,
+    duration REAL,
+    width INTEGER,
+    height INTEGER,
+    PRIMARY KEY (species, date, file)
+)
+'''
+
+
+def read_video_metadata(path):
+    '''
+    Função responsável por ler o FPS, a quantidade de frames, a duração e a resolução de um vídeo.
+    '''
+
+    video = cv2.VideoCapture(path)
+    fps = video.get(cv2.CAP_PROP_FPS)
+    frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    video.release()
+
+    return {
+        'fps': fps,
+        'frame_count': frame_count,
+        'duration': frame_count / fps if fps > 0 else 0.0,
+        'width': width,
+        'height': height,
+    }
+
+
+class Catalog():
+    '''
+    Classe responsável pelo catálogo das gravações, salvo em um banco SQLite.
+
+    A atualização percorre a árvore espécie/data/arquivo apenas com os metadados do sistema de arquivos e
+    abre somente os vídeos novos ou cujo tamanho ou data de modificação mudaram; os vídeos removidos saem
+    do catálogo. As consultas do app (espécies, datas, arquivos e metadados) são atendidas pelo banco,
+    sem acessar a pasta das gravações.
+
+    Atributos
+    ----------
+        root : pasta species
+        db_path : caminho do banco SQLite
+        refreshed_at : instante da última atualização
+    '''
+
+    def __init__(self, root, db_path=CATALOG_PATH):
+        self.root = root
+        self.db_path = db_path
+        self.refreshed_at = None
+
+        self._refresh_lock = threading.Lock()
+
+        with self._connect() as connection:
+            connection.execute(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # confirma a transação ao final do bloco e sempre fecha a conexão
+        with contextlib.closing(sqlite3.connect(self.db_path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def _scan(self):
+        files = {}
+
+        for species in os.scandir(self.root):
+            if not species.is_dir():
+                continue
+
+            for date in os.scandir(species.path):
+                if not date.is_dir():
+                    continue
+
+                for entry in os.scandir(date.path):
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                        stat = entry.stat()
+                        files[(species.name, date.name, entry.name)] = (entry.path, stat.st_size, stat.st_mtime)
+
+        return files
+
+    def refresh(self):
+        '''
+        Atualiza o catálogo com as gravações novas, alteradas ou removidas.
+
+        Retorno
+        ----------
+            Tupla (quantidade de vídeos lidos, quantidade de vídeos removidos do catálogo)
+        '''
+
+        with self._refresh_lock:
+            files = self._scan()
+
+            with self._connect() as connection:
+                known = {
+                    (species, date, file): (size, mtime)
+                    for species, date, file, size, mtime in connection.execute('SELECT species, date, file, size, mtime FROM recordings')
+                }
+
+            changed = [key for key, (_, size, mtime) in files.items() if known.get(key) != (size, mtime)]
+            removed = [key for key in known if key not in files]
+
+            rows = []
+
+            for key in changed:
+                path, size, mtime = files[key]
+                metadata = read_video_metadata(path)
+                rows.append(key + (size, mtime, metadata['fps'], metadata['frame_count'],
+                                   metadata['duration'], metadata['width'], metadata['height']))
+
+            with self._connect() as connection:
+                connection.executemany('INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                connection.executemany('DELETE FROM recordings WHERE species = ? AND date = ? AND file = ?', removed)
+
+            self.refreshed_at = time.time()
+
+            return len(rows), len(removed)
+
+    def species(self):
+        with self._connect() as connection:
+            return [row[0] for row in connection.execute('SELECT DISTINCT species FROM recordings ORDER BY species')]
+
+    def dates(self, species):
+        with self._connect() as connection:
+            return [row[0] for row in connection.execute(
+                'SELECT DISTINCT date FROM recordings WHERE species = ? ORDER BY date', (species,))]
+
+    def files(self, species, date):
+        with self._connect() as connection:
+            return [row[0] for row in connection.execute(
+                'SELECT file FROM recordings WHERE species = ? AND date = ? ORDER BY file', (species, date))]
+
+    def get(self, species, date, file):
+        '''
+        Retorna o dicionário com os metadados da gravação ou None.
+        '''
+
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute(
+                'SELECT * FROM recordings WHERE species = ? AND date = ? AND file = ?', (species, date, file)).fetchone()
+
+        return dict(row) if row is not None else None
+
+    def start_background_refresh(self, interval=60):
+        '''
+        Inicia uma thread que atualiza o catálogo a cada interval segundos.
+        '''
+
+        def run():
+            while True:
+                time.sleep(interval)
+
+                try:
+                    self.refresh()
+                except (OSError, sqlite3.Error) as error:
+                    # uma falha de leitura não interrompe as próximas atualizações
+                    print(f'Falha ao atualizar o catálogo: {error}')
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Atualiza o catálogo das gravações.')
+    parser.add_argument('root', help='pasta com a estrutura espécie/data/arquivo')
+    args = parser.parse_args()
+
+    read, removed = Catalog(args.root).refresh()
+    print(f'{read} vídeos lidos, {removed} removidos do catálogo')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import collections
+import os
+import sys
+
+import cv2
+import numpy as np
+
+# permite importar o pacote project_utils, localizado em codigos_de_desenvolvimento
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigos_de_desenvolvimento'))
+
+from project_utils.draw_detections import OverlayRenderer
+
+DETECTIONS_DIR = 'detections/'
+
+# classe de fundo do class_map da IceVision, que nunca corresponde a uma detecção
+BACKGROUND = 'background'
+
+Box = collections.namedtuple('Box', ['xyxy'])
+
+
+def get_detections_path(video_path, species_path='species/', detections_dir=DETECTIONS_DIR):
+    '''
+    Retorna o caminho das detecções de um vídeo, no mesmo formato gerado por project_utils.bulk_inference
+    (detections/<espécie>/<data>/<arquivo>.npz).
+    '''
+
+    return os.path.join(detections_dir, os.path.relpath(video_path, species_path) + '.npz')
+
+
+class VideoDetections():
+    '''
+    Classe responsável pela leitura das detecções de um vídeo salvas por DetectionWriter (project_utils.detection_store),
+    apenas com numpy, sem carregar o modelo.
+
+    Além das colunas, são mantidos os frames com detecções de cada classe em arrays ordenados e sem repetição,
+    de modo que a busca pelo próximo (ou anterior) frame com uma espécie é uma busca binária.
+
+    Atributos
+    ----------
+        classes : lista com os nomes das classes
+        species : classes que podem ser buscadas (todas, exceto a de fundo)
+        num_frames : total de frames do vídeo
+        frame, label_id, score, xyxy : colunas das detecções, ordenadas por frame
+        frames_per_class : dicionário com os frames que possuem detecções de cada classe
+        frames_any : frames com detecções de qualquer classe
+    '''
+
+    def __init__(self, path, min_score=0.0):
+        with np.load(path) as store:
+            self.classes = [str(label) for label in store['classes']]
+            self.num_frames = int(store['num_frames'])
+            self.frame = store['frame']
+            self.label_id = store['label_id']
+            self.score = store['score']
+            self.xyxy = store['xyxy']
+
+        self.species = [label for label in self.classes if label != BACKGROUND]
+
+        # as detecções abaixo do score mínimo são ignoradas também na navegação
+        keep = self.score >= min_score
+        frames = self.frame[keep]
+        label_ids = self.label_id[keep]
+
+        self.frames_per_class = {label: np.unique(frames[label_ids == label_id]) for label_id, label in enumerate(self.classes)}
+        self.frames_any = np.unique(frames)
+        self.min_score = min_score
+
+    def _frames(self, label=None):
+        return self.frames_any if label is None else self.frames_per_class.get(label, self.frames_any[:0])
+
+    def next_frame(self, frame_index, label=None):
+        '''
+        Retorna o primeiro frame após frame_index com detecções da classe (ou de qualquer classe), ou None.
+        '''
+
+        frames = self._frames(label)
+        position = np.searchsorted(frames, frame_index, side='right')
+
+        return int(frames[position]) if position < len(frames) else None
+
+    def previous_frame(self, frame_index, label=None):
+        '''
+        Retorna o último frame antes de frame_index com detecções da classe (ou de qualquer classe), ou None.
+        '''
+
+        frames = self._frames(label)
+        position = np.searchsorted(frames, frame_index, side='left')
+
+        return int(frames[position - 1]) if position > 0 else None
+
+    def predictions_for_frame(self, frame_index):
+        '''
+        Retorna o dicionário de predições do frame, na estrutura consumida por OverlayRenderer.
+        '''
+
+        start = np.searchsorted(self.frame, frame_index, side='left')
+        end = np.searchsorted(self.frame, frame_index, side='right')
+        rows = [row for row in range(start, end) if self.score[row] >= self.min_score]
+
+        return {
+            'detection': {
+                'bboxes': [Box(self.xyxy[row].tolist()) for row in rows],
+                'labels': [self.classes[self.label_id[row]] for row in rows],
+                'scores': self.score[rows],
+            }
+        }
+
+
+_renderer = None
+
+
+def draw_detections(frame, predictions):
+    '''
+    Retorna uma cópia do frame RGB com as detecções desenhadas (o frame original, salvo pelo app, não é alterado).
+    '''
+
+    global _renderer
+
+    if _renderer is None:
+        _renderer = OverlayRenderer()
+
+    # o renderer trabalha com frames BGR, como a OpenCV
+    canvas = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+    _renderer.draw(canvas, predictions)
+
+    return cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
@@ -0,0 +1,290 @@
+import bisect
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+
+import cv2
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frame_index')
+INDEX_VERSION = 2 # incrementado quando a numeração dos frames muda, para que os índices antigos sejam refeitos
+
+
+def get_fourcc(video):
+    fourcc = int(video.get(cv2.CAP_PROP_FOURCC))
+    return ''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def scan_keyframes(path):
+    '''
+    Função responsável por listar os índices dos keyframes de um vídeo.
+
+    Com o PyAV instalado, os pacotes do vídeo são lidos sem decodificação. Os pacotes chegam na ordem de
+    decodificação, que difere da ordem de exibição em vídeos com B-frames; por isso, os frames são numerados
+    pela ordem de seus PTS, a mesma em que a OpenCV retorna os frames decodificados. Sem o PyAV, apenas
+    vídeos MJPG são indexados, pois neles todo frame é um keyframe.
+
+    Retorno
+    ----------
+        Tupla (keyframes, quantidade de frames); keyframes é None quando o vídeo não pôde ser indexado
+    '''
+
+    try:
+        import av
+    except ImportError:
+        av = None
+
+    if av is not None:
+        with av.open(path) as container:
+            stream = container.streams.video[0]
+            packets = []
+
+            for packet in container.demux(stream):
+                # o último pacote do demux é vazio e apenas sinaliza o fim do stream
+                if packet.size == 0:
+                    continue
+
+                packets.append((packet.pts, packet.is_keyframe))
+
+        if any(pts is None for pts, _ in packets):
+            # sem PTS (comum em AVI), a ordem de decodificação é a única disponível
+            display_order = packets
+        else:
+            display_order = sorted(packets, key=lambda packet: packet[0])
+
+        keyframes = [frame_index for frame_index, (_, is_keyframe) in enumerate(display_order) if is_keyframe]
+
+        return keyframes, len(packets)
+
+    video = cv2.VideoCapture(path)
+    frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    fourcc = get_fourcc(video)
+    video.release()
+
+    if fourcc.upper() == 'MJPG':
+        return list(range(frame_count)), frame_count
+
+    return None, frame_count
+
+
+def load_keyframe_index(path, index_dir=INDEX_DIR):
+    '''
+    Função responsável por carregar o índice de keyframes de um vídeo, criando-o caso não exista
+    ou o vídeo tenha sido alterado desde a sua criação.
+
+    Os índices são salvos em index_dir (e não junto aos vídeos, para não aparecerem nos seletores do app).
+
+    Retorno
+    ----------
+        Dicionário com keyframes (lista ou None) e frame_count
+    '''
+
+    stat = os.stat(path)
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+    index_path = os.path.join(index_dir, key + '.json')
+
+    if os.path.exists(index_path):
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+
+        if index.get('version') == INDEX_VERSION and index['mtime'] == stat.st_mtime and index['size'] == stat.st_size:
+            return index
+
+    keyframes, frame_count = scan_keyframes(path)
+    index = {
+        'version': INDEX_VERSION,
+        'path': os.path.abspath(path),
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'keyframes': keyframes,
+        'frame_count': frame_count,
+    }
+
+    os.makedirs(index_dir, exist_ok=True)
+
+    # escrita atômica, para que outra sessão nunca leia um índice incompleto
+    with open(index_path + '.tmp', 'w') as index_file:
+        json.dump(index, index_file)
+    os.replace(index_path + '.tmp', index_path)
+
+    return index
+
+
+class FrameCache():
+    '''
+    Classe responsável por manter em memória os frames decodificados (RGB) de todos os vídeos,
+    descartando os usados há mais tempo (LRU) quando a memória ocupada ultrapassa o orçamento.
+
+    Atributos
+    ----------
+        memory_budget_bytes : memória máxima ocupada pelos frames
+        hits : total de frames encontrados no cache
+        misses : total de frames que precisaram ser decodificados
+    '''
+
+    def __init__(self, memory_budget_bytes=512 * 2**20):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._frames = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+
+            if frame is None:
+                self.misses += 1
+                return None
+
+            self._frames.move_to_end(key)
+            self.hits += 1
+
+            return frame
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._frames
+
+    def put(self, key, frame):
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return
+
+            self._frames[key] = frame
+            self._bytes += frame.nbytes
+
+            while self._bytes > self.memory_budget_bytes and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def total_bytes(self):
+        with self._lock:
+            return self._bytes
+
+
+class FrameReader():
+    '''
+    Classe responsável pelo acesso aleatório aos frames de um vídeo.
+
+    Os frames são buscados primeiro no cache, compartilhado por todas as sessões. Caso contrário, um objeto
+    cv2.VideoCapture da sessão é emprestado do pool, posicionado no keyframe anterior ao frame solicitado
+    (ou mantido na posição atual, quando ela já está entre o keyframe e o frame) e decodificado até o frame.
+    Dos frames intermediários, apenas os da janela de prefetch (os prefetch_radius frames anteriores) são
+    convertidos e guardados no cache; os demais são apenas avançados (grab), para que uma busca longa não
+    descarte do cache os vizinhos já decodificados. Após cada leitura, os frames vizinhos podem ser
+    decodificados em segundo plano (prefetch).
+
+    Atributos
+    ----------
+        path : caminho do vídeo
+        cache : instância de FrameCache
+        pool : instância de CapturePool
+        keyframes : índices dos keyframes (None quando o vídeo não pôde ser indexado ou o índice está vazio,
+            caso em que o vídeo é posicionado diretamente no frame, por CAP_PROP_POS_FRAMES)
+        frame_count : quantidade de frames do vídeo
+        prefetch_radius : quantidade de frames vizinhos decodificados em segundo plano, de cada lado
+    '''
+
+    def __init__(self, path, cache, pool, index_dir=INDEX_DIR, prefetch_radius=8):
+        index = load_keyframe_index(path, index_dir)
+
+        self.path = path
+        self.cache = cache
+        self.pool = pool
+        self.keyframes = index['keyframes'] or None
+        self.frame_count = index['frame_count']
+        self.prefetch_radius = prefetch_radius
+
+        self._generations = collections.defaultdict(int)
+
+    def _decode(self, capture, frame_index, keep=()):
+        # decodifica até frame_index; somente ele e os frames em keep são convertidos e guardados no cache
+        if self.keyframes is None:
+            if capture.position != frame_index:
+                capture.video.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+                capture.position = frame_index
+        else:
+            keyframe = self.keyframes[max(bisect.bisect_right(self.keyframes, frame_index) - 1, 0)]
+
+            if not keyframe <= capture.position <= frame_index:
+                capture.video.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+                capture.position = keyframe
+
+        frame = None
+
+        while capture.position <= frame_index:
+            if capture.position == frame_index or capture.position in keep:
+                ret, bgr = capture.video.read()
+
+                if ret:
+                    frame = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+                    self.cache.put((self.path, capture.position), frame)
+            else:
+                ret = capture.video.grab()
+
+            if not ret:
+                # posição desconhecida; a próxima leitura reposiciona o vídeo
+                capture.position = -1
+                return None
+
+            capture.position += 1
+
+        return frame
+
+    def read(self, frame_index, session_id):
+        '''
+        Retorna o frame (RGB) de índice frame_index, ou None caso ele não possa ser decodificado.
+        '''
+
+        # uma nova leitura interrompe o prefetch em andamento da sessão
+        self._generations[session_id] += 1
+
+        frame = self.cache.get((self.path, frame_index))
+
+        if frame is None:
+            with self.pool.lease(session_id, self.path) as capture:
+                frame = self._decode(capture, frame_index, keep=range(frame_index - self.prefetch_radius, frame_index))
+
+        return frame
+
+    def prefetch(self, frame_indices, session_id):
+        '''
+        Decodifica em segundo plano os frames informados que ainda não estão no cache.
+        '''
+
+        generation = self._generations[session_id]
+        frame_indices = [i for i in frame_indices if 0 <= i < self.frame_count]
+        keep = set(frame_indices)
+
+        def run():
+            for frame_index in frame_indices:
+                if generation != self._generations[session_id]:
+                    return
+
+                if (self.path, frame_index) in self.cache:
+                    continue
+
+                # o objeto é emprestado por frame, para que uma leitura nunca aguarde o prefetch inteiro
+                with self.pool.lease(session_id, self.path) as capture:
+                    self._decode(capture, frame_index, keep)
+
+        _prefetch_executor.submit(run)
+
+    def prefetch_neighbours(self, frame_index, session_id):
+        '''
+        Decodifica em segundo plano os prefetch_radius frames seguintes e anteriores a frame_index.
+        '''
+
+        radius = self.prefetch_radius
+
+        # em ordem crescente, para que os vizinhos sejam decodificados a partir de um único keyframe
+        self.prefetch([i for i in range(frame_index - radius, frame_index + radius + 1) if i != frame_index], session_id)
+
+
+_prefetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
@@ -0,0 +1,151 @@
+import concurrent.futures
+import contextlib
+import datetime
+import os
+import sqlite3
+
+from PIL import Image
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS frames (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT,
+    source_video TEXT,
+    frame_index INTEGER,
+    saved_at TEXT,
+    status TEXT
+)
+'''
+
+
+def read_last_index(index_path):
+    '''
+    Retorna o maior identificador registrado no index.txt (empregado antes do banco de dados) ou 0.
+    '''
+
+    if not os.path.exists(index_path):
+        return 0
+
+    with open(index_path) as index_file:
+        values = [int(line) for line in index_file.read().split() if line.strip().isdigit()]
+
+    return max(values, default=0)
+
+
+class FrameSaver():
+    '''
+    Classe responsável por salvar os frames selecionados no app sem bloquear a interface.
+
+    O identificador de cada frame é alocado por um INSERT no banco SQLite (frames.sqlite), em uma transação,
+    de modo que duas sessões (ou dois processos) nunca recebem o mesmo identificador e o custo não depende
+    da quantidade de frames já salvos. A linha registra também o vídeo de origem, o índice do frame e o
+    instante. A codificação da imagem é feita por uma thread em segundo plano; a linha passa de 'pending'
+    para 'saved' quando o arquivo é escrito, ou para 'failed' (com o erro registrado em last_error) caso a
+    escrita falhe.
+
+    Atributos
+    ----------
+        dataset_path : pasta onde os frames são salvos
+        image_format : formato das imagens (png ou jpg)
+        db_path : caminho do banco SQLite
+        last_error : mensagem da última falha de escrita (None se não houve falha)
+    '''
+
+    def __init__(self, dataset_path='local_dataset/', image_format='png', workers=1):
+        self.dataset_path = dataset_path
+        self.image_format = image_format
+        self.db_path = os.path.join(dataset_path, 'frames.sqlite')
+        self.last_error = None
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+        with self._connect() as connection:
+            # a criação e a numeração inicial ocorrem em uma única transação, mesmo com vários processos
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(SCHEMA)
+
+            # continua a numeração do index.txt na primeira execução
+            if connection.execute('SELECT COUNT(*) FROM sqlite_sequence WHERE name = ?', ('frames',)).fetchone()[0] == 0:
+                last_index = read_last_index(os.path.join(dataset_path, 'index.txt'))
+                connection.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', ('frames', last_index))
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # uma conexão por operação, já que as operações ocorrem em threads diferentes; a transação é
+        # confirmada ao final do bloco (with connection) e a conexão é sempre fechada (closing)
+        with contextlib.closing(sqlite3.connect(self.db_path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def save(self, frame, source_video=None, frame_index=None):
+        '''
+        Aloca o identificador do frame e agenda a escrita da imagem, retornando imediatamente.
+
+        Parâmetros
+        ----------
+            frame : frame RGB
+            source_video : caminho do vídeo de origem
+            frame_index : índice do frame no vídeo
+
+        Retorno
+        ----------
+            Identificador do frame, que também é o nome do arquivo
+        '''
+
+        with self._connect() as connection:
+            frame_id = connection.execute(
+                'INSERT INTO frames (source_video, frame_index, saved_at, status) VALUES (?, ?, ?, ?)',
+                (source_video, frame_index, datetime.datetime.now().isoformat(), 'pending')
+            ).lastrowid
+
+            file_name = f'{frame_id}.{self.image_format}'
+            connection.execute('UPDATE frames SET file_name = ? WHERE id = ?', (file_name, frame_id))
+
+        self._executor.submit(self._write, frame_id, file_name, frame)
+
+        return frame_id
+
+    def _write(self, frame_id, file_name, frame):
+        path = os.path.join(self.dataset_path, file_name)
+        temp_path = path + '.tmp'
+
+        try:
+            # escrita atômica: o arquivo só aparece na pasta depois de completo
+            Image.fromarray(frame).save(temp_path, format='JPEG' if self.image_format in ('jpg', 'jpeg') else 'PNG')
+            os.replace(temp_path, path)
+        except Exception as error:
+            # a exceção não chega a nenhuma sessão (a escrita ocorre no executor); é registrada e exibida pelo app
+            self.last_error = f'{file_name}: {error}'
+            print(f'Falha ao salvar o frame {self.last_error}')
+
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            with self._connect() as connection:
+                connection.execute('UPDATE frames SET status = ? WHERE id = ?', ('failed', frame_id))
+            return
+
+        # mantém o index.txt para as ferramentas que o leem (apenas acrescenta, sem ler o arquivo)
+        with open(os.path.join(self.dataset_path, 'index.txt'), 'a') as index_file:
+            index_file.write(f'\n{frame_id}')
+
+        with self._connect() as connection:
+            connection.execute('UPDATE frames SET status = ? WHERE id = ?', ('saved', frame_id))
+
+    def pending(self):
+        '''
+        Retorna a quantidade de frames aguardando a escrita.
+        '''
+
+        return self._count('pending')
+
+    def failed(self):
+        '''
+        Retorna a quantidade de frames cuja escrita falhou.
+        '''
+
+        return self._count('failed')
+
+    def _count(self, status):
+        with self._connect() as connection:
+            return connection.execute('SELECT COUNT(*) FROM frames WHERE status = ?', (status,)).fetchone()[0]
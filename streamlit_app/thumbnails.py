@@ -0,0 +1,272 @@
+'''
+Miniaturas das gravações, amostradas a cada stride frames e salvas como arrays uint8 (.npy) lidos por memmap.
+
+Exemplo de uso (a partir da pasta streamlit_app):
+
+    python thumbnails.py species/ --stride 25 --width 160
+
+Apenas os vídeos novos ou alterados desde a última execução são processados. Com --interval, a pasta é
+verificada novamente a cada intervalo, indefinidamente.
+'''
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+THUMBNAIL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thumbnails')
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv', '.mov')
+
+
+def thumbnail_paths(path, thumbnail_dir=THUMBNAIL_DIR):
+    '''
+    Retorna os caminhos do array de miniaturas e do seu índice para o vídeo.
+    '''
+
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+    return os.path.join(thumbnail_dir, key + '.npy'), os.path.join(thumbnail_dir, key + '.json')
+
+
+def list_videos(root):
+    '''
+    Lista os vídeos da estrutura espécie/data/arquivo.
+    '''
+
+    videos = []
+
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                videos.append(os.path.join(dirpath, name))
+
+    return sorted(videos)
+
+
+def is_up_to_date(path, stride, width, thumbnail_dir=THUMBNAIL_DIR):
+    _, index_path = thumbnail_paths(path, thumbnail_dir)
+
+    if not os.path.exists(index_path):
+        return False
+
+    with open(index_path) as index_file:
+        index = json.load(index_file)
+
+    stat = os.stat(path)
+
+    return (index['mtime'] == stat.st_mtime and index['size'] == stat.st_size
+            and index['stride'] == stride and index['width'] == width)
+
+
+def _resize_npy(path, length, count):
+    # copia as count primeiras miniaturas para um novo arquivo .npy com length linhas, que substitui o anterior
+    source = np.load(path, mmap_mode='r')
+    resized = np.lib.format.open_memmap(path + '.resize', mode='w+', dtype=source.dtype, shape=(length,) + source.shape[1:])
+    resized[:count] = source[:count]
+    resized.flush()
+
+    # os mapeamentos são fechados antes da substituição (exigência do Windows)
+    del source, resized
+    os.replace(path + '.resize', path)
+
+
+def build_thumbnails(path, stride=25, width=160, thumbnail_dir=THUMBNAIL_DIR):
+    '''
+    Função responsável por amostrar um vídeo a cada stride frames e salvar as miniaturas.
+
+    Os frames entre as amostras são apenas avançados (grab), sem conversão. As miniaturas são escritas
+    diretamente em um arquivo .npy (open_memmap) e, junto ao índice, substituem os arquivos anteriores
+    apenas ao final, de modo que o app nunca lê um arquivo incompleto.
+
+    O vídeo é sempre lido até o fim: a quantidade de frames informada pelo container (CAP_PROP_FRAME_COUNT)
+    é apenas uma estimativa, frequentemente menor que a real (ou 0) em arquivos AVI/MJPEG. O arquivo é
+    alocado a partir dessa estimativa, dobrado quando fica cheio e reduzido ao final à quantidade lida.
+
+    Parâmetros
+    ----------
+        path : caminho do vídeo
+        stride : intervalo, em frames, entre as miniaturas
+        width : largura das miniaturas (a altura mantém a proporção do vídeo)
+        thumbnail_dir : pasta onde as miniaturas são salvas
+
+    Retorno
+    ----------
+        Dicionário com o índice das miniaturas
+    '''
+
+    stat = os.stat(path)
+    array_path, index_path = thumbnail_paths(path, thumbnail_dir)
+    os.makedirs(thumbnail_dir, exist_ok=True)
+
+    video = cv2.VideoCapture(path)
+    frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video_width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+    video_height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    height = max(int(round(width * video_height / max(video_width, 1))), 1)
+
+    capacity = max(math.ceil(frame_count / stride), 1)
+    temp_path = array_path + '.tmp'
+    thumbnails = np.lib.format.open_memmap(temp_path, mode='w+', dtype=np.uint8, shape=(capacity, height, width, 3))
+    frame_indices = []
+    frame_index = 0
+
+    while True:
+        if frame_index % stride == 0:
+            ret, frame = video.read()
+
+            if not ret:
+                break
+
+            if len(frame_indices) == capacity:
+                thumbnails.flush()
+                del thumbnails
+                capacity *= 2
+                _resize_npy(temp_path, capacity, len(frame_indices))
+                thumbnails = np.lib.format.open_memmap(temp_path, mode='r+')
+
+            thumbnails[len(frame_indices)] = cv2.cvtColor(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+            frame_indices.append(frame_index)
+
+        elif not video.grab():
+            break
+
+        frame_index += 1
+
+    video.release()
+
+    thumbnails.flush()
+    del thumbnails
+
+    if len(frame_indices) < capacity:
+        # remove as linhas alocadas além das miniaturas lidas (estimativa maior que o vídeo ou arquivo dobrado)
+        _resize_npy(temp_path, len(frame_indices), len(frame_indices))
+
+    index = {
+        'path': os.path.abspath(path),
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'stride': stride,
+        'width': width,
+        # quantidade de frames efetivamente lidos, e não a estimativa do container
+        'frame_count': frame_index,
+        'frame_indices': frame_indices,
+    }
+
+    os.replace(temp_path, array_path)
+
+    with open(index_path + '.tmp', 'w') as index_file:
+        json.dump(index, index_file)
+    os.replace(index_path + '.tmp', index_path)
+
+    return index
+
+
+def update_thumbnails(root, stride=25, width=160, thumbnail_dir=THUMBNAIL_DIR):
+    '''
+    Função responsável por gerar as miniaturas dos vídeos novos ou alterados em root.
+
+    Retorno
+    ----------
+        Lista com os caminhos dos vídeos processados
+    '''
+
+    processed = []
+
+    for path in list_videos(root):
+        if is_up_to_date(path, stride, width, thumbnail_dir):
+            continue
+
+        try:
+            build_thumbnails(path, stride, width, thumbnail_dir)
+            processed.append(path)
+        except (OSError, cv2.error) as error:
+            # um vídeo ainda em cópia ou corrompido não interrompe os demais
+            print(f'Falha ao processar {path}: {error}')
+
+    return processed
+
+
+def load_thumbnails(path, thumbnail_dir=THUMBNAIL_DIR):
+    '''
+    Função responsável por carregar as miniaturas de um vídeo sem abrir o vídeo.
+
+    Retorno
+    ----------
+        Tupla (índices dos frames amostrados, array memmap com as miniaturas) ou None caso as miniaturas
+        ainda não existam ou estejam desatualizadas
+    '''
+
+    array_path, index_path = thumbnail_paths(path, thumbnail_dir)
+
+    if not os.path.exists(index_path):
+        return None
+
+    with open(index_path) as index_file:
+        index = json.load(index_file)
+
+    stat = os.stat(path)
+
+    if index['mtime'] != stat.st_mtime or index['size'] != stat.st_size:
+        return None
+
+    return index['frame_indices'], np.load(array_path, mmap_mode='r')
+
+
+def make_contact_sheet(thumbnails, columns=10):
+    '''
+    Função responsável por organizar as miniaturas em uma única imagem, em linhas de columns miniaturas.
+    '''
+
+    count, height, width, channels = thumbnails.shape
+    rows = max(math.ceil(count / columns), 1)
+
+    sheet = np.zeros((rows * height, columns * width, channels), dtype=np.uint8)
+
+    for i in range(count):
+        row, column = divmod(i, columns)
+        sheet[row * height:(row + 1) * height, column * width:(column + 1) * width] = thumbnails[i]
+
+    return sheet
+
+
+def start_background_job(root, stride=25, width=160, interval=60, thumbnail_dir=THUMBNAIL_DIR):
+    '''
+    Inicia uma thread que atualiza as miniaturas de root a cada interval segundos.
+    '''
+
+    def run():
+        while True:
+            update_thumbnails(root, stride, width, thumbnail_dir)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera as miniaturas das gravações para o navegador de frames.')
+    parser.add_argument('root', help='pasta com a estrutura espécie/data/arquivo')
+    parser.add_argument('--stride', type=int, default=25, help='intervalo, em frames, entre as miniaturas')
+    parser.add_argument('--width', type=int, default=160, help='largura das miniaturas')
+    parser.add_argument('--interval', type=float, default=None, help='se informado, verifica a pasta novamente a cada intervalo (s)')
+    args = parser.parse_args()
+
+    while True:
+        processed = update_thumbnails(args.root, args.stride, args.width)
+        print(f'{len(processed)} vídeos processados')
+
+        if args.interval is None:
+            break
+
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
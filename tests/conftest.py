@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# permite importar o pacote project_utils, os módulos do app e os da captura sem instalação
+sys.path.insert(0, os.path.join(ROOT, 'codigos_de_desenvolvimento'))
+sys.path.insert(0, os.path.join(ROOT, 'streamlit_app'))
+sys.path.insert(0, os.path.join(ROOT, 'dataset', 'dataset_utils'))
@@ -0,0 +1,145 @@
+import concurrent.futures
+import json
+import os
+
+import pytest
+
+from project_utils import bulk_inference
+from project_utils.bulk_inference import (append_manifest, get_pending_recordings, list_recordings, load_manifest,
+                                          model_signature, run_bulk_inference)
+
+
+def write_file(path, content=b'video', mtime=1000000000):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def species(tmp_path):
+    root = tmp_path / 'species'
+    write_file(root / 'sabia' / '2023-01-02' / 'b.avi')
+    write_file(root / 'bem_te_vi' / '2023-01-01' / 'a.mp4')
+    write_file(root / 'bem_te_vi' / '2023-01-01' / 'notes.txt')
+    write_file(root / 'bem_te_vi' / 'loose.avi')
+
+    return root
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    path = tmp_path / 'model.pth'
+    path.write_bytes(b'weights')
+
+    return str(path)
+
+
+def test_list_recordings(species):
+    assert list_recordings(str(species)) == ['bem_te_vi/2023-01-01/a.mp4', 'sabia/2023-01-02/b.avi']
+
+
+def test_manifest_last_entry_wins_and_partial_line_is_ignored(tmp_path):
+    path = str(tmp_path / 'manifest.jsonl')
+    append_manifest(path, {'recording': 'a', 'frames': 1})
+    append_manifest(path, {'recording': 'b', 'frames': 2})
+    append_manifest(path, {'recording': 'a', 'frames': 3})
+
+    with open(path, 'a') as manifest_file:
+        manifest_file.write('{"recording": "b", "fra')
+
+    assert load_manifest(path) == {'a': {'recording': 'a', 'frames': 3}, 'b': {'recording': 'b', 'frames': 2}}
+    assert load_manifest(str(tmp_path / 'missing.jsonl')) == {}
+
+
+def test_pending_uses_size_mtime_and_model(species, checkpoint, monkeypatch):
+    # a seleção não lê o conteúdo dos vídeos
+    monkeypatch.setattr(bulk_inference, 'file_checksum', None)
+
+    model = {'checkpoint_sha256': 'abc', 'threshold': 0.5}
+    recordings = list_recordings(str(species))
+    done = {'size': 5, 'mtime': 1000000000, **model}
+    manifest = {'bem_te_vi/2023-01-01/a.mp4': {'recording': 'bem_te_vi/2023-01-01/a.mp4', **done}}
+
+    assert [p[0] for p in get_pending_recordings(str(species), recordings, manifest, model)] == ['sabia/2023-01-02/b.avi']
+    assert len(get_pending_recordings(str(species), recordings, manifest, {**model, 'threshold': 0.7})) == 2
+    assert len(get_pending_recordings(str(species), recordings, manifest)) == 1
+
+    os.utime(species / 'bem_te_vi' / '2023-01-01' / 'a.mp4', (1000000100, 1000000100))
+    assert len(get_pending_recordings(str(species), recordings, manifest, model)) == 2
+
+
+def test_model_signature(checkpoint):
+    signature = model_signature(checkpoint, 0.5)
+
+    assert signature['threshold'] == 0.5
+    assert len(signature['checkpoint_sha256']) == 64
+
+
+class InlineExecutor(concurrent.futures.ThreadPoolExecutor):
+    # executa as tarefas em threads do próprio processo, sem carregar o modelo
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        super().__init__(max_workers)
+
+
+@pytest.fixture
+def fake_worker(monkeypatch):
+    processed, failing = [], set()
+
+    def process_recording(video_path, output_path, batch_size, output_format):
+        processed.append(os.path.basename(video_path))
+
+        if os.path.basename(video_path) in failing:
+            raise ValueError('vídeo corrompido')
+
+        with open(output_path, 'w') as output_file:
+            output_file.write('detections')
+
+        return 10, 0.5, bulk_inference.file_checksum(video_path)
+
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', InlineExecutor)
+    monkeypatch.setattr(bulk_inference, '_process_recording', process_recording)
+
+    return processed, failing
+
+
+def test_resume_processes_only_new_changed_or_failed(tmp_path, species, checkpoint, fake_worker):
+    processed, failing = fake_worker
+    output_dir = str(tmp_path / 'detections')
+    failing.add('b.avi')
+
+    entries, errors = run_bulk_inference(str(species), checkpoint, output_dir)
+
+    assert [entry['recording'] for entry in entries] == ['bem_te_vi/2023-01-01/a.mp4']
+    assert list(errors) == ['sabia/2023-01-02/b.avi']
+    assert entries[0]['output'] == os.path.join('bem_te_vi', '2023-01-01', 'a.mp4.npz')
+    assert entries[0]['checkpoint'] == 'model.pth'
+    assert os.path.exists(os.path.join(output_dir, entries[0]['output']))
+
+    # a execução seguinte tenta novamente apenas o vídeo com erro
+    failing.clear()
+    processed.clear()
+    entries, errors = run_bulk_inference(str(species), checkpoint, output_dir)
+
+    assert processed == ['b.avi'] and errors == {}
+
+    processed.clear()
+    assert run_bulk_inference(str(species), checkpoint, output_dir) == ([], {})
+    assert processed == []
+
+    write_file(species / 'sabia' / '2023-01-02' / 'b.avi', b'new video', mtime=1000000100)
+    run_bulk_inference(str(species), checkpoint, output_dir)
+    assert processed == ['b.avi']
+
+    with open(os.path.join(output_dir, 'manifest.jsonl')) as manifest_file:
+        assert len([json.loads(line) for line in manifest_file]) == 3
+
+
+def test_threshold_change_reprocesses_everything(tmp_path, species, checkpoint, fake_worker):
+    processed, _ = fake_worker
+    output_dir = str(tmp_path / 'detections')
+
+    run_bulk_inference(str(species), checkpoint, output_dir, detection_threshold=0.5)
+    processed.clear()
+    run_bulk_inference(str(species), checkpoint, output_dir, detection_threshold=0.7)
+
+    assert sorted(processed) == ['a.mp4', 'b.avi']
@@ -0,0 +1,133 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+import capture_pool
+from capture_pool import CapturePool
+
+
+@pytest.fixture
+def videos(tmp_path):
+    paths = []
+
+    for name in ('a', 'b', 'c'):
+        path = str(tmp_path / f'{name}.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (32, 24))
+        writer.write(np.zeros((24, 32, 3), dtype=np.uint8))
+        writer.release()
+        paths.append(path)
+
+    return paths
+
+
+def open_keys(pool):
+    return list(pool._captures)
+
+
+def test_lease_reuses_the_session_capture(videos):
+    pool = CapturePool(max_handles=4)
+
+    with pool.lease('s1', videos[0]) as first:
+        first.position = 1
+        assert first.in_use
+
+    with pool.lease('s1', videos[0]) as second:
+        assert second is first and second.position == 1
+
+    # outra sessão recebe seu próprio objeto para o mesmo vídeo
+    with pool.lease('s2', videos[0]) as other:
+        assert other is not first
+
+    assert pool.metrics()['opened'] == 2
+    assert pool.metrics()['frame_buffer_bytes'] == 2 * 32 * 24 * 3
+
+
+def test_least_recently_used_capture_is_evicted(videos):
+    pool = CapturePool(max_handles=2)
+
+    for path in (videos[0], videos[1], videos[0], videos[2]):
+        with pool.lease('s1', path):
+            pass
+
+    assert open_keys(pool) == [('s1', videos[0]), ('s1', videos[2])]
+    assert pool.evicted == 1
+
+
+def test_lease_waits_while_every_capture_is_in_use(videos):
+    pool = CapturePool(max_handles=2)
+    leased = threading.Event()
+
+    def lease_third():
+        with pool.lease('s2', videos[2]):
+            leased.set()
+
+    with pool.lease('s1', videos[0]):
+        with pool.lease('s1', videos[1]):
+            waiting = threading.Thread(target=lease_third)
+            waiting.start()
+
+            assert not leased.wait(0.2)
+
+        # a liberação de b abre a vaga, e b (livre) é o objeto fechado
+        assert leased.wait(2)
+        waiting.join()
+
+    assert ('s1', videos[1]) not in open_keys(pool)
+    assert ('s1', videos[0]) in open_keys(pool)
+
+
+def test_same_capture_is_leased_to_one_thread_at_a_time(videos):
+    pool = CapturePool(max_handles=2)
+    order = []
+
+    def lease_again():
+        with pool.lease('s1', videos[0]):
+            order.append('second')
+
+    with pool.lease('s1', videos[0]):
+        waiting = threading.Thread(target=lease_again)
+        waiting.start()
+        waiting.join(0.2)
+        order.append('first')
+
+    waiting.join(2)
+
+    assert order == ['first', 'second']
+    assert pool.metrics()['opened'] == 1
+
+
+def test_evict_idle_closes_idle_and_ended_sessions(videos):
+    active = {'s1', 's2', 's3'}
+    pool = CapturePool(max_handles=4, idle_seconds=300, is_session_active=lambda session_id: session_id in active)
+
+    for session_id, path in (('s1', videos[0]), ('s2', videos[1]), ('s3', videos[2])):
+        with pool.lease(session_id, path):
+            pass
+
+    # s1 está sem uso há mais de idle_seconds e s2 foi encerrada; apenas s3 permanece aberta
+    pool._captures[('s1', videos[0])].last_used -= 1000
+    active.discard('s2')
+    pool.evict_idle()
+
+    assert open_keys(pool) == [('s3', videos[2])]
+
+
+def test_failed_open_releases_the_reserved_slot(videos, monkeypatch):
+    pool = CapturePool(max_handles=1)
+
+    def fail(self):
+        raise OSError('falha ao abrir')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(capture_pool.PooledCapture, 'open', fail)
+
+        with pytest.raises(OSError):
+            with pool.lease('s1', videos[0]):
+                pass
+
+    assert open_keys(pool) == []
+
+    with pool.lease('s1', videos[1]) as capture:
+        assert capture.video.isOpened()
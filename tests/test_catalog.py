@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import catalog
+from catalog import Catalog
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    # registra os vídeos abertos, sem decodificar nada
+    paths = []
+
+    def read_video_metadata(path):
+        paths.append(os.path.relpath(path))
+        return {'fps': 10.0, 'frame_count': os.path.getsize(path), 'duration': 1.0, 'width': 640, 'height': 480}
+
+    monkeypatch.setattr(catalog, 'read_video_metadata', read_video_metadata)
+
+    return paths
+
+
+def write_video(root, relative_path, content=b'video', mtime=1000000000):
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+
+    return path
+
+
+def test_refresh_reads_only_new_or_changed_videos(tmp_path, monkeypatch, opened):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / 'species'
+    write_video(root, 'bem_te_vi/2023-01-01/a.avi')
+    write_video(root, 'bem_te_vi/2023-01-01/b.mp4')
+    write_video(root, 'bem_te_vi/2023-01-01/notes.txt')
+
+    recordings = Catalog(str(root), db_path=str(tmp_path / 'catalog.sqlite'))
+
+    assert recordings.refresh() == (2, 0)
+    assert recordings.files('bem_te_vi', '2023-01-01') == ['a.avi', 'b.mp4']
+
+    opened.clear()
+    assert recordings.refresh() == (0, 0)
+    assert opened == []
+
+    write_video(root, 'bem_te_vi/2023-01-01/a.avi', b'longer video', mtime=1000000100)
+    write_video(root, 'sabia/2023-01-02/c.avi')
+    os.remove(root / 'bem_te_vi/2023-01-01/b.mp4')
+
+    assert recordings.refresh() == (2, 1)
+    assert sorted(opened) == [os.path.join('species', 'bem_te_vi', '2023-01-01', 'a.avi'),
+                              os.path.join('species', 'sabia', '2023-01-02', 'c.avi')]
+
+    assert recordings.species() == ['bem_te_vi', 'sabia']
+    assert recordings.files('bem_te_vi', '2023-01-01') == ['a.avi']
+    assert recordings.get('bem_te_vi', '2023-01-01', 'a.avi')['frame_count'] == len(b'longer video')
+    assert recordings.get('bem_te_vi', '2023-01-01', 'b.mp4') is None
+
+
+def test_catalog_persists_between_instances(tmp_path, opened):
+    root = tmp_path / 'species'
+    write_video(root, 'sabia/2023-01-02/c.avi')
+    db_path = str(tmp_path / 'catalog.sqlite')
+
+    Catalog(str(root), db_path=db_path).refresh()
+    opened.clear()
+
+    recordings = Catalog(str(root), db_path=db_path)
+
+    assert recordings.dates('sabia') == ['2023-01-02']
+    assert recordings.refresh() == (0, 0)
+    assert opened == []
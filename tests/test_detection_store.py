@@ -0,0 +1,76 @@
+import numpy as np
+
+from detections import Box, VideoDetections
+from project_utils.detection_store import DetectionStore, DetectionWriter
+
+
+def make_preds(boxes, labels, scores, width=640, height=480):
+    return {
+        'detection': {'bboxes': [Box(box) for box in boxes], 'labels': labels, 'scores': scores},
+        'width': width,
+        'height': height,
+    }
+
+
+def write_store(path):
+    writer = DetectionWriter(fps=10)
+    writer.add(0, make_preds([[10, 20, 30, 40]], ['bird'], [0.9]))
+    writer.add(1, make_preds([], [], []))
+    writer.add(2, make_preds([[1, 2, 3, 4], [5, 6, 7, 8]], ['cat', 'bird'], [0.3, 0.8]))
+    writer.add(3, make_preds([], [], []))
+    writer.save(str(path))
+
+
+def test_store_round_trip(tmp_path):
+    path = tmp_path / 'video.avi.npz'
+    write_store(path)
+
+    store = DetectionStore(str(path))
+
+    assert list(store.classes) == ['bird', 'cat']
+    assert (store.fps, store.width, store.height, store.num_frames) == (10.0, 640, 480, 4)
+    assert store.frame.tolist() == [0, 2, 2]
+    assert store.xyxy.tolist() == [[10, 20, 30, 40], [1, 2, 3, 4], [5, 6, 7, 8]]
+    assert np.allclose(store.timestamp, [0.0, 0.2, 0.2])
+    assert store.rows_for_range(1, 2) == (1, 1)
+    assert store.rows_for_range(2, 3) == (1, 3)
+
+
+def test_app_reader_round_trip(tmp_path):
+    path = tmp_path / 'video.avi.npz'
+    write_store(path)
+
+    detections = VideoDetections(str(path))
+
+    assert detections.num_frames == 4
+    assert detections.next_frame(0) == 2
+    assert detections.next_frame(0, label='cat') == 2
+    assert detections.next_frame(2) is None
+    assert detections.previous_frame(2, label='bird') == 0
+
+    preds = detections.predictions_for_frame(2)['detection']
+    assert [box.xyxy for box in preds['bboxes']] == [[1, 2, 3, 4], [5, 6, 7, 8]]
+    assert preds['labels'] == ['cat', 'bird']
+
+
+def test_app_reader_min_score(tmp_path):
+    path = tmp_path / 'video.avi.npz'
+    write_store(path)
+
+    detections = VideoDetections(str(path), min_score=0.5)
+
+    assert detections.next_frame(0, label='cat') is None
+    assert detections.predictions_for_frame(2)['detection']['labels'] == ['bird']
+
+
+def test_empty_store(tmp_path):
+    path = tmp_path / 'empty.npz'
+    writer = DetectionWriter(fps=10, width=640, height=480)
+    writer.add(4, make_preds([], [], []))
+    writer.save(str(path))
+
+    store = DetectionStore(str(path))
+
+    assert store.num_frames == 5
+    assert store.xyxy.shape == (0, 4)
+    assert VideoDetections(str(path)).next_frame(0) is None
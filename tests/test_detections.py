@@ -0,0 +1,64 @@
+import pytest
+
+from detections import Box, VideoDetections
+from project_utils.detection_store import DetectionWriter
+
+
+def make_preds(boxes, labels, scores):
+    return {'detection': {'bboxes': [Box(box) for box in boxes], 'labels': labels, 'scores': scores}, 'width': 640, 'height': 480}
+
+
+@pytest.fixture
+def detections(tmp_path):
+    # bird nos frames 3, 7 (duas vezes) e 12; cat nos frames 7 e 20; o vídeo possui 25 frames
+    path = tmp_path / 'video.avi.npz'
+    writer = DetectionWriter(fps=10, classes=['background', 'bird', 'cat', 'dog'])
+    writer.add(3, make_preds([[0, 0, 1, 1]], ['bird'], [0.9]))
+    writer.add(7, make_preds([[0, 0, 1, 1], [1, 1, 2, 2], [2, 2, 3, 3]], ['bird', 'cat', 'bird'], [0.9, 0.9, 0.9]))
+    writer.add(12, make_preds([[0, 0, 1, 1]], ['bird'], [0.9]))
+    writer.add(20, make_preds([[0, 0, 1, 1]], ['cat'], [0.9]))
+    writer.add(24, make_preds([], [], []))
+    writer.save(str(path))
+
+    return VideoDetections(str(path))
+
+
+def test_species_excludes_background(detections):
+    assert detections.classes == ['background', 'bird', 'cat', 'dog']
+    assert detections.species == ['bird', 'cat', 'dog']
+
+
+def test_frames_per_class_are_sorted_and_unique(detections):
+    assert detections.frames_per_class['bird'].tolist() == [3, 7, 12]
+    assert detections.frames_per_class['cat'].tolist() == [7, 20]
+    assert detections.frames_any.tolist() == [3, 7, 12, 20]
+
+
+@pytest.mark.parametrize('frame_index, label, expected', [
+    (0, None, 3),
+    (3, None, 7),
+    (7, 'bird', 12),
+    (7, 'cat', 20),
+    (8, 'cat', 20),
+    (12, 'bird', None),
+    (20, None, None),
+    (0, 'dog', None),
+    (0, 'unknown', None),
+])
+def test_next_frame(detections, frame_index, label, expected):
+    assert detections.next_frame(frame_index, label) == expected
+
+
+@pytest.mark.parametrize('frame_index, label, expected', [
+    (24, None, 20),
+    (20, None, 12),
+    (12, 'bird', 7),
+    (20, 'cat', 7),
+    (19, 'cat', 7),
+    (7, 'cat', None),
+    (3, None, None),
+    (24, 'dog', None),
+    (24, 'unknown', None),
+])
+def test_previous_frame(detections, frame_index, label, expected):
+    assert detections.previous_frame(frame_index, label) == expected
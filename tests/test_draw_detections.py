@@ -0,0 +1,70 @@
+import collections
+
+import cv2
+import numpy as np
+import pytest
+
+from project_utils import draw_detections
+from project_utils.draw_detections import OverlayRenderer, draw_bb
+
+Box = collections.namedtuple('Box', ['xyxy'])
+
+
+def legacy_draw_bb(frame, predictions):
+    # implementação original de draw_bb, com cv2.rectangle e cv2.putText para cada detecção
+    detection = predictions['detection']
+
+    for bbox, label, score in zip(detection['bboxes'], detection['labels'], detection['scores']):
+        xmin, ymin, xmax, ymax = bbox.xyxy
+        font_color = (255, 255, 255) if label != 'canario_do_amazonas' else (0, 0, 0)
+
+        text = f'{label} - {score:.2f}'
+        (text_w, text_h), _ = cv2.getTextSize(text, draw_detections.font, draw_detections.font_scale, draw_detections.font_thickness)
+        text_lbc = (xmin + 5, ymin - 5)
+
+        color = draw_detections.color_per_label_rgb[label][::-1]
+        frame = cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), color, draw_detections.bb_thickness)
+        frame = cv2.rectangle(frame, (xmin, text_lbc[1] - text_h - 5), (text_lbc[0] + text_w + 2, ymin), color, -1)
+        frame = cv2.putText(frame, text, text_lbc, draw_detections.font, draw_detections.font_scale, font_color,
+                            draw_detections.font_thickness, draw_detections.line_type)
+
+    return frame
+
+
+def make_preds(boxes, labels, scores):
+    return {'detection': {'bboxes': [Box(box) for box in boxes], 'labels': labels, 'scores': np.array(scores, dtype=np.float32)}}
+
+
+@pytest.mark.parametrize('boxes, labels, scores', [
+    ([(100, 120, 300, 260)], ['chupim'], [0.876]),
+    # rótulo mais largo que a caixa e fonte preta do canário
+    ([(350, 60, 420, 200)], ['canario_do_amazonas'], [0.5]),
+    ([(20, 300, 200, 460), (400, 250, 600, 400), (250, 40, 330, 120)], ['rolinha', 'sanhaco_da_amazonia', 'sanhaco_do_coqueiro'], [0.99, 0.31, 0.07]),
+])
+def test_renderer_matches_legacy_draw_bb(boxes, labels, scores):
+    frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    preds = make_preds(boxes, labels, scores)
+
+    expected = legacy_draw_bb(frame.copy(), preds)
+
+    assert np.array_equal(OverlayRenderer().draw(frame.copy(), preds), expected)
+    assert np.array_equal(draw_bb(frame.copy(), preds), expected)
+
+
+def test_copy_preserves_the_original_frame():
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    preds = make_preds([(50, 60, 150, 160)], ['chupim'], [0.9])
+
+    annotated = OverlayRenderer().draw(frame, preds, copy=True)
+
+    assert not frame.any()
+    assert np.array_equal(annotated, legacy_draw_bb(frame.copy(), preds))
+
+
+def test_labels_are_clipped_at_the_frame_border():
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    # o rótulo ficaria acima do topo do frame
+    OverlayRenderer().draw(frame, make_preds([(300, 5, 319, 100)], ['rolinha'], [0.9]))
+
+    assert frame.any()
@@ -0,0 +1,103 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from encoder_process import EncoderProcess, enforce_disk_budget, template_pattern
+
+TEMPLATE = '{}-{}-{} {}-{}-{}.avi'
+
+
+def make_segment(directory, name, size, mtime, csv=True):
+    path = os.path.join(directory, name)
+
+    with open(path, 'wb') as file:
+        file.write(b'\0' * size)
+    os.utime(path, (mtime, mtime))
+
+    if csv:
+        with open(os.path.splitext(path)[0] + '.csv', 'w') as file:
+            file.write('frame,timestamp,dropped_before\n')
+
+    return path
+
+
+def wait_for_error(encoder, segment, frame, timeout=10):
+    # a falha é informada pelo processo de codificação de forma assíncrona
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        segment.write(frame)
+        time.sleep(0.05)
+
+
+def test_template_pattern_matches_only_generated_names():
+    pattern = template_pattern(TEMPLATE)
+
+    assert pattern.match('1-2-2024 10-5-0.avi')
+    assert not pattern.match('1-2-2024 10-5-0.mp4')
+    assert not pattern.match('video.avi')
+
+
+def test_enforce_disk_budget_removes_oldest_segments_and_their_csv(tmp_path):
+    oldest = make_segment(str(tmp_path), '1-1-2024 0-0-0.avi', 100, 1000)
+    middle = make_segment(str(tmp_path), '1-1-2024 0-5-0.avi', 100, 2000)
+    newest = make_segment(str(tmp_path), '1-1-2024 0-10-0.avi', 100, 3000)
+    other = make_segment(str(tmp_path), 'manual.avi', 1000, 0, csv=False)
+
+    removed = enforce_disk_budget(str(tmp_path), 250, TEMPLATE)
+
+    # os CSVs contam no espaço ocupado, e vídeos fora do padrão nunca são removidos
+    assert removed == [oldest, middle]
+    assert not os.path.exists(os.path.splitext(oldest)[0] + '.csv')
+    assert os.path.exists(newest) and os.path.exists(other)
+
+
+def test_enforce_disk_budget_keeps_open_segments_and_archives(tmp_path):
+    archive = tmp_path / 'archive'
+    archive.mkdir()
+    oldest = make_segment(str(tmp_path), '1-1-2024 0-0-0.avi', 100, 1000)
+    newest = make_segment(str(tmp_path), '1-1-2024 0-5-0.avi', 100, 2000)
+
+    removed = enforce_disk_budget(str(tmp_path), 0, TEMPLATE, archive_dir=str(archive), keep=[oldest])
+
+    assert removed == [newest]
+    assert os.path.exists(oldest)
+    assert sorted(os.listdir(archive)) == ['1-1-2024 0-5-0.avi', '1-1-2024 0-5-0.csv']
+
+
+def test_encoder_fails_loudly_when_the_segment_cannot_be_opened(tmp_path):
+    encoder = EncoderProcess((32, 24), 10, fourcc='MJPG', slots=4).start()
+    frame = np.zeros((24, 32, 3), dtype=np.uint8)
+
+    try:
+        segment = encoder.writer_factory(str(tmp_path / 'missing' / 'segment.avi'))
+
+        with pytest.raises(RuntimeError, match='não foi possível abrir'):
+            wait_for_error(encoder, segment, frame)
+
+        # a liberação do segmento não levanta uma segunda falha
+        segment.release()
+    finally:
+        encoder.stop()
+
+    assert encoder.segments == []
+
+
+def test_encoder_fails_loudly_when_the_process_dies(tmp_path):
+    encoder = EncoderProcess((32, 24), 10, fourcc='MJPG', slots=4).start()
+    frame = np.zeros((24, 32, 3), dtype=np.uint8)
+
+    try:
+        segment = encoder.writer_factory(str(tmp_path / 'segment.avi'))
+        assert segment.write(frame) is True
+
+        encoder._process.kill()
+
+        with pytest.raises(RuntimeError, match='encerrado'):
+            wait_for_error(encoder, segment, frame)
+    finally:
+        encoder.stop()
+
+    assert encoder.last_error is not None
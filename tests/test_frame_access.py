@@ -0,0 +1,132 @@
+import contextlib
+import sys
+import types
+
+import cv2
+import numpy as np
+import pytest
+
+import frame_access
+from capture_pool import CapturePool
+from frame_access import FrameCache, FrameReader, scan_keyframes
+
+NUM_FRAMES = 40
+
+
+def write_video(path, fourcc):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), 10, (64, 48))
+    assert writer.isOpened()
+
+    for index in range(NUM_FRAMES):
+        writer.write(np.full((48, 64, 3), index * 5, dtype=np.uint8))
+
+    writer.release()
+
+    return str(path)
+
+
+@pytest.fixture
+def mjpg_path(tmp_path):
+    return write_video(tmp_path / 'video.avi', 'MJPG')
+
+
+@pytest.fixture
+def reader(tmp_path, mjpg_path):
+    pool = CapturePool(max_handles=2, idle_seconds=300)
+    return FrameReader(mjpg_path, FrameCache(), pool, index_dir=str(tmp_path / 'index'), prefetch_radius=4)
+
+
+def cached_frames(reader):
+    return sorted(frame_index for _, frame_index in reader.cache._frames)
+
+
+def test_scan_keyframes_without_pyav(tmp_path, mjpg_path, monkeypatch):
+    # sem o PyAV, apenas vídeos MJPG (todo frame é um keyframe) são indexados
+    monkeypatch.setitem(sys.modules, 'av', None)
+
+    assert scan_keyframes(mjpg_path) == (list(range(NUM_FRAMES)), NUM_FRAMES)
+    assert scan_keyframes(write_video(tmp_path / 'video_xvid.avi', 'XVID'))[0] is None
+
+
+def test_scan_keyframes_orders_by_pts(monkeypatch):
+    # ordem de decodificação I P B B P B, com pacote final vazio
+    packets = [(0, True), (3, False), (1, False), (2, False), (6, True), (4, False), (5, False), (None, False)]
+
+    @contextlib.contextmanager
+    def open_container(path):
+        yield types.SimpleNamespace(
+            streams=types.SimpleNamespace(video=['stream']),
+            demux=lambda stream: [types.SimpleNamespace(pts=pts, is_keyframe=key, size=0 if pts is None else 1)
+                                  for pts, key in packets],
+        )
+
+    monkeypatch.setitem(sys.modules, 'av', types.SimpleNamespace(open=open_container))
+
+    assert scan_keyframes('video.mp4') == ([0, 6], 7)
+
+
+def test_frame_cache_evicts_least_recently_used():
+    frame = np.zeros(100, dtype=np.uint8)
+    cache = FrameCache(memory_budget_bytes=250)
+
+    cache.put('a', frame)
+    cache.put('b', frame)
+    assert cache.get('a') is frame
+    cache.put('c', frame)
+
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.total_bytes() == 200
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.get('b') is None and cache.misses == 1
+
+
+def test_frame_cache_keeps_single_frame_over_budget():
+    cache = FrameCache(memory_budget_bytes=10)
+    cache.put('a', np.zeros(100, dtype=np.uint8))
+
+    assert 'a' in cache
+
+
+def test_read_decodes_requested_frame(reader):
+    frame = reader.read(20, 'session')
+
+    assert frame.shape == (48, 64, 3)
+    assert abs(int(frame.mean()) - 100) <= 3
+    assert reader.read(NUM_FRAMES + 10, 'session') is None
+
+
+def test_long_seek_caches_only_target_and_window(reader):
+    # um único keyframe: a leitura do frame 30 decodifica todo o GOP desde o início
+    reader.keyframes = [0]
+
+    reader.read(30, 'session')
+
+    assert cached_frames(reader) == list(range(26, 31))
+
+
+def test_new_read_cancels_pending_prefetch(reader, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(frame_access, '_prefetch_executor', types.SimpleNamespace(submit=submitted.append))
+
+    reader.prefetch_neighbours(10, 'session')
+    reader.read(30, 'session')
+    submitted[0]()
+
+    # no MJPG, todo frame é um keyframe: a leitura vai direto ao frame 30
+    assert cached_frames(reader) == [30]
+
+    reader.prefetch_neighbours(10, 'session')
+    submitted[1]()
+
+    assert cached_frames(reader) == [6, 7, 8, 9, 11, 12, 13, 14, 30]
+
+
+def test_prefetch_of_other_session_is_not_cancelled(reader, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(frame_access, '_prefetch_executor', types.SimpleNamespace(submit=submitted.append))
+
+    reader.prefetch([5], 'a')
+    reader.read(30, 'b')
+    submitted[0]()
+
+    assert 5 in cached_frames(reader)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from frame_store import FrameSaver, read_last_index
+
+
+def make_frame():
+    return np.zeros((4, 6, 3), dtype=np.uint8)
+
+
+def wait_writes(saver):
+    saver._executor.shutdown(wait=True)
+
+
+def test_read_last_index(tmp_path):
+    assert read_last_index(str(tmp_path / 'index.txt')) == 0
+
+    (tmp_path / 'index.txt').write_text('\n1\n7\n3\n')
+    assert read_last_index(str(tmp_path / 'index.txt')) == 7
+
+
+def test_ids_continue_from_index_txt(tmp_path):
+    (tmp_path / 'index.txt').write_text('1\n2\n5')
+
+    saver = FrameSaver(str(tmp_path))
+    assert [saver.save(make_frame(), 'a.avi', index) for index in range(2)] == [6, 7]
+    wait_writes(saver)
+
+    assert (tmp_path / '6.png').exists() and (tmp_path / '7.png').exists()
+    assert read_last_index(str(tmp_path / 'index.txt')) == 7
+    assert saver.pending() == 0
+
+    # o banco já existe: a numeração segue dele, e não novamente do index.txt
+    saver = FrameSaver(str(tmp_path), image_format='jpg')
+    assert saver.save(make_frame()) == 8
+    wait_writes(saver)
+
+    assert (tmp_path / '8.jpg').exists()
+
+
+def test_ids_start_at_one_without_index_txt(tmp_path):
+    saver = FrameSaver(str(tmp_path))
+
+    assert saver.save(make_frame()) == 1
+    wait_writes(saver)
+
+
+def test_failed_write_is_recorded(tmp_path):
+    saver = FrameSaver(str(tmp_path))
+
+    frame_id = saver.save(np.zeros((4, 6, 3), dtype=np.float64))
+    wait_writes(saver)
+
+    assert saver.failed() == 1
+    assert saver.pending() == 0
+    assert saver.last_error.startswith(f'{frame_id}.png')
+    assert not (tmp_path / f'{frame_id}.png').exists()
+    assert not (tmp_path / f'{frame_id}.png.tmp').exists()
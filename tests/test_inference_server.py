@@ -0,0 +1,115 @@
+import http.client
+import json
+import threading
+from email.message import Message
+from http.server import ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import pytest
+
+from project_utils.inference_server import decode_request_frame, make_handler
+
+
+def make_headers(**values):
+    # mesmo tipo de objeto de BaseHTTPRequestHandler.headers
+    headers = Message()
+    for name, value in values.items():
+        headers[name.replace('_', '-')] = str(value)
+    return headers
+
+
+def test_raw_frame():
+    frame = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+
+    decoded = decode_request_frame('application/octet-stream', make_headers(X_Width=3, X_Height=2), frame.tobytes())
+
+    assert np.array_equal(decoded, frame)
+
+
+def test_encoded_image():
+    frame = np.full((5, 7, 3), 128, dtype=np.uint8)
+    body = cv2.imencode('.png', frame)[1].tobytes()
+
+    assert np.array_equal(decode_request_frame('image/png', make_headers(), body), frame)
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    {'X_Width': 3},
+    {'X_Width': 0, 'X_Height': 0},
+    {'X_Width': -3, 'X_Height': -2},
+    {'X_Width': 'três', 'X_Height': 2},
+])
+def test_raw_frame_invalid_headers(headers):
+    with pytest.raises(ValueError):
+        decode_request_frame('application/octet-stream', make_headers(**headers), b'')
+
+
+def test_raw_frame_size_mismatch():
+    with pytest.raises(ValueError):
+        decode_request_frame('application/octet-stream', make_headers(X_Width=3, X_Height=2), bytes(17))
+
+
+def test_invalid_image():
+    with pytest.raises(ValueError):
+        decode_request_frame('image/jpeg', make_headers(), b'not an image')
+
+
+@pytest.fixture
+def server():
+    # o micro-batcher é substituído por um objeto que devolve predições vazias, sem carregar o modelo
+    class StubBatcher():
+        def submit(self, frame):
+            return {'detection': {'bboxes': [], 'labels': [], 'scores': []}, 'width': frame.shape[1], 'height': frame.shape[0]}
+
+        def metrics(self):
+            return {}
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(StubBatcher()))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def post_detect(server, headers, body=b''):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+
+    # putrequest e putheader não acrescentam o Content-Length, ao contrário de request
+    connection.putrequest('POST', '/detect')
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders(body or None)
+
+    response = connection.getresponse()
+    status, payload = response.status, json.loads(response.read())
+    connection.close()
+
+    return status, payload
+
+
+def test_detect_requires_content_length(server):
+    status, payload = post_detect(server, {'Content-Type': 'image/png'})
+
+    assert status == 411
+    assert 'Content-Length' in payload['error']
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-5'])
+def test_detect_rejects_invalid_content_length(server, content_length):
+    status, _ = post_detect(server, {'Content-Type': 'image/png', 'Content-Length': content_length})
+
+    assert status == 400
+
+
+def test_detect_with_content_length(server):
+    body = cv2.imencode('.png', np.zeros((5, 7, 3), dtype=np.uint8))[1].tobytes()
+
+    status, payload = post_detect(server, {'Content-Type': 'image/png', 'Content-Length': str(len(body))}, body)
+
+    assert status == 200
+    assert (payload['width'], payload['height']) == (7, 5)
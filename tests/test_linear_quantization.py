@@ -0,0 +1,45 @@
+import pytest
+
+from detections import Box
+from project_utils.linear_quantization import compare_predictions
+
+
+def make_preds(boxes, labels, scores):
+    return {'detection': {'bboxes': [Box(box) for box in boxes], 'labels': labels, 'scores': scores}}
+
+
+def test_identical_predictions():
+    preds = make_preds([[0, 0, 10, 10], [20, 20, 40, 40]], ['bird', 'bird'], [0.9, 0.8])
+
+    result = compare_predictions(preds, preds)
+
+    assert result == {'reference': 2, 'candidate': 2, 'matched': 2, 'iou_sum': 2.0, 'score_diff_sum': 0.0}
+
+
+def test_shifted_box_and_score_drift():
+    reference = make_preds([[0, 0, 10, 10]], ['bird'], [0.9])
+    candidate = make_preds([[1, 0, 11, 10]], ['bird'], [0.7])
+
+    result = compare_predictions(reference, candidate)
+
+    assert result['matched'] == 1
+    assert result['iou_sum'] == pytest.approx(9 / 11)
+    assert result['score_diff_sum'] == pytest.approx(0.2)
+
+
+def test_boxes_of_different_classes_are_not_matched():
+    reference = make_preds([[0, 0, 10, 10]], ['bird'], [0.9])
+    candidate = make_preds([[0, 0, 10, 10]], ['cat'], [0.9])
+
+    assert compare_predictions(reference, candidate)['matched'] == 0
+
+
+def test_low_iou_and_missing_detections():
+    reference = make_preds([[0, 0, 10, 10], [50, 50, 60, 60]], ['bird', 'bird'], [0.9, 0.6])
+    candidate = make_preds([[5, 5, 15, 15]], ['bird'], [0.9])
+
+    result = compare_predictions(reference, candidate, iou_threshold=0.5)
+
+    assert (result['reference'], result['candidate'], result['matched']) == (2, 1, 0)
+    assert compare_predictions(make_preds([], [], []), make_preds([], [], []))['matched'] == 0
+
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+import pytest
+
+from project_utils import model_registry
+from project_utils.model_registry import LoadedModel, ModelRegistry
+
+
+class StubRegistry(ModelRegistry):
+    # carrega um objeto qualquer com o tamanho informado, sem ler o checkpoint
+    def __init__(self, memory_budget_bytes=None, size_bytes=100, fail=False, delay=0.0):
+        super().__init__(memory_budget_bytes)
+        self.size_bytes = size_bytes
+        self.fail = fail
+        self.delay = delay
+        self.loaded = []
+
+    def _load(self, key):
+        time.sleep(self.delay)
+        self.loaded.append(os.path.basename(key[0]))
+
+        if self.fail:
+            raise OSError('checkpoint ilegível')
+
+        return LoadedModel(None, object(), 384, None, None, self.size_bytes)
+
+
+def make_checkpoint(tmp_path, name, mtime=1000000000):
+    path = tmp_path / name
+    path.write_bytes(b'weights')
+    os.utime(path, (mtime, mtime))
+
+    return str(path)
+
+
+def test_hit_and_miss(tmp_path):
+    registry = StubRegistry()
+    path = make_checkpoint(tmp_path, 'a.pth')
+
+    first = registry.get(path)
+
+    assert registry.get(path) is first
+    assert registry.get(path, device='cuda') is not first
+    assert (registry.loads, registry.hits) == (2, 1)
+
+
+def test_modified_checkpoint_is_reloaded(tmp_path):
+    registry = StubRegistry()
+    path = make_checkpoint(tmp_path, 'a.pth')
+
+    first = registry.get(path)
+    make_checkpoint(tmp_path, 'a.pth', mtime=1000000100)
+
+    assert registry.get(path) is not first
+    # a versão anterior do mesmo checkpoint é descartada
+    assert registry.stats()['models'] == 1
+    assert registry.evictions == 1
+
+
+def test_lru_eviction(tmp_path):
+    registry = StubRegistry(memory_budget_bytes=250)
+    a, b, c = (make_checkpoint(tmp_path, name) for name in ('a.pth', 'b.pth', 'c.pth'))
+
+    registry.get(a)
+    registry.get(b)
+    registry.get(a)
+    registry.get(c)
+
+    assert registry.total_bytes() == 200
+    registry.get(a)
+    registry.get(b)
+    assert registry.loaded == ['a.pth', 'b.pth', 'c.pth', 'b.pth']
+
+
+def test_configure_evicts_immediately(tmp_path):
+    registry = StubRegistry()
+
+    for name in ('a.pth', 'b.pth', 'c.pth'):
+        registry.get(make_checkpoint(tmp_path, name))
+
+    registry.configure(150)
+
+    assert registry.stats()['models'] == 1
+    assert registry.evictions == 2
+
+
+def test_failed_load_does_not_leak_loading_lock(tmp_path):
+    registry = StubRegistry(fail=True)
+    path = make_checkpoint(tmp_path, 'a.pth')
+
+    for _ in range(2):
+        with pytest.raises(OSError):
+            registry.get(path)
+
+    assert registry._loading_locks == {}
+    assert registry.loaded == ['a.pth', 'a.pth']
+
+
+def test_concurrent_requests_load_once(tmp_path):
+    registry = StubRegistry(delay=0.05)
+    path = make_checkpoint(tmp_path, 'a.pth')
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(registry.get(path))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.loaded == ['a.pth']
+    assert all(result is results[0] for result in results)
+
+
+def test_budget_from_env(monkeypatch):
+    monkeypatch.setenv(model_registry.MEMORY_BUDGET_ENV, '1.5')
+    assert model_registry._budget_from_env() == int(1.5 * 2**20)
+
+    monkeypatch.delenv(model_registry.MEMORY_BUDGET_ENV)
+    assert model_registry._budget_from_env() is None
@@ -0,0 +1,87 @@
+import numpy as np
+
+from project_utils.motion_gate import MotionGate, detect_frames_gated
+
+
+def background(width=320, height=240):
+    return np.full((height, width, 3), 100, dtype=np.uint8)
+
+
+def with_bird(x, width=320, height=240):
+    # um quadrado claro de 40x40 pixels sobre o fundo
+    frame = background(width, height)
+    frame[100:140, x:x + 40] = 250
+    return frame
+
+
+class StubDetector():
+    # devolve, para cada frame, o valor do seu primeiro pixel, identificando o frame inferido
+    def __init__(self):
+        self.batches = []
+
+    def detect(self, frames):
+        self.batches.append(len(frames))
+        return [{'pixel': int(frame[0, 0, 0])} for frame in frames]
+
+
+def test_first_frame_initialises_background():
+    gate = MotionGate()
+
+    assert gate.changed_fraction(background()) == 1.0
+    assert gate.changed_fraction(background()) == 0.0
+
+
+def test_motion_is_detected_and_static_frames_are_skipped():
+    gate = MotionGate(downscale_width=160)
+
+    decisions = [gate.should_detect(frame) for frame in [background(), background(), with_bird(50), background()]]
+
+    # o pássaro altera o fundo apenas lentamente (learning_rate), e sua saída não é considerada movimento
+    assert decisions == [True, False, True, False]
+    assert gate.stats.report() == {'frames': 4, 'detected': 2, 'skipped': 2, 'forced': 0, 'skip_ratio': 0.5}
+
+
+def test_small_changes_are_below_the_threshold():
+    gate = MotionGate(pixel_threshold=25)
+    gate.should_detect(background())
+
+    noisy = background()
+    noisy[:, :, :] += 10
+
+    assert not gate.should_detect(noisy)
+
+
+def test_max_skipped_frames_forces_detection():
+    gate = MotionGate(max_skipped_frames=2)
+
+    decisions = [gate.should_detect(background()) for _ in range(7)]
+
+    assert decisions == [True, False, False, True, False, False, True]
+    assert gate.stats.forced == 2
+
+
+def test_gated_detection_preserves_order_and_reuses_last_predictions():
+    frames = [background()] * 3 + [with_bird(50)] + [background()] * 2
+    for index, frame in enumerate(frames):
+        frames[index] = frame.copy()
+        frames[index][0, 0] = index
+
+    detector = StubDetector()
+    results = list(detect_frames_gated(detector, enumerate(frames), MotionGate(), batch_size=2))
+
+    assert [frame_index for frame_index, _, _ in results] == list(range(6))
+
+    # apenas os frames 0 (inicialização) e 3 (pássaro) são inferidos; os demais reutilizam as últimas predições
+    preds = [preds for _, _, preds in results]
+    assert [p['pixel'] for p in preds] == [0, 0, 0, 3, 3, 3]
+    assert sum(detector.batches) == 2
+
+
+def test_gated_detection_without_reuse_returns_empty_predictions():
+    frames = [background(), background(), with_bird(50)]
+
+    results = list(detect_frames_gated(StubDetector(), enumerate(frames), MotionGate(), reuse_last=False))
+
+    assert results[1][2]['detection']['bboxes'] == []
+    assert (results[1][2]['width'], results[1][2]['height']) == (320, 240)
+    assert 'pixel' in results[2][2]
@@ -0,0 +1,56 @@
+import os
+from xml.dom import minidom
+
+from detections import Box
+from project_utils.pseudo_labeling import make_voc_annotation, predictions_to_objects
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def text(parent, tag):
+    return parent.getElementsByTagName(tag)[0].firstChild.data
+
+
+def test_voc_annotation_parses_back():
+    objects = [('bird', 10, 20, 110, 120, 0.91234), ('cat', 0, 5, 50, 60, 0.4)]
+
+    document = minidom.parseString(make_voc_annotation('7.png', 640, 480, objects, needs_review=True))
+    annotation = document.documentElement
+
+    assert annotation.tagName == 'annotation'
+    assert text(annotation, 'filename') == '7.png'
+    assert (text(annotation, 'width'), text(annotation, 'height'), text(annotation, 'depth')) == ('640', '480', '3')
+    assert text(annotation, 'needs_review') == '1'
+
+    parsed = [
+        (text(obj, 'name'), *(int(text(obj, tag)) for tag in ('xmin', 'ymin', 'xmax', 'ymax')), float(text(obj, 'score')))
+        for obj in annotation.getElementsByTagName('object')
+    ]
+
+    assert parsed == [('bird', 10, 20, 110, 120, 0.9123), ('cat', 0, 5, 50, 60, 0.4)]
+
+
+def test_voc_annotation_matches_roboflow_layout():
+    # mesma sequência de tags das anotações exportadas pelo roboflow, lidas pelo VOCBBoxParser
+    reference = minidom.parse(os.path.join(ROOT, 'dataset', 'partial_dataset', '101.xml')).documentElement
+    generated = minidom.parseString(make_voc_annotation('101.jpg', 640, 480, [('bird', 1, 2, 3, 4, 0.5)])).documentElement
+
+    def tags(element):
+        return [child.tagName for child in element.childNodes if child.nodeType == child.ELEMENT_NODE]
+
+    reference_tags = tags(reference)
+    assert [tag for tag in tags(generated) if tag != 'needs_review'] == reference_tags[:reference_tags.index('object') + 1]
+
+    reference_object = reference.getElementsByTagName('object')[0]
+    generated_object = generated.getElementsByTagName('object')[0]
+    assert [tag for tag in tags(generated_object) if tag != 'score'] == tags(reference_object)
+
+
+def test_predictions_to_objects_clamps_to_image():
+    preds = {
+        'detection': {'bboxes': [Box([-3.6, 10.4, 700.2, 479.6])], 'labels': ['bird'], 'scores': [0.7]},
+        'width': 640,
+        'height': 480,
+    }
+
+    assert predictions_to_objects(preds) == [('bird', 0, 10, 640, 480, 0.7)]
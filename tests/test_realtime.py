@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from project_utils import realtime
+from project_utils.realtime import LatestFrameSlot, RealTimeDetector, make_size_ladder
+
+
+def test_slot_keeps_only_latest_frame():
+    slot = LatestFrameSlot()
+
+    slot.put(0, 'a')
+    slot.put(1, 'b')
+    slot.put(2, 'c')
+
+    frame_index, frame, _ = slot.get(timeout=0)
+    assert (frame_index, frame) == (2, 'c')
+    assert (slot.received, slot.dropped) == (3, 2)
+    assert slot.get(timeout=0.01) is None
+
+
+def test_slot_get_waits_for_producer():
+    slot = LatestFrameSlot()
+    threading.Timer(0.02, slot.put, args=(5, 'frame')).start()
+
+    assert slot.get(timeout=1)[0] == 5
+
+
+def test_size_ladder():
+    assert make_size_ladder(384) == [384, 352, 320, 288, 256, 224, 192]
+    assert make_size_ladder(400, min_scale=0.9) == [384]
+    assert make_size_ladder(20) == [20]
+
+
+class StubDetector():
+    # falha nos frames listados em failing e retorna o índice do frame como predição nos demais
+    failing = set()
+
+    def __init__(self, model_type, model, img_size, class_map, detection_threshold=0.5):
+        self.img_size = img_size
+
+    def detect(self, frames):
+        if frames[0] in self.failing:
+            raise RuntimeError(f'frame {frames[0]} inválido')
+        return [{'frame': frames[0], 'img_size': self.img_size}]
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setattr(realtime, 'BatchDetector', StubDetector)
+    monkeypatch.setattr(StubDetector, 'failing', set())
+
+    detector = RealTimeDetector(None, None, 384, None, latency_budget=1.0).start()
+    yield detector
+    detector.stop()
+
+
+def submit_and_wait(detector, frame_index, condition):
+    detector.submit(frame_index, frame_index)
+    deadline = time.monotonic() + 2
+
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    assert condition()
+
+
+def test_detection_error_keeps_thread_running(detector, capsys):
+    StubDetector.failing = {1, 2}
+
+    submit_and_wait(detector, 0, lambda: detector.stats()['processed'] == 1)
+    assert detector.latest() == (0, {'frame': 0, 'img_size': 384})
+
+    submit_and_wait(detector, 1, lambda: detector.stats()['errors'] == 1)
+    submit_and_wait(detector, 2, lambda: detector.stats()['errors'] == 2)
+
+    assert detector.latest() is None
+    assert detector.last_error == 'RuntimeError: frame 2 inválido'
+    assert detector._thread.is_alive()
+    # apenas a primeira falha da sequência é exibida
+    assert capsys.readouterr().out.count('Falha na inferência') == 1
+
+    submit_and_wait(detector, 3, lambda: detector.stats()['processed'] == 2)
+    assert detector.latest()[0] == 3
+
+
+def test_on_result_error_keeps_thread_running(monkeypatch):
+    monkeypatch.setattr(realtime, 'BatchDetector', StubDetector)
+    results = []
+
+    def on_result(frame_index, preds, stats):
+        results.append(frame_index)
+        raise ValueError('callback')
+
+    detector = RealTimeDetector(None, None, 384, None, latency_budget=1.0, on_result=on_result).start()
+
+    try:
+        submit_and_wait(detector, 0, lambda: detector.stats()['errors'] == 1)
+        submit_and_wait(detector, 1, lambda: detector.stats()['errors'] == 2)
+    finally:
+        detector.stop()
+
+    assert results == [0, 1]
+
+
+def test_adapt_lowers_and_raises_resolution(monkeypatch):
+    monkeypatch.setattr(realtime, 'BatchDetector', StubDetector)
+    detector = RealTimeDetector(None, None, 384, None, latency_budget=0.1, upscale_after=3)
+
+    detector._adapt(0.2)
+    detector._adapt(0.2)
+    assert detector.sizes[detector.level] == 320
+
+    for _ in range(3):
+        detector._adapt(0.01)
+    assert detector.sizes[detector.level] == 352
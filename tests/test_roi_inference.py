@@ -0,0 +1,45 @@
+from project_utils.roi_inference import merge_rects, stitch_edge_boxes
+
+
+def test_merge_rects_unites_overlapping_chain():
+    # a sobrepõe b e b sobrepõe c: os três viram um único retângulo
+    rects = [[0, 0, 10, 10], [5, 5, 20, 20], [15, 15, 30, 30], [100, 100, 110, 110]]
+
+    assert sorted(merge_rects(rects)) == [[0, 0, 30, 30], [100, 100, 110, 110]]
+
+
+def test_merge_rects_keeps_touching_rects_apart():
+    assert merge_rects([[0, 0, 10, 10], [10, 0, 20, 10]]) == [[0, 0, 10, 10], [10, 0, 20, 10]]
+
+
+def test_merge_rects_empty():
+    assert merge_rects([]) == []
+
+
+ROIS = [[0, 0, 100, 100], [100, 0, 200, 100]]
+
+
+def test_stitch_joins_box_split_between_crops():
+    boxes = [[60, 20, 99, 60], [101, 25, 150, 65]]
+
+    stitched = stitch_edge_boxes(boxes, ['bird', 'bird'], [0.6, 0.9], [0, 1], ROIS, 200, 100)
+
+    assert stitched == ([[60, 20, 150, 65]], ['bird'], [0.9])
+
+
+def test_stitch_keeps_boxes_of_different_classes():
+    boxes = [[60, 20, 99, 60], [101, 25, 150, 65]]
+
+    stitched_boxes, labels, _ = stitch_edge_boxes(boxes, ['bird', 'cat'], [0.6, 0.9], [0, 1], ROIS, 200, 100)
+
+    assert stitched_boxes == boxes
+    assert labels == ['bird', 'cat']
+
+
+def test_stitch_ignores_frame_border():
+    # a borda esquerda do primeiro recorte é a borda do frame e não corta o objeto
+    boxes = [[1, 20, 40, 60], [120, 20, 160, 60]]
+
+    stitched_boxes, _, _ = stitch_edge_boxes(boxes, ['bird', 'bird'], [0.6, 0.9], [0, 1], ROIS, 200, 100)
+
+    assert stitched_boxes == boxes
@@ -0,0 +1,183 @@
+import csv
+import datetime
+import os
+import threading
+
+import numpy as np
+
+from segmented_capture import CaptureThread, FrameRing, SegmentRotator, WriterThread
+
+
+class FakeWebcam():
+    # devolve os frames informados e, em seguida, apenas leituras que falharam
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def read(self):
+        if self.frames:
+            return True, self.frames.pop(0)
+        return False, None
+
+
+def test_capture_reports_every_frame_to_on_frame():
+    frames = [np.full((2, 2, 3), index, dtype=np.uint8) for index in range(10)]
+    submitted = []
+    ring = FrameRing(capacity=4)
+
+    capture = CaptureThread(FakeWebcam(frames), ring, retry_seconds=0, max_failures=3, on_frame=submitted.append)
+    capture.start()
+    capture.join(timeout=2)
+
+    # o buffer cheio descarta frames, mas on_frame recebe todos os frames lidos
+    assert len(submitted) == capture.captured == 10
+    assert ring.dropped == 6
+    assert capture.failed == 3
+    assert not capture.is_alive()
+
+
+class FailingSink():
+    def __init__(self, fail_at):
+        self.fail_at = fail_at
+        self.frames = []
+
+    def process(self, frame, timestamp, dropped=0):
+        if len(self.frames) == self.fail_at:
+            raise RuntimeError('o processo de codificação foi encerrado')
+        self.frames.append(frame)
+
+
+def test_writer_thread_stops_and_reports_sink_failures():
+    ring = FrameRing(capacity=10)
+    for index in range(5):
+        ring.put((index, None, 0))
+
+    writer = WriterThread(ring, FailingSink(fail_at=2), idle_seconds=0)
+    writer.start()
+    writer.join(timeout=2)
+
+    assert not writer.is_alive()
+    assert writer.written == 2
+    assert writer.last_error == 'RuntimeError: o processo de codificação foi encerrado'
+
+
+class FakeWriter():
+    # registra os frames recebidos; write retorna False para os frames em reject, como EncodedSegment
+    def __init__(self, file_name, reject=()):
+        self.file_name = file_name
+        self.reject = set(reject)
+        self.frames = []
+        self.released = False
+
+    def write(self, frame):
+        if frame in self.reject:
+            return False
+        self.frames.append(frame)
+
+    def release(self):
+        self.released = True
+
+
+def make_rotator(tmp_path, amount_of_segments, reject=()):
+    writers = []
+
+    def writer_factory(file_name):
+        writers.append(FakeWriter(file_name, reject))
+        return writers[-1]
+
+    rotator = SegmentRotator(str(tmp_path) + os.sep, '{}-{}-{} {}-{}-{}.avi', None, 10, (4, 4),
+                             segment_seconds=1, amount_of_segments=amount_of_segments, writer_factory=writer_factory)
+
+    return rotator, writers
+
+
+def read_rows(path):
+    with open(os.path.splitext(path)[0] + '.csv') as csv_file:
+        return list(csv.reader(csv_file))[1:]
+
+
+START = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+
+def at(seconds):
+    return START + datetime.timedelta(seconds=seconds)
+
+
+def test_frame_ring_is_fifo_and_drops_when_full():
+    ring = FrameRing(capacity=3)
+
+    assert [ring.put(item) for item in range(5)] == [True, True, True, False, False]
+    assert ring.dropped == 2 and len(ring) == 3
+
+    assert ring.get() == 0
+    assert ring.put(5)
+    assert [ring.get() for _ in range(4)] == [1, 2, 5, None]
+    assert len(ring) == 0
+
+
+def test_frame_ring_preserves_order_across_threads():
+    ring = FrameRing(capacity=8)
+    received = []
+
+    def consume():
+        while len(received) < 1000:
+            item = ring.get()
+            if item is not None:
+                received.append(item)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+
+    item = 0
+    while item < 1000:
+        # o produtor tenta novamente quando o buffer está cheio, para que nenhum item seja perdido
+        if ring.put(item):
+            item += 1
+
+    consumer.join(timeout=5)
+
+    assert received == list(range(1000))
+
+
+def test_rotator_splits_frames_by_capture_time(tmp_path):
+    rotator, writers = make_rotator(tmp_path, amount_of_segments=2)
+    dropped = [0, 0, 1, 1, 1, 3, 3, 3, 3]
+
+    for index, total_dropped in enumerate(dropped):
+        rotator.process(index, at(index * 0.25), total_dropped)
+
+    # o frame 8 pertenceria ao terceiro segmento, que não é gravado
+    assert rotator.finished
+    assert [writer.frames for writer in writers] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert all(writer.released for writer in writers)
+    assert [(segment['frames'], segment['dropped']) for segment in rotator.segments] == [(4, 1), (4, 2)]
+
+    assert [row[2] for row in read_rows(writers[0].file_name)] == ['0', '0', '1', '0']
+    assert [row[2] for row in read_rows(writers[1].file_name)] == ['0', '2', '0', '0']
+    assert read_rows(writers[1].file_name)[0][1] == at(1).isoformat()
+
+
+def test_rotator_counts_frames_rejected_by_the_writer(tmp_path):
+    rotator, writers = make_rotator(tmp_path, amount_of_segments=1, reject={1})
+
+    for index in range(4):
+        rotator.process(index, at(index * 0.25), 0)
+    rotator.close()
+
+    # o descarte é registrado no próximo frame gravado, mantendo o CSV alinhado ao vídeo
+    assert writers[0].frames == [0, 2, 3]
+    assert [row[:1] + row[2:] for row in read_rows(writers[0].file_name)] == [['0', '0'], ['1', '1'], ['2', '0']]
+    assert rotator.segments == [{'file': writers[0].file_name, 'frames': 3, 'dropped': 1}]
+
+
+def test_rotator_close_removes_the_unused_next_segment(tmp_path):
+    rotator, writers = make_rotator(tmp_path, amount_of_segments=3)
+
+    rotator.process(0, at(0), 0)
+    rotator.process(1, at(0.5), 0)
+    rotator.close()
+
+    assert rotator.finished
+    assert len(writers) == 2 and writers[1].released
+    assert os.path.exists(os.path.splitext(writers[0].file_name)[0] + '.csv')
+    assert not os.path.exists(os.path.splitext(writers[1].file_name)[0] + '.csv')
+    assert [segment['frames'] for segment in rotator.segments] == [2]
@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+import pytest
+
+import thumbnails
+from thumbnails import build_thumbnails, load_thumbnails, make_contact_sheet
+
+NUM_FRAMES = 20
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    path = str(tmp_path / 'video.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+    assert writer.isOpened()
+
+    for index in range(NUM_FRAMES):
+        writer.write(np.full((48, 64, 3), index * 10, dtype=np.uint8))
+
+    writer.release()
+
+    return path
+
+
+def report_frame_count(monkeypatch, frame_count):
+    # simula um container que informa uma quantidade de frames incorreta
+    open_video = cv2.VideoCapture
+
+    class VideoCapture():
+        def __init__(self, path):
+            self._video = open_video(path)
+
+        def get(self, prop):
+            return frame_count if prop == cv2.CAP_PROP_FRAME_COUNT else self._video.get(prop)
+
+        def __getattr__(self, name):
+            return getattr(self._video, name)
+
+    monkeypatch.setattr(thumbnails.cv2, 'VideoCapture', VideoCapture)
+
+
+@pytest.mark.parametrize('frame_count', [None, 0, 1, 5, 1000])
+def test_strip_covers_whole_video(tmp_path, monkeypatch, video_path, frame_count):
+    if frame_count is not None:
+        report_frame_count(monkeypatch, frame_count)
+
+    index = build_thumbnails(video_path, stride=3, width=32, thumbnail_dir=str(tmp_path / 'thumbnails'))
+
+    assert index['frame_indices'] == list(range(0, NUM_FRAMES, 3))
+    assert index['frame_count'] == NUM_FRAMES
+
+    frame_indices, strip = load_thumbnails(video_path, thumbnail_dir=str(tmp_path / 'thumbnails'))
+
+    assert frame_indices == index['frame_indices']
+    assert strip.shape == (7, 24, 32, 3)
+    # o brilho de cada miniatura acompanha o frame amostrado
+    assert np.all(np.diff(strip.reshape(len(strip), -1).mean(axis=1)) > 0)
+    assert sorted(path.suffix for path in (tmp_path / 'thumbnails').iterdir()) == ['.json', '.npy']
+
+
+def test_unreadable_video_gives_empty_strip(tmp_path):
+    path = tmp_path / 'broken.avi'
+    path.write_bytes(b'not a video')
+
+    index = build_thumbnails(str(path), thumbnail_dir=str(tmp_path / 'thumbnails'))
+
+    assert index['frame_indices'] == []
+    assert load_thumbnails(str(path), thumbnail_dir=str(tmp_path / 'thumbnails'))[1].shape[0] == 0
+
+
+def test_stale_thumbnails_are_not_loaded(tmp_path, video_path):
+    build_thumbnails(video_path, stride=5, thumbnail_dir=str(tmp_path / 'thumbnails'))
+
+    with open(video_path, 'ab') as video_file:
+        video_file.write(b'\0')
+
+    assert load_thumbnails(video_path, thumbnail_dir=str(tmp_path / 'thumbnails')) is None
+
+
+def test_contact_sheet_layout():
+    strip = np.arange(5, dtype=np.uint8).reshape(5, 1, 1, 1) * np.ones((5, 2, 3, 3), dtype=np.uint8)
+
+    sheet = make_contact_sheet(strip, columns=3)
+
+    assert sheet.shape == (4, 9, 3)
+    assert sheet[0, 3, 0] == 1 and sheet[2, 3, 0] == 4 and sheet[2, 6, 0] == 0
@@ -0,0 +1,84 @@
+import collections
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from project_utils.tracking import KeyframeTracker, greedy_match, iou_matrix
+
+Box = collections.namedtuple('Box', ['xyxy'])
+
+
+class FakeBBox(Box):
+    @classmethod
+    def from_xyxy(cls, xmin, ymin, xmax, ymax):
+        return cls((xmin, ymin, xmax, ymax))
+
+
+@pytest.fixture
+def fake_icevision(monkeypatch):
+    # KeyframeTracker monta as predições com a BBox da IceVision, que não participa da associação
+    core = types.ModuleType('icevision.core')
+    core.BBox = FakeBBox
+    monkeypatch.setitem(sys.modules, 'icevision', types.ModuleType('icevision'))
+    monkeypatch.setitem(sys.modules, 'icevision.core', core)
+
+
+class ScriptedDetector():
+    # devolve, a cada chamada, as caixas da próxima posição de detections
+    def __init__(self, detections):
+        self.detections = list(detections)
+
+    def detect(self, frames):
+        boxes = self.detections.pop(0)
+        return [{'detection': {'bboxes': [Box(box) for box in boxes], 'labels': ['bird'] * len(boxes), 'scores': [0.9] * len(boxes)}}]
+
+
+def test_iou_matrix():
+    iou = iou_matrix([[0, 0, 10, 10], [0, 0, 20, 20]], [[0, 0, 10, 10], [5, 0, 15, 10], [30, 30, 40, 40]])
+
+    assert iou.shape == (2, 3)
+    assert iou[0] == pytest.approx([1.0, 50 / 150, 0.0])
+    assert iou[1] == pytest.approx([0.25, 0.25, 0.0])
+
+
+def test_iou_matrix_with_empty_and_degenerate_boxes():
+    assert iou_matrix(np.zeros((0, 4)), [[0, 0, 1, 1]]).shape == (0, 1)
+    assert iou_matrix([[5, 5, 5, 5]], [[5, 5, 5, 5]])[0, 0] == 0.0
+
+
+def test_greedy_match_prefers_highest_iou():
+    iou = np.array([
+        [0.6, 0.5],
+        [0.9, 0.1],
+    ])
+
+    # a linha 1 fica com a coluna 0 (0,9); a linha 0 fica com a coluna restante
+    assert greedy_match(iou, 0.3) == [(1, 0), (0, 1)]
+
+
+def test_greedy_match_respects_threshold():
+    iou = np.array([
+        [0.2, 0.0],
+        [0.0, 0.4],
+    ])
+
+    assert greedy_match(iou, 0.3) == [(1, 1)]
+    assert greedy_match(np.zeros((0, 2)), 0.3) == []
+
+
+def test_tracker_keeps_ids_of_matched_detections(fake_icevision):
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    detector = ScriptedDetector([
+        [[10, 10, 30, 30], [60, 60, 80, 80]],
+        # a primeira caixa se deslocou, a segunda desapareceu e uma nova surgiu
+        [[12, 11, 32, 31], [40, 0, 50, 10]],
+        [[40, 1, 50, 11]],
+    ])
+    tracker = KeyframeTracker(detector, keyframe_interval=1)
+
+    track_ids = [tracker.step(frame)['detection']['track_ids'] for _ in range(3)]
+
+    assert track_ids == [[0, 1], [0, 2], [2]]
+    assert tracker.detections == 3
@@ -0,0 +1,78 @@
+import datetime
+import json
+
+from triggered_recording import TriggeredRecorder
+
+
+class FakeWriter():
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.frames = []
+        self.released = False
+
+    def write(self, frame):
+        self.frames.append(frame)
+
+    def release(self):
+        self.released = True
+
+
+class ScriptedPresence():
+    # indica presença apenas nos frames informados (contados a partir de 0)
+    def __init__(self, present_frames):
+        self.present_frames = set(present_frames)
+        self.calls = 0
+
+    def __call__(self, frame):
+        present = self.calls in self.present_frames
+        self.calls += 1
+        return present, {'bird'} if present else set()
+
+
+def run(tmp_path, present_frames, total_frames, post_roll_seconds=0.5):
+    writers = []
+
+    def writer_factory(file_name):
+        writers.append(FakeWriter(file_name))
+        return writers[-1]
+
+    recorder = TriggeredRecorder(str(tmp_path), 10, (4, 4), ScriptedPresence(present_frames),
+                                 pre_roll_seconds=0.2, post_roll_seconds=post_roll_seconds,
+                                 writer_factory=writer_factory)
+    start = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    timestamps = [start + datetime.timedelta(seconds=index / 10) for index in range(total_frames)]
+
+    for index, timestamp in enumerate(timestamps):
+        recorder.process(index, timestamp)
+
+    return recorder, writers, timestamps
+
+
+def read_events(tmp_path):
+    with open(tmp_path / 'events.jsonl') as index_file:
+        return [json.loads(line) for line in index_file]
+
+
+def test_event_includes_pre_roll_and_ends_after_post_roll(tmp_path):
+    recorder, writers, timestamps = run(tmp_path, present_frames=[5], total_frames=20)
+    recorder.close()
+
+    # dois frames de pre-roll, o frame com presença e o post-roll até ultrapassar 0,5 s
+    assert len(writers) == 1 and writers[0].released
+    assert writers[0].frames == list(range(3, 12))
+
+    [event] = read_events(tmp_path)
+    assert event['start'] == timestamps[3].isoformat()
+    assert event['end'] == timestamps[11].isoformat()
+    assert event['frames'] == 9
+    assert event['species'] == ['bird']
+
+
+def test_close_ends_event_at_last_written_frame(tmp_path):
+    recorder, writers, timestamps = run(tmp_path, present_frames=range(2, 8), total_frames=8, post_roll_seconds=5)
+    recorder.close()
+
+    [event] = read_events(tmp_path)
+    assert writers[0].frames == list(range(0, 8))
+    assert event['end'] == timestamps[-1].isoformat()
+    assert recorder.events == 1
@@ -0,0 +1,61 @@
+import sys
+import types
+
+import pytest
+
+from project_utils.video_inference import bbox_to_original
+
+
+class FakeBBox():
+    # mesma interface da BBox da IceVision empregada por bbox_to_original
+    def __init__(self, xyxy):
+        self.xyxy = xyxy
+
+    @classmethod
+    def from_xyxy(cls, xmin, ymin, xmax, ymax):
+        return cls((xmin, ymin, xmax, ymax))
+
+
+@pytest.fixture(autouse=True)
+def fake_icevision(monkeypatch):
+    # bbox_to_original importa a BBox da IceVision, que não é necessária para verificar a conversão
+    core = types.ModuleType('icevision.core')
+    core.BBox = FakeBBox
+    monkeypatch.setitem(sys.modules, 'icevision', types.ModuleType('icevision'))
+    monkeypatch.setitem(sys.modules, 'icevision.core', core)
+
+
+def to_transformed(xyxy, frame_width, frame_height, img_size):
+    # LongestMaxSize seguido de PadIfNeeded centralizado, como get_tfms(tfms_type='valid')
+    scale = img_size / max(frame_width, frame_height)
+    pad_x = (img_size - int(round(frame_width * scale))) // 2
+    pad_y = (img_size - int(round(frame_height * scale))) // 2
+    xmin, ymin, xmax, ymax = xyxy
+    return FakeBBox((xmin * scale + pad_x, ymin * scale + pad_y, xmax * scale + pad_x, ymax * scale + pad_y))
+
+
+@pytest.mark.parametrize('frame_width, frame_height, img_size', [
+    (640, 480, 384),
+    (480, 640, 384),
+    (1920, 1080, 512),
+    (384, 384, 384),
+])
+def test_round_trip(frame_width, frame_height, img_size):
+    xyxy = (100, 50, 300, 250)
+
+    bbox = bbox_to_original(to_transformed(xyxy, frame_width, frame_height, img_size), frame_width, frame_height, img_size)
+
+    assert bbox.xyxy == pytest.approx(xyxy, abs=1)
+
+
+def test_whole_transformed_image_covers_the_frame():
+    # 640x480 com img_size 384: escala 0,6 e 48 pixels de padding acima e abaixo
+    bbox = bbox_to_original(FakeBBox((0, 48, 384, 336)), 640, 480, 384)
+
+    assert bbox.xyxy == (0, 0, 640, 480)
+
+
+def test_boxes_in_the_padding_are_clipped_to_the_frame():
+    bbox = bbox_to_original(FakeBBox((-10, 0, 400, 20)), 640, 480, 384)
+
+    assert bbox.xyxy == (0, 0, 640, 0)
@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+import pytest
+
+from project_utils.video_pipeline import VideoPipeline
+
+
+def write_video(path, frames=30, size=(64, 48)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, size)
+    for index in range(frames):
+        # o índice do frame é codificado no brilho, que resiste à compressão
+        writer.write(np.full((size[1], size[0], 3), index * 8, dtype=np.uint8))
+    writer.release()
+
+
+def brightness_index(frame):
+    return int(round(frame.mean() / 8))
+
+
+def stub_detector(batch_size):
+    # agrupa os frames em batches, como detect_frames, e devolve o índice lido do frame nas predições
+    def process_frames(frames):
+        batch = []
+        for index, frame in frames:
+            batch.append((index, frame))
+            if len(batch) == batch_size:
+                yield from ((i, f, {'index': brightness_index(f)}) for i, f in batch)
+                batch = []
+        yield from ((i, f, {'index': brightness_index(f)}) for i, f in batch)
+
+    return process_frames
+
+
+def test_pipeline_preserves_frame_order_and_count(tmp_path):
+    input_path = tmp_path / 'input.avi'
+    output_path = tmp_path / 'output.avi'
+    write_video(input_path)
+
+    drawn = []
+
+    def draw(frame, preds):
+        drawn.append(preds['index'])
+        return frame
+
+    pipeline = VideoPipeline(stub_detector(batch_size=4), queue_size=2, fourcc='MJPG', draw=draw)
+    report = pipeline.run(str(input_path), str(output_path))
+
+    assert drawn == list(range(30))
+    assert [report[stage]['items'] for stage in ('decode', 'infer', 'encode')] == [30, 30, 30]
+
+    output = cv2.VideoCapture(str(output_path))
+    written = []
+    while True:
+        ret, frame = output.read()
+        if not ret:
+            break
+        written.append(brightness_index(frame))
+    output.release()
+
+    assert written == list(range(30))
+
+
+def test_pipeline_fails_when_the_output_cannot_be_created(tmp_path):
+    input_path = tmp_path / 'input.avi'
+    write_video(input_path, frames=2)
+
+    pipeline = VideoPipeline(stub_detector(batch_size=1), fourcc='MJPG', draw=lambda frame, preds: frame)
+
+    with pytest.raises(IOError, match='Erro ao criar arquivo'):
+        pipeline.run(str(input_path), str(tmp_path / 'missing' / 'output.avi'))
@@ -0,0 +1,125 @@
+import cv2
+import numpy as np
+import pytest
+
+from project_utils import video_sharding
+from project_utils.video_sharding import concat_segments, get_worker_detector, seek_frame, split_segments
+
+
+def write_video(path, first, count, size=(32, 24)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, size)
+    for index in range(first, first + count):
+        # o índice do frame é codificado no brilho, que resiste à compressão
+        writer.write(np.full((size[1], size[0], 3), index * 8, dtype=np.uint8))
+    writer.release()
+
+
+def read_indices(video):
+    indices = []
+    while True:
+        ret, frame = video.read()
+        if not ret:
+            break
+        indices.append(int(round(frame.mean() / 8)))
+    return indices
+
+
+class ImpreciseCapture():
+    # simula um container em que CAP_PROP_POS_FRAMES não alcança o frame solicitado
+    def __init__(self, path):
+        self.capture = cv2.VideoCapture(path)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES and value > 0:
+            self.capture.set(prop, value - 1)
+            return True
+        return self.capture.set(prop, value)
+
+    def __getattr__(self, name):
+        return getattr(self.capture, name)
+
+
+def test_segments_are_contiguous_and_last_is_open():
+    segments = split_segments(1000, 4)
+
+    assert segments == [(0, 250), (250, 500), (500, 750), (750, None)]
+
+
+def test_remainder_goes_to_first_segments():
+    segments = split_segments(1002, 4)
+
+    assert segments == [(0, 251), (251, 502), (502, 752), (752, None)]
+
+
+def test_min_segment_frames_limits_segment_count():
+    assert split_segments(250, 8, min_segment_frames=100) == [(0, 125), (125, None)]
+    assert split_segments(50, 8, min_segment_frames=100) == [(0, None)]
+
+
+def test_unknown_frame_count_reads_whole_video():
+    assert split_segments(0, 4) == [(0, None)]
+    assert split_segments(-1, 4) == [(0, None)]
+
+
+def test_worker_detector_requires_init_worker():
+    with pytest.raises(RuntimeError):
+        get_worker_detector()
+
+
+def test_seek_frame_positions_exactly(tmp_path):
+    path = tmp_path / 'video.avi'
+    write_video(path, 0, 20)
+
+    video = cv2.VideoCapture(str(path))
+    assert seek_frame(video, 12)
+    assert read_indices(video) == list(range(12, 20))
+    video.release()
+
+
+def test_seek_frame_falls_back_to_sequential_grab(tmp_path):
+    path = tmp_path / 'video.avi'
+    write_video(path, 0, 20)
+
+    video = ImpreciseCapture(str(path))
+    assert seek_frame(video, 7)
+    assert read_indices(video) == list(range(7, 20))
+
+    # o vídeo possui menos frames que o solicitado
+    assert not seek_frame(video, 25)
+    video.release()
+
+
+def test_concat_segments_with_opencv(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_sharding.shutil, 'which', lambda name: None)
+
+    paths = [tmp_path / 'a.avi', tmp_path / 'b.avi', tmp_path / 'c.avi']
+    write_video(paths[0], 0, 5)
+    write_video(paths[1], 5, 7)
+    write_video(paths[2], 12, 3)
+
+    output_path = str(tmp_path / 'output.mp4')
+    concat_segments([str(path) for path in paths], output_path)
+
+    video = cv2.VideoCapture(output_path)
+    assert read_indices(video) == list(range(15))
+    video.release()
+
+
+def test_concat_segments_with_ffmpeg(tmp_path, monkeypatch):
+    calls = []
+
+    def run(command, check):
+        # a lista de segmentos é lida antes de ser removida
+        with open(command[command.index('-i') + 1]) as list_file:
+            calls.append((command, list_file.read()))
+
+    monkeypatch.setattr(video_sharding.shutil, 'which', lambda name: '/usr/bin/ffmpeg')
+    monkeypatch.setattr(video_sharding.subprocess, 'run', run)
+
+    output_path = str(tmp_path / 'output.mp4')
+    concat_segments([str(tmp_path / 'a.mp4'), str(tmp_path / 'b.mp4')], output_path)
+
+    [(command, segments)] = calls
+    assert command[-3:] == ['-c', 'copy', output_path]
+    assert segments == f"file '{tmp_path / 'a.mp4'}'\nfile '{tmp_path / 'b.mp4'}'\n"
+    assert not (tmp_path / 'output.mp4.segments.txt').exists()